@@ -21,10 +21,12 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'widget_tweaks',
+    'rest_framework',
     'store',  # Your app
 ]
 
 MIDDLEWARE = [
+    'store.instrumentation.InstrumentationMiddleware',  # first, so it times the whole stack
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -54,13 +56,63 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'inventory_project.wsgi.application'
 
-# Database (default is SQLite)
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Database. SQLite unless DATABASE_ENGINE=postgresql; the other DATABASE_*
+# variables override the defaults below.
+DATABASE_ENGINE = os.environ.get('DATABASE_ENGINE', 'sqlite')
+if DATABASE_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DATABASE_NAME', 'cda_store'),
+            'USER': os.environ.get('DATABASE_USER', ''),
+            'PASSWORD': os.environ.get('DATABASE_PASSWORD', ''),
+            'HOST': os.environ.get('DATABASE_HOST', ''),
+            'PORT': os.environ.get('DATABASE_PORT', ''),
+            # Keep connections open between requests; check them before reuse.
+            'CONN_MAX_AGE': int(os.environ.get('DATABASE_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            # Pooling: point HOST/PORT at PgBouncer (transaction mode) and set
+            # DATABASE_POOLER=pgbouncer. Server-side cursors don't survive it.
+            'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('DATABASE_POOLER') == 'pgbouncer',
+            'OPTIONS': {'connect_timeout': int(os.environ.get('DATABASE_CONNECT_TIMEOUT', 10))},
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            # WAL, busy timeout and BEGIN IMMEDIATE; see store/backends/sqlite3.
+            'ENGINE': 'store.backends.sqlite3',
+            'NAME': os.environ.get('DATABASE_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': int(os.environ.get('DATABASE_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            # A file, not the in-memory default: the issuance tests write from
+            # several threads, which an in-memory database can't serve.
+            'TEST': {'NAME': os.environ.get('DATABASE_TEST_NAME', BASE_DIR / 'test_db.sqlite3')},
+            'OPTIONS': {
+                'pragmas': {
+                    'journal_mode': 'WAL',
+                    'synchronous': 'NORMAL',
+                    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 20000)),
+                    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+                },
+            },
+        }
     }
-}
+
+# Archived receipts and issues (store.archive) stay in the main database
+# unless STORE_ARCHIVE_PATH names a separate SQLite file for them; then run
+# `manage.py migrate --database archive` once. Only reports that reach back
+# past the archive cutoff open it.
+DATABASE_ROUTERS = ['store.routers.ArchiveRouter']
+STORE_ARCHIVE_DATABASE = 'default'
+if os.environ.get('STORE_ARCHIVE_PATH'):
+    STORE_ARCHIVE_DATABASE = 'archive'
+    DATABASES['archive'] = {
+        'ENGINE': 'store.backends.sqlite3',
+        'NAME': os.environ['STORE_ARCHIVE_PATH'],
+        'OPTIONS': {'pragmas': {'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 20000}},
+    }
+STORE_ARCHIVE_AFTER_DAYS = 730   # archive_history's default cutoff: rows older than this
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -89,6 +141,47 @@ LOGOUT_REDIRECT_URL = '/accounts/login/'
 # Default auto field type (optional but removes warnings)
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Background PDF rendering (store.rendering)
+STORE_PDF_CACHE_DIR = BASE_DIR / 'pdf_cache'
+STORE_PDF_WORKERS = 2    # 0 renders in the request thread
+STORE_PDF_WAIT = 10      # seconds a print view waits before handing off to the status page
+STORE_PDF_PENDING_TIMEOUT = 600         # seconds before an unfinished render counts as failed
+STORE_PDF_CACHE_MAX_AGE = 7 * 24 * 3600  # seconds a cached PDF is kept
+STORE_PDF_CACHE_MAX_MB = 500            # the least recently served PDFs go first past this
+
+# REST API (store.api)
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+    'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.IsAuthenticated'],
+}
+
+# Dashboard metrics cache (store.dashboard). A file cache is shared by every
+# worker process on the host, so a write's invalidation reaches all of them.
+# Don't switch to LocMemCache with more than one worker: each process would
+# keep serving its own stale copy until the timeout. Across hosts, use Redis
+# or Memcached.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('STORE_CACHE_DIR', BASE_DIR / 'cache'),
+    }
+}
+STORE_LOW_STOCK_THRESHOLD = 40        # used when neither the item nor its category sets a reorder level
+STORE_DASHBOARD_CACHE_TIMEOUT = 300   # seconds; writes invalidate it sooner
+
+# Consumption forecast behind the dashboard's reorder suggestions
+# (store.forecasting, refreshed by `manage.py forecast_consumption`).
+STORE_FORECAST_HISTORY_DAYS = 180
+STORE_FORECAST_LEAD_DAYS = 14     # days from ordering to receiving
+STORE_FORECAST_REVIEW_DAYS = 30   # demand a suggested order covers past the reorder point
+
+# Request instrumentation (store.instrumentation); per-view metrics are served
+# to staff at /metrics/ (?format=prometheus for Prometheus).
+STORE_SLOW_QUERY_MS = 500   # log queries slower than this; None turns it off
+
 # Static files (ensure this is defined for PDF export)
 #STATICFILES_DIRS = [
 #    os.path.join(BASE_DIR, 'static'),
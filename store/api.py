@@ -0,0 +1,187 @@
+"""
+REST API for stock items, receipts, issues, offices and vendors.
+
+Lists use cursor pagination, so deep pages cost the same as the first one,
+and ``?fields=`` trims the payload. Every GET carries an ETag computed from
+the response body; a matching ``If-None-Match`` gets a bodiless 304.
+
+Receipts and issues are created through the same paths as the HTML forms:
+receipt ``bulk_create`` updates the ledger and vouchers, and issues go through
+``issuance.issue_stock``, so a batch is stock-checked and written atomically.
+"""
+from django.db import transaction
+from django.utils.cache import get_conditional_response, set_response_etag
+from django.utils.dateparse import parse_date
+from rest_framework import mixins, routers, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+from . import issuance, search
+from .models import Issue, Office, Receipt, StockItem, Vendor
+from .serializers import (
+    IssueSerializer, OfficeSerializer, ReceiptSerializer, StockItemSerializer, VendorSerializer,
+)
+
+BULK_LIMIT = 5000
+
+
+class StoreCursorPagination(CursorPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = '-id'
+
+
+class ItemCursorPagination(StoreCursorPagination):
+    ordering = 'name'
+
+
+class ETagMixin:
+    """Tag GET responses with a hash of their body and honour If-None-Match."""
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method in ('GET', 'HEAD') and response.status_code == 200:
+            response.render()
+            set_response_etag(response)
+            return get_conditional_response(request, etag=response.get('ETag'), response=response)
+        return response
+
+
+class StoreViewSet(ETagMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
+                   mixins.CreateModelMixin, viewsets.GenericViewSet):
+    pagination_class = StoreCursorPagination
+
+    def id_param(self, name):
+        """The ``name`` query parameter as an id, None if absent; 400 if it isn't one."""
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            raise ValidationError({name: "Must be a whole number."})
+
+    def date_param(self, name):
+        """The ``name`` query parameter as a date, None if absent; 400 if it isn't one."""
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+        try:
+            day = parse_date(value)
+        except ValueError:
+            day = None
+        if day is None:
+            raise ValidationError({name: "Must be a date (YYYY-MM-DD)."})
+        return day
+
+    def date_range(self, queryset, field):
+        start = self.date_param('date_from')
+        end = self.date_param('date_to')
+        if start:
+            queryset = queryset.filter(**{f'{field}__gte': start})
+        if end:
+            queryset = queryset.filter(**{f'{field}__lte': end})
+        return queryset
+
+    def bulk_serializer(self, request):
+        if not isinstance(request.data, list):
+            raise ValidationError({'detail': "Expected a list of objects."})
+        if len(request.data) > BULK_LIMIT:
+            raise ValidationError({'detail': f"At most {BULK_LIMIT} objects per request."})
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        return serializer
+
+
+class OfficeViewSet(StoreViewSet):
+    queryset = Office.objects.all()
+    serializer_class = OfficeSerializer
+
+
+class VendorViewSet(StoreViewSet):
+    queryset = Vendor.objects.all()
+    serializer_class = VendorSerializer
+
+
+class StockItemViewSet(StoreViewSet):
+    serializer_class = StockItemSerializer
+    pagination_class = ItemCursorPagination
+
+    def get_queryset(self):
+        queryset = StockItem.objects.select_related('vendor', 'category', 'balance')
+        params = self.request.query_params
+        if params.get('q'):
+            queryset = search.filter_queryset(queryset, 'item', params['q'])
+        vendor = self.id_param('vendor')
+        if vendor:
+            queryset = queryset.filter(vendor_id=vendor)
+        return queryset
+
+
+class ReceiptViewSet(StoreViewSet):
+    serializer_class = ReceiptSerializer
+
+    def get_queryset(self):
+        queryset = self.date_range(Receipt.objects.select_related('stock_item'), 'date_received')
+        params = self.request.query_params
+        stock_item = self.id_param('stock_item')
+        if stock_item:
+            queryset = queryset.filter(stock_item_id=stock_item)
+        if params.get('voucher'):
+            queryset = queryset.filter(voucher_number=params['voucher'])
+        return queryset
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        serializer = self.bulk_serializer(request)
+        with transaction.atomic():
+            receipts = Receipt.objects.bulk_create([Receipt(**data) for data in serializer.validated_data])
+        return Response(self.get_serializer(receipts, many=True).data, status=status.HTTP_201_CREATED)
+
+
+class IssueViewSet(StoreViewSet):
+    serializer_class = IssueSerializer
+
+    def get_queryset(self):
+        queryset = self.date_range(Issue.objects.select_related('stock_item', 'office'), 'date_issued')
+        stock_item = self.id_param('stock_item')
+        office = self.id_param('office')
+        if stock_item:
+            queryset = queryset.filter(stock_item_id=stock_item)
+        if office:
+            queryset = queryset.filter(office_id=office)
+        return queryset
+
+    def handle_exception(self, exc):
+        if isinstance(exc, issuance.InsufficientStock):
+            return Response({
+                'detail': "Not enough stock; nothing was issued.",
+                'shortages': {
+                    item_id: {'requested': requested, 'available': available}
+                    for item_id, (requested, available) in exc.shortages.items()
+                },
+            }, status=status.HTTP_409_CONFLICT)
+        return super().handle_exception(exc)
+
+    def _issue(self, validated):
+        return issuance.issue_stock(None, [Issue(**data) for data in validated])
+
+    def perform_create(self, serializer):
+        serializer.instance = self._issue([serializer.validated_data])[0]
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        serializer = self.bulk_serializer(request)
+        issues = self._issue(serializer.validated_data)
+        return Response(self.get_serializer(issues, many=True).data, status=status.HTTP_201_CREATED)
+
+
+router = routers.DefaultRouter()
+router.register('items', StockItemViewSet, basename='api-item')
+router.register('receipts', ReceiptViewSet, basename='api-receipt')
+router.register('issues', IssueViewSet, basename='api-issue')
+router.register('offices', OfficeViewSet, basename='api-office')
+router.register('vendors', VendorViewSet, basename='api-vendor')
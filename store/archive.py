@@ -0,0 +1,185 @@
+"""
+Archival of old receipts and issues.
+
+``archive(cutoff)`` moves every Receipt and Issue dated on or before the
+cutoff into ``ArchivedReceipt`` / ``ArchivedIssue``. The rows keep their
+ids, and archived issues keep their costs. Those tables sit in the main
+database or in a separate SQLite file (``STORE_ARCHIVE_PATH``, see
+store.routers). First each item's archived history is folded into its
+``OpeningBalance`` and ``OpeningLayer`` rows: the totals, the average cost
+and the FIFO layers on hand at the cutoff. The ledger and valuation start
+from those rows, so current balances and costs don't change. The rows
+leave the live tables without firing the model signals. The daily rollups
+and period closes already include them, so they stay as they are.
+
+Code that reads history by date asks ``overlaps(start)`` and adds the
+archived rows when the range reaches back to the cutoff:
+- period closes and as-of stock (store.periods);
+- rollup rebuilds (store.rollups);
+- as-of valuation (store.valuation);
+- report listings and exports (store.reports, store.exports).
+Everything else reads only the live tables.
+
+With a separate archive database the copy commits before the live rows are
+deleted. If a run fails in between, run it again with the same cutoff.
+"""
+from django.db import connection, transaction
+from django.db.models import F
+
+from .models import (
+    ArchivedIssue, ArchivedReceipt, ArchiveRun, CostLayer, Issue, IssueCost, Office, OpeningBalance, OpeningLayer,
+    Receipt, StockItem, Voucher,
+)
+
+BATCH_SIZE = 2000
+
+
+def cutoff():
+    """The last day archived, or None."""
+    return ArchiveRun.objects.order_by('-cutoff').values_list('cutoff', flat=True).first()
+
+
+def overlaps(start=None, after=None):
+    """
+    Whether archived rows can fall in a range that starts on ``start`` (or
+    just after ``after``); an open start reaches back to the first day.
+    """
+    last = cutoff()
+    if last is None:
+        return False
+    if after is not None:
+        return after < last
+    return start is None or start <= last
+
+
+def receipts(start=None, end=None):
+    qs = ArchivedReceipt.objects.all()
+    if start:
+        qs = qs.filter(date_received__gte=start)
+    if end:
+        qs = qs.filter(date_received__lte=end)
+    return qs
+
+
+def issues(start=None, end=None):
+    qs = ArchivedIssue.objects.all()
+    if start:
+        qs = qs.filter(date_issued__gte=start)
+    if end:
+        qs = qs.filter(date_issued__lte=end)
+    return qs
+
+
+def detach(model, pk):
+    """
+    Follow the delete of a stock item (its archived rows go too, as its
+    opening balance does), an office or a voucher (archived rows keep their
+    quantities and lose the link, since the opening balances count them).
+    """
+    if model is StockItem:
+        receipts().filter(stock_item_id=pk).delete()
+        issues().filter(stock_item_id=pk).delete()
+    elif model is Office:
+        issues().filter(office_id=pk).update(office=None)
+    elif model is Voucher:
+        receipts().filter(voucher_id=pk).update(voucher=None)
+
+
+def _chunks(ids):
+    for start in range(0, len(ids), BATCH_SIZE):
+        yield ids[start:start + BATCH_SIZE]
+
+
+def _copy(ids, model, archived_model, fields, **expressions):
+    """Copy rows into the archive table in batches; rows copied by an earlier, failed run are skipped."""
+    for chunk in _chunks(ids):
+        archived_model.objects.bulk_create([
+            archived_model(**row) for row in model.objects.filter(pk__in=chunk).values(*fields, **expressions)
+        ], ignore_conflicts=True)
+
+
+def _delete(model, ids):
+    # Raw deletes: the signals would take the rows out of the ledger,
+    # rollups and period closes, which must keep counting them.
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {table} WHERE id = %s', [(pk,) for pk in ids])
+
+
+def _fold(states, received, issued, through):
+    """Replace the items' opening balances with their state at ``through``."""
+    item_ids = [state.stock_item_id for state in states]
+    previous = {
+        opening.stock_item_id: opening for opening in OpeningBalance.objects.filter(stock_item_id__in=item_ids)
+    }
+    OpeningBalance.objects.filter(stock_item_id__in=item_ids).delete()
+    OpeningLayer.objects.filter(stock_item_id__in=item_ids).delete()
+    openings, layers = [], []
+    for state in states:
+        item_id = state.stock_item_id
+        before = previous.get(item_id)
+        openings.append(OpeningBalance(
+            stock_item_id=item_id, as_of=through, average_cost=state.average_cost,
+            quantity_received=(before.quantity_received if before else 0) + received.get(item_id, 0),
+            quantity_issued=(before.quantity_issued if before else 0) + issued.get(item_id, 0),
+        ))
+        layers += [
+            OpeningLayer(stock_item_id=item_id, date=layer.date, unit_cost=layer.unit_cost, quantity=layer.remaining)
+            for layer in state.layers if layer.remaining
+        ]
+    OpeningBalance.objects.bulk_create(openings, batch_size=500)
+    OpeningLayer.objects.bulk_create(layers, batch_size=1000)
+
+
+def archive(through):
+    """
+    Move the receipts and issues dated on or before ``through`` into the
+    archive. Returns ``(receipts, issues)`` moved.
+    """
+    from . import conditional, dashboard, valuation
+
+    last = cutoff()
+    if last and through < last:
+        raise ValueError(f"Already archived through {last}; the cutoff can only move forward.")
+    valuation.refresh()
+
+    with transaction.atomic():
+        receipt_rows = list(Receipt.objects.filter(date_received__lte=through).values_list(
+            'pk', 'stock_item_id', 'quantity_received'
+        ))
+        issue_rows = list(Issue.objects.filter(date_issued__lte=through).values_list(
+            'pk', 'stock_item_id', 'quantity_issued', 'office_id'
+        ))
+        received, issued = {}, {}
+        for _, item_id, quantity in receipt_rows:
+            received[item_id] = received.get(item_id, 0) + quantity
+        for _, item_id, quantity, _ in issue_rows:
+            issued[item_id] = issued.get(item_id, 0) + quantity
+        receipt_ids = [row[0] for row in receipt_rows]
+        issue_ids = [row[0] for row in issue_rows]
+        item_ids = sorted(set(received) | set(issued))
+
+        # Valuation state at the cutoff, from the current opening balance.
+        _fold(list(valuation.replay(item_ids, through=through)), received, issued, through)
+
+        _copy(receipt_ids, Receipt, ArchivedReceipt, (
+            'id', 'stock_item_id', 'quantity_received', 'unit_price', 'total_price', 'date_received',
+            'voucher_number', 'voucher_id',
+        ))
+        _copy(issue_ids, Issue, ArchivedIssue, (
+            'id', 'stock_item_id', 'office_id', 'quantity_issued', 'remarks', 'date_issued',
+        ), fifo_cost=F('cost__fifo_cost'), average_cost=F('cost__average_cost'))
+
+        for chunk in _chunks(receipt_ids):
+            CostLayer.objects.filter(receipt_id__in=chunk).delete()
+        for chunk in _chunks(issue_ids):
+            IssueCost.objects.filter(issue_id__in=chunk).delete()
+        _delete(Receipt, receipt_ids)
+        _delete(Issue, issue_ids)
+
+        # Layers and costs of the items' remaining rows, from the new opening.
+        valuation.rebuild(item_ids)
+        ArchiveRun.objects.create(cutoff=through, receipts=len(receipt_ids), issues=len(issue_ids))
+        conditional.touch_offices({row[3] for row in issue_rows})
+        dashboard.invalidate()
+    return len(receipt_ids), len(issue_ids)
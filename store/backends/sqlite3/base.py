@@ -0,0 +1,31 @@
+"""
+SQLite backend tuned for several clerks writing at once.
+
+- Every new connection runs the PRAGMAs in ``OPTIONS['pragmas']``
+  (WAL journal, ``synchronous=NORMAL``, ``busy_timeout``, mmap), so readers
+  don't block the writer and a busy writer is waited for, not failed.
+- Transactions start with ``BEGIN IMMEDIATE``. A deferred transaction that
+  reads first and then writes can't wait out another writer: SQLite fails
+  its lock upgrade straight away with "database is locked", whatever the
+  busy timeout. Taking the write lock up front makes writers queue instead.
+
+Use it as ``'ENGINE': 'store.backends.sqlite3'``; everything else is the
+stock Django SQLite backend.
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = params.pop('pragmas', {})
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
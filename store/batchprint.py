@@ -0,0 +1,191 @@
+"""
+Batch printing: every issue slip or voucher in a date range as one PDF.
+
+The documents are fetched with a couple of grouped queries and rendered to
+HTML here. Each one is then queued through ``rendering.submit`` exactly as
+if it had been printed alone. The pool renders them in parallel, and any
+document already in the PDF cache is not rendered again. A background
+thread waits for them and merges the pages with pypdf into one file. That
+file is cached under a key built from the documents' keys, so the status
+page and ``rendering.file_response`` serve it like any other PDF.
+"""
+import hashlib
+import os
+import threading
+from decimal import Decimal
+from itertools import groupby
+
+from django.db.models import F
+
+from . import rendering, vouchers
+from .models import Issue, Receipt, Voucher
+
+KINDS = {'issues': 'Issue slips', 'vouchers': 'Vouchers'}
+MAX_DOCUMENTS = 1000  # per request; the print_batch command has no limit
+
+_lock = threading.Lock()
+_batches = {}
+
+
+# ---------------- Documents ----------------
+def issue_slip_rows(office, issue_date, issues):
+    """Cache key rows of one issue slip (shared with the single-slip view)."""
+    return [
+        (office.id, office.name, str(issue_date)),
+        *((issue.id, issue.stock_item.name, issue.quantity_issued, issue.remarks) for issue in issues),
+    ]
+
+
+def voucher_rows(context):
+    """Cache key rows of one printed voucher, from ``vouchers.voucher_summary`` or the batch equivalent."""
+    return [
+        (context['voucher_number'], context['vendor_name'], str(context['voucher_date']),
+         f"{context['grand_total']:.2f}"),
+        *((line['item_name'], f"{line['unit_price']:.2f}", line['quantity'], f"{line['total_price']:.2f}")
+          for line in context['receipts']),
+    ]
+
+
+def issue_documents(start, end, office_id=None):
+    """(kind, template, rows, context) for every office's issue slip of every day in the range."""
+    issues = (
+        Issue.objects.filter(office__isnull=False, date_issued__range=[start, end])
+        .select_related('office', 'stock_item').order_by('date_issued', 'office__name', 'office_id', 'id')
+    )
+    if office_id:
+        issues = issues.filter(office_id=office_id)
+    documents = []
+    for (issue_date, _), lines in groupby(issues, key=lambda issue: (issue.date_issued, issue.office_id)):
+        lines = list(lines)
+        office = lines[0].office
+        documents.append((
+            'issue_slip', 'store/issue_print.html', issue_slip_rows(office, issue_date, lines),
+            {'office': office, 'issues': lines, 'issue_date': issue_date},
+        ))
+    return documents
+
+
+def voucher_documents(start, end, vendor_id=None):
+    """(kind, template, rows, context) for every voucher dated in the range."""
+    found = Voucher.objects.filter(date__range=[start, end])
+    if vendor_id:
+        found = found.filter(vendor_id=vendor_id)
+    lines = {
+        voucher_id: list(group)
+        for voucher_id, group in groupby(
+            vouchers.group_receipts(
+                Receipt.objects.filter(voucher__in=found.values('pk')),
+                'voucher_id', 'unit_price', item_name=F('stock_item__name'),
+            ).order_by('voucher_id', 'item_name', 'unit_price'),
+            key=lambda line: line['voucher_id'],
+        )
+    }
+    documents = []
+    for voucher in found.select_related('vendor').order_by('date', 'number'):
+        receipts = lines.get(voucher.pk, [])
+        context = {
+            'voucher': voucher,
+            'voucher_number': voucher.number,
+            'vendor_name': voucher.vendor.name if voucher.vendor else '',
+            'voucher_date': voucher.date,
+            'receipts': receipts,
+            'grand_total': sum((line['total_price'] for line in receipts), Decimal('0.00')),
+        }
+        documents.append(('voucher', 'store/voucher_print.html', voucher_rows(context), context))
+    return documents
+
+
+def documents(kind, start, end, office_id=None, vendor_id=None):
+    if kind == 'issues':
+        return issue_documents(start, end, office_id)
+    if kind == 'vouchers':
+        return voucher_documents(start, end, vendor_id)
+    raise ValueError(f"Unknown batch kind {kind!r}.")
+
+
+# ---------------- Rendering ----------------
+class Batch:
+    """A merged print job. ``join`` waits for it; ``pages`` is set once this process merged it."""
+
+    def __init__(self, key, count):
+        self.key = key
+        self.count = count
+        self.pages = None
+        self.thread = None
+
+    def join(self, timeout=None):
+        if self.thread is not None:
+            self.thread.join(timeout)
+        return rendering.status(self.key)
+
+
+def batch_key(keys):
+    return hashlib.sha256('\0'.join(['batch', *keys]).encode()).hexdigest()
+
+
+def submit(documents):
+    """Queue every document that isn't cached and merge them in the background."""
+    keys, jobs = [], []
+    for kind, template_name, rows, context in documents:
+        key = rendering.content_key(kind, template_name, rows)
+        keys.append(key)
+        job = rendering.queue(key, template_name, lambda context=context: context)
+        if job is not None:
+            jobs.append(job)
+
+    key = batch_key(keys)
+    with _lock:
+        batch = _batches.get(key)
+        if batch is not None:
+            return batch
+        batch = Batch(key, len(keys))
+        if rendering.status(key) == 'ready':
+            return batch
+        pdf_path, pending_path, err_path = rendering.paths(key)
+        err_path.unlink(missing_ok=True)
+        pending_path.touch()
+        batch.thread = threading.Thread(target=_merge, args=(batch, keys, jobs), daemon=True)
+        _batches[key] = batch
+    batch.thread.start()
+    return batch
+
+
+def _merge(batch, keys, jobs):
+    pdf_path, pending_path, err_path = rendering.paths(batch.key)
+    try:
+        for job in jobs:
+            job.result()
+            pending_path.touch()   # still going; see rendering.status()
+        failed = [key for key in keys if rendering.status(key) != 'ready']
+        if failed:
+            raise RuntimeError(f"{len(failed)} of {len(keys)} documents failed to render.")
+        batch.pages = merge([rendering.paths(key)[0] for key in keys], pdf_path)
+    except Exception as exc:
+        err_path.write_text(str(exc))
+    finally:
+        pending_path.unlink(missing_ok=True)
+        with _lock:
+            _batches.pop(batch.key, None)
+
+
+def merge(sources, target):
+    """Concatenate the PDFs in ``sources`` into ``target``; returns the page count."""
+    from pypdf import PdfWriter
+
+    writer = PdfWriter()
+    for source in sources:
+        writer.append(str(source))
+    tmp_path = target.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+    try:
+        with open(tmp_path, 'wb') as fh:
+            writer.write(fh)
+        os.replace(tmp_path, target)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return len(writer.pages)
+
+
+def page_count(path):
+    from pypdf import PdfReader
+
+    return len(PdfReader(str(path)).pages)
@@ -0,0 +1,169 @@
+"""
+Helpers for the benchmark commands.
+
+``measure`` runs a callable a number of times and records its wall time and
+SQL query count (counted with ``connection.execute_wrapper``, so it works
+without DEBUG). ``peak_memory`` runs it once more under ``tracemalloc``, kept
+separate because tracing slows everything down. Results are plain dicts that
+``write_results`` saves as JSON and ``compare`` diffs against an earlier file.
+"""
+import json
+import platform
+import random
+import statistics
+import time
+import tracemalloc
+from contextlib import ExitStack
+from datetime import date, datetime
+
+import django
+from django.conf import settings
+from django.db import OperationalError, close_old_connections, connection, connections
+
+
+class QueryCounter:
+    """Counts the queries run on any connection inside the ``with`` block."""
+
+    def __init__(self):
+        self.count = 0
+        self._stack = None
+
+    def _wrapper(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for conn in connections.all():
+            self._stack.enter_context(conn.execute_wrapper(self._wrapper))
+        return self
+
+    def __exit__(self, *exc):
+        self._stack.close()
+
+
+def summarize(values):
+    if not values:
+        return {'min': None, 'median': None, 'mean': None, 'max': None}
+    return {
+        'min': min(values),
+        'median': statistics.median(values),
+        'mean': statistics.fmean(values),
+        'max': max(values),
+    }
+
+
+def measure(run, repeat=5):
+    """
+    Call ``run()`` ``repeat`` times. The first call is reported on its own as
+    well, since it is the one that fills caches.
+    """
+    times, queries, result = [], [], None
+    for _ in range(repeat):
+        with QueryCounter() as counter:
+            started = time.perf_counter()
+            result = run()
+            times.append((time.perf_counter() - started) * 1000)
+        queries.append(counter.count)
+    return {
+        'first_ms': times[0],
+        'ms': summarize(times),
+        'queries': summarize(queries),
+        'result': result,
+    }
+
+
+def peak_memory(run):
+    """Peak Python allocation (KiB) while ``run()`` executes."""
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        run()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def environment():
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+    }
+
+
+def write_results(path, data):
+    with open(path, 'w') as fh:
+        json.dump(data, fh, indent=2, sort_keys=True, default=str)
+
+
+def load_results(path):
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def change(before, after):
+    if before in (None, 0) or after is None:
+        return None
+    return (after - before) / before * 100
+
+
+def compare(baseline, current, metric=('ms', 'median')):
+    """[(name, before, after, change %)] for every benchmark in both result sets."""
+    rows = []
+    for name, result in current['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if previous is None:
+            continue
+        before = previous[metric[0]][metric[1]]
+        after = result[metric[0]][metric[1]]
+        rows.append((name, before, after, change(before, after)))
+    return rows
+
+
+def write_load(job):
+    """
+    Worker for ``load_test_writes``, run in a spawned process: configure
+    Django, then write receipts and issues until the window closes. It lives
+    here because the pool unpickles it before Django is set up, and this
+    module imports no models.
+    """
+    if job['database']:
+        settings.DATABASES['default'].update(job['database'])
+    django.setup()
+
+    from store import issuance
+    from store.models import Issue, Receipt
+
+    rng = random.Random(job['seed'])
+    result = {'ops': 0, 'receipts': 0, 'issues': 0, 'rejected': 0, 'locked': 0, 'latencies': []}
+    time.sleep(max(0, job['start'] - time.time()))
+    while time.time() < job['end']:
+        started = time.perf_counter()
+        try:
+            if rng.random() < 0.5:
+                Receipt.objects.create(
+                    stock_item_id=rng.choice(job['items']), quantity_received=rng.randint(1, 20),
+                    unit_price=1, date_received=date.today(),
+                    voucher_number=f"LOAD-{job['seed']}-{result['receipts'] // 5}",
+                )
+                result['receipts'] += 1
+            else:
+                issuance.issue_stock(None, [
+                    Issue(stock_item_id=item, office_id=rng.choice(job['offices']), quantity_issued=1,
+                          date_issued=date.today(), remarks='load test')
+                    for item in rng.sample(job['items'], rng.randint(1, 3))
+                ])
+                result['issues'] += 1
+            result['ops'] += 1
+            result['latencies'].append((time.perf_counter() - started) * 1000)
+        except issuance.InsufficientStock:
+            result['rejected'] += 1
+        except OperationalError as exc:
+            if 'locked' not in str(exc):
+                raise
+            result['locked'] += 1
+        # What the request cycle does between requests.
+        close_old_connections()
+    return result
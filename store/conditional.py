@@ -0,0 +1,123 @@
+"""
+Conditional GET for the voucher, issue, office and vendor pages.
+
+Receipt and Issue rows carry ``updated_at``. Their parents (Voucher, Office,
+Vendor) carry one too, bumped whenever a child is added, edited or deleted,
+so it only moves forward and is safe to serve as Last-Modified. ETags
+fingerprint what a page actually shows (row count, id sum, newest
+``updated_at``), so an issue batch keeps its ETag when another batch of the
+same office changes. Both pages print item names, so the newest
+``updated_at`` of their items is part of the fingerprint too: renaming an
+item changes the ETag of every voucher and issue batch it appears on.
+
+The ``*_etag``/``*_last_modified`` pairs plug into
+``django.views.decorators.http.condition``.
+"""
+import hashlib
+
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import Issue, Office, Vendor, Voucher
+
+
+def touch_offices(ids):
+    ids = {pk for pk in ids if pk}
+    if ids:
+        Office.objects.filter(pk__in=ids).update(updated_at=timezone.now())
+
+
+def touch_vendors(ids):
+    ids = {pk for pk in ids if pk}
+    if ids:
+        Vendor.objects.filter(pk__in=ids).update(updated_at=timezone.now())
+
+
+def _memo(request, key, compute):
+    # condition() asks for the ETag and Last-Modified separately; look the
+    # object up once per request.
+    memo = request.__dict__.setdefault('_conditional', {})
+    if key not in memo:
+        memo[key] = compute()
+    return memo[key]
+
+
+def _etag(request, *parts):
+    # Every page greets the signed-in user, so tags are per user.
+    return hashlib.md5(repr((request.user.pk,) + parts).encode()).hexdigest()
+
+
+def _fingerprint(queryset):
+    row = queryset.order_by().aggregate(
+        count=Count('pk'), ids=Sum('pk'), latest=Max('updated_at'), items=Max('stock_item__updated_at'),
+    )
+    return row['count'], row['ids'], row['latest'], row['items']
+
+
+# ---------------- Vouchers ----------------
+def _voucher(request, voucher_number):
+    return _memo(request, ('voucher', voucher_number), lambda: (
+        Voucher.objects.filter(number=voucher_number)
+        .annotate(items=Max('receipts__stock_item__updated_at'))
+        .values_list('updated_at', 'vendor__updated_at', 'items').first()
+    ))
+
+
+def voucher_etag(request, voucher_number):
+    voucher = _voucher(request, voucher_number)
+    return _etag(request, 'voucher', voucher_number, voucher) if voucher else None
+
+
+def voucher_last_modified(request, voucher_number):
+    voucher = _voucher(request, voucher_number)
+    return max(filter(None, voucher)) if voucher else None
+
+
+# ---------------- Issue batches ----------------
+def _issue_batch(request, date, office_id):
+    def compute():
+        day = parse_date(date)
+        office = Office.objects.filter(pk=office_id).values_list('name', 'location', 'updated_at').first()
+        if day is None or office is None:
+            return None
+        return office, _fingerprint(Issue.objects.filter(office_id=office_id, date_issued=day))
+    return _memo(request, ('issues', date, office_id), compute)
+
+
+def issue_batch_etag(request, date, office_id):
+    batch = _issue_batch(request, date, office_id)
+    if batch is None:
+        return None
+    (name, location, _), fingerprint = batch
+    return _etag(request, 'issues', date, office_id, name, location, fingerprint)
+
+
+def issue_batch_last_modified(request, date, office_id):
+    batch = _issue_batch(request, date, office_id)
+    return max(filter(None, (batch[0][2], batch[1][3]))) if batch else None
+
+
+# ---------------- Offices and vendors ----------------
+def _updated_at(request, model, pk):
+    return _memo(request, (model.__name__, pk), lambda: (
+        model.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+    ))
+
+
+def office_etag(request, office_id):
+    updated_at = _updated_at(request, Office, office_id)
+    return _etag(request, 'office', office_id, updated_at) if updated_at else None
+
+
+def office_last_modified(request, office_id):
+    return _updated_at(request, Office, office_id)
+
+
+def vendor_etag(request, vendor_id):
+    updated_at = _updated_at(request, Vendor, vendor_id)
+    return _etag(request, 'vendor', vendor_id, updated_at) if updated_at else None
+
+
+def vendor_last_modified(request, vendor_id):
+    return _updated_at(request, Vendor, vendor_id)
@@ -0,0 +1,51 @@
+"""
+Cached dashboard metrics.
+
+The counts, the low-stock list and the forecast reorder suggestions are
+computed once and kept in Django's default cache until a
+Vendor/StockItem/StockCategory/Issue/Receipt write or a forecast refresh
+invalidates them (see ``store.signals``, the bulk_create hooks and
+``store.forecasting``). Invalidation only reaches the processes that share
+the cache backend: the default file cache serves every worker on one host,
+while a per-process LocMemCache would leave the other workers serving stale
+metrics until the timeout.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+
+from . import reports
+from .models import ConsumptionForecast, Issue, StockItem, Vendor
+
+CACHE_KEY = 'store:dashboard'
+LOW_STOCK_LIMIT = 100
+
+
+def _compute():
+    low_stock = reports.low_stock_items()
+    reorder = reports.reorder_suggestions()
+    return {
+        'vendor_count': Vendor.objects.count(),
+        'stock_count': StockItem.objects.count(),
+        'issue_count': Issue.objects.count(),
+        'low_stock_count': low_stock.count(),
+        'low_stock_items': list(
+            low_stock.values('id', 'name', 'vendor__name', 'remaining', 'threshold')[:LOW_STOCK_LIMIT]
+        ),
+        'forecast_as_of': ConsumptionForecast.objects.aggregate(as_of=Max('as_of'))['as_of'],
+        'reorder_count': reorder.count(),
+        'reorder_items': list(reorder.values(
+            'stock_item_id', 'stock_item__name', 'stock_item__vendor__name', 'remaining', 'smoothed', 'cover',
+            'reorder_point', 'suggested',
+        )[:LOW_STOCK_LIMIT]),
+    }
+
+
+def metrics():
+    return cache.get_or_set(CACHE_KEY, _compute, getattr(settings, 'STORE_DASHBOARD_CACHE_TIMEOUT', 300))
+
+
+def invalidate(using=None):
+    """Drop the cached metrics once the current transaction commits."""
+    transaction.on_commit(lambda: cache.delete(CACHE_KEY), using=using)
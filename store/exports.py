@@ -0,0 +1,103 @@
+"""
+Streaming tabular exports of receipts and issues.
+
+Rows come straight from ``values_list(...).iterator(chunk_size=...)`` and are
+written out as they are read, so memory use doesn't grow with the report.
+Archived rows (store.archive) come first, for ranges that reach back to the
+archive cutoff.
+"""
+import csv
+from decimal import Decimal
+from itertools import chain
+
+from django.http import StreamingHttpResponse
+
+from . import reports, xlsx
+
+CHUNK_SIZE = 2000
+FORMATS = ('csv', 'xlsx')
+
+HEADER = ['Type', 'Date', 'Item', 'Vendor', 'Unit', 'Quantity', 'Unit Price', 'Office', 'Voucher', 'Remarks']
+
+
+def export_filters(params):
+    """The report filters, exporting both receipts and issues if neither is picked."""
+    filters = reports.report_filters(params)
+    if not filters['include_receipts'] and not filters['include_issues']:
+        filters['include_receipts'] = filters['include_issues'] = True
+    return filters
+
+
+def receipt_rows(**filters):
+    archived = (
+        ('Receipt', receipt.date_received, receipt.stock_item.name, receipt.stock_item.vendor.name,
+         receipt.stock_item.unit, receipt.quantity_received, receipt.unit_price, '', receipt.voucher_number, '')
+        for receipt in reports.archived_receipts(**filters).iterator(chunk_size=CHUNK_SIZE)
+    )
+    rows = reports.receipts(**filters).values_list(
+        'date_received', 'stock_item__name', 'stock_item__vendor__name', 'stock_item__unit',
+        'quantity_received', 'unit_price', 'voucher_number',
+    ).iterator(chunk_size=CHUNK_SIZE)
+    return chain(archived, (
+        ('Receipt', day, item, vendor, unit, quantity, price, '', voucher, '')
+        for day, item, vendor, unit, quantity, price, voucher in rows
+    ))
+
+
+def issue_rows(**filters):
+    """Issues priced at their FIFO unit cost (see store.valuation)."""
+    archived = (
+        ('Issue', issue.date_issued, issue.stock_item.name, issue.stock_item.vendor.name, issue.stock_item.unit,
+         issue.quantity_issued, issue.fifo_unit_cost, issue.office.name if issue.office else '', '', issue.remarks)
+        for issue in reports.archived_issues(**filters).iterator(chunk_size=CHUNK_SIZE)
+    )
+    rows = reports.issues(**filters).values_list(
+        'date_issued', 'stock_item__name', 'stock_item__vendor__name', 'stock_item__unit',
+        'quantity_issued', 'cost__fifo_cost', 'office__name', 'remarks',
+    ).iterator(chunk_size=CHUNK_SIZE)
+    return chain(archived, (
+        ('Issue', day, item, vendor, unit, quantity, _unit_cost(cost, quantity), office_name or '', '', remarks)
+        for day, item, vendor, unit, quantity, cost, office_name, remarks in rows
+    ))
+
+
+def _unit_cost(cost, quantity):
+    if cost is None or not quantity:
+        return cost
+    return (cost / quantity).quantize(Decimal('0.01'))
+
+
+def report_rows(filters):
+    parts = []
+    if filters['include_receipts']:
+        parts.append(receipt_rows(**filters))
+    if filters['include_issues']:
+        parts.append(issue_rows(**filters))
+    return chain.from_iterable(parts)
+
+
+class _Echo:
+    """csv.writer target that hands each formatted line straight back."""
+
+    def write(self, value):
+        return value
+
+
+def _stream_csv(header, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def export_response(params, fmt, filename='report'):
+    filters = export_filters(params)
+    rows = report_rows(filters)
+    if fmt == 'xlsx':
+        response = StreamingHttpResponse(
+            xlsx.stream_xlsx(HEADER, rows, sheet_name='Report'), content_type=xlsx.CONTENT_TYPE
+        )
+    else:
+        response = StreamingHttpResponse(_stream_csv(HEADER, rows), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    return response
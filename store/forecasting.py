@@ -0,0 +1,175 @@
+"""
+Consumption forecasting for the dashboard's reorder suggestions.
+
+``refresh()`` loads the daily issue rollups of the history window in one
+query, as NumPy arrays. It computes the daily consumption of every item,
+and of every item at each office, in whole-array operations. There is no
+loop over items or days, and no dense item × day matrix: each statistic is a
+weighted ``np.bincount`` over the days that had issues.
+- The moving average and standard deviation cover the last ``WINDOW_DAYS``.
+- Simple exponential smoothing starts from the first window's mean and runs
+  over the rest of the history, in closed form.
+
+The smoothed rate, the ledger balances and the lead time give each item's
+days of cover and a reorder point (lead-time demand plus safety stock). The
+results replace the ``ConsumptionForecast`` table. The dashboard reads that
+table through ``reports.reorder_suggestions()``, so only the
+``forecast_consumption`` command loads this module and NumPy.
+"""
+import math
+from datetime import timedelta
+from itertools import chain, islice
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import dashboard
+from .models import ConsumptionForecast, DailyIssueRollup, StockBalance
+
+HISTORY_DAYS = 180   # days of issues loaded
+WINDOW_DAYS = 28     # moving average / deviation window; also seeds the smoothing
+SMOOTHING = 0.1      # exponential smoothing factor per day
+LEAD_DAYS = 14       # days between ordering and receiving
+SERVICE_Z = 1.65     # safety stock in standard deviations (~95% of lead times without a stock-out)
+REVIEW_DAYS = 30     # an order covers this many days of demand past the reorder point
+NO_OFFICE = -1
+CHUNK_SIZE = 50000
+
+COLUMNS = (
+    'stock_item_id', 'office_id', 'as_of', 'issued', 'moving_average', 'smoothed', 'deviation',
+    'days_of_cover', 'reorder_point', 'order_up_to',
+)
+
+
+def _setting(name, default):
+    return getattr(settings, f'STORE_FORECAST_{name}', default)
+
+
+def load_history(as_of, days):
+    """
+    (item ids, office ids, day offsets, quantities) as arrays, one entry per
+    daily rollup row in the ``days`` ending with ``as_of``. Issues without an
+    office have office ``NO_OFFICE``.
+    """
+    start = as_of - timedelta(days=days - 1)
+    rows = (
+        DailyIssueRollup.objects.filter(day__gte=start, day__lte=as_of, quantity__gt=0)
+        .values_list('stock_item_id', 'office_id', 'quantity', 'day')
+        .order_by().iterator(chunk_size=CHUNK_SIZE)
+    )
+    # Column arrays a chunk at a time; NumPy turns the days into offsets.
+    chunks = []
+    for chunk in iter(lambda: list(islice(rows, CHUNK_SIZE)), []):
+        items, offices, quantities, day = zip(*chunk)
+        chunks.append((
+            np.array(items, dtype=np.int64),
+            np.array([NO_OFFICE if office is None else office for office in offices], dtype=np.int64),
+            (np.array(day, dtype='datetime64[D]') - np.datetime64(start, 'D')).astype(np.int64),
+            np.array(quantities, dtype=np.float64),
+        ))
+    if not chunks:
+        return tuple(np.zeros(0, dtype=np.int64) for _ in range(4))
+    return tuple(np.concatenate(column) for column in zip(*chunks))
+
+
+def daily_totals(keys, day, quantities, days):
+    """
+    The distinct integer ``keys``, and for every (key, day) with issues: the
+    key's position, the day offset and the total quantity.
+    """
+    cells, inverse = np.unique(keys * days + day, return_inverse=True)
+    unique, positions = np.unique(cells // days, return_inverse=True)
+    return unique, positions.reshape(-1), cells % days, np.bincount(inverse.reshape(-1), weights=quantities)
+
+
+def rates(count, key, day, quantity, days, window, alpha):
+    """(total issued, moving average, smoothed rate, standard deviation) per key, in units a day."""
+    def per_key(weights):
+        return np.bincount(key, weights=weights, minlength=count)
+
+    recent = day >= days - window
+    moving_average = per_key(np.where(recent, quantity, 0)) / window
+    deviation = np.sqrt(np.maximum(per_key(np.where(recent, quantity ** 2, 0)) / window - moving_average ** 2, 0))
+    # s[t] = alpha * x[t] + (1 - alpha) * s[t-1] from the seed after the first
+    # window to the last day, unrolled: each day's weight decays with its age.
+    seed = per_key(np.where(day < window, quantity, 0)) / window
+    weight = np.where(day < window, 0, alpha * (1 - alpha) ** (days - 1 - day))
+    smoothed = (1 - alpha) ** (days - window) * seed + per_key(weight * quantity)
+    return per_key(quantity), moving_average, smoothed, deviation
+
+
+def reorder_levels(rate, deviation, lead_days, z, review_days):
+    """(reorder point, order-up-to level) per key."""
+    reorder_point = np.ceil(rate * lead_days + z * deviation * math.sqrt(lead_days))
+    return reorder_point, reorder_point + np.ceil(rate * review_days)
+
+
+def on_hand(item_ids):
+    """Ledger balance of each of ``item_ids`` (0 where there is none)."""
+    rows = list(StockBalance.objects.order_by('stock_item_id').values_list('stock_item_id', 'quantity_available'))
+    if not rows:
+        return np.zeros(len(item_ids), dtype=np.int64)
+    ids, quantities = (np.array(column, dtype=np.int64) for column in zip(*rows))
+    positions = np.minimum(np.searchsorted(ids, item_ids), len(ids) - 1)
+    return np.where(ids[positions] == item_ids, quantities[positions], 0)
+
+
+def _write(rows):
+    ConsumptionForecast.objects.all().delete()
+    ConsumptionForecast.objects.bulk_create(
+        (ConsumptionForecast(**dict(zip(COLUMNS, row))) for row in rows), batch_size=1000
+    )
+
+
+def refresh(as_of=None):
+    """
+    Replace the forecast table with one computed from the history up to
+    ``as_of`` (default today). Returns the number of items and of
+    (item, office) pairs forecast.
+    """
+    as_of = as_of or timezone.localdate()
+    days = _setting('HISTORY_DAYS', HISTORY_DAYS)
+    window = min(_setting('WINDOW_DAYS', WINDOW_DAYS), days)
+    alpha = _setting('SMOOTHING', SMOOTHING)
+
+    items, offices, day, quantities = load_history(as_of, days)
+
+    item_ids, *cells = daily_totals(items, day, quantities, days)
+    issued, moving_average, smoothed, deviation = rates(len(item_ids), *cells, days, window, alpha)
+    reorder_point, order_up_to = reorder_levels(
+        smoothed, deviation, _setting('LEAD_DAYS', LEAD_DAYS), _setting('SERVICE_Z', SERVICE_Z),
+        _setting('REVIEW_DAYS', REVIEW_DAYS),
+    )
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cover = np.where(smoothed > 0, np.maximum(on_hand(item_ids), 0) / smoothed, np.nan)
+    item_rows = (
+        (item_id, None, as_of, total, average, rate, spread,
+         None if math.isnan(days_of_cover) else days_of_cover, point, level)
+        for item_id, total, average, rate, spread, days_of_cover, point, level in zip(
+            item_ids.tolist(), issued.astype(np.int64).tolist(), moving_average.tolist(), smoothed.tolist(),
+            deviation.tolist(), cover.tolist(), reorder_point.astype(np.int64).tolist(),
+            order_up_to.astype(np.int64).tolist(),
+        )
+    )
+
+    # One integer key per (item, office) pair.
+    at_office = offices != NO_OFFICE
+    width = int(offices.max(initial=0)) + 1
+    pairs, *cells = daily_totals(
+        items[at_office] * width + offices[at_office], day[at_office], quantities[at_office], days
+    )
+    issued, moving_average, smoothed, deviation = rates(len(pairs), *cells, days, window, alpha)
+    office_rows = (
+        (item_id, office_id, as_of, total, average, rate, spread, None, None, None)
+        for item_id, office_id, total, average, rate, spread in zip(
+            (pairs // width).tolist(), (pairs % width).tolist(), issued.astype(np.int64).tolist(),
+            moving_average.tolist(), smoothed.tolist(), deviation.tolist(),
+        )
+    )
+
+    with transaction.atomic():
+        _write(chain(item_rows, office_rows))
+        dashboard.invalidate()
+    return len(item_ids), len(pairs)
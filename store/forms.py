@@ -4,6 +4,8 @@ from .models import Issue, Office
 from .models import StockCategory, Receipt
 from .models import StockItem, Office
 from .models import VendorStock
+from .widgets import ItemAutocomplete
+from . import batchprint
 
 class VendorForm(forms.ModelForm):
     class Meta:
@@ -13,7 +15,7 @@ class VendorForm(forms.ModelForm):
 class StockItemForm(forms.ModelForm):
     class Meta:
         model = StockItem
-        fields = ['name', 'unit', 'category']
+        fields = ['name', 'unit', 'category', 'reorder_level']
 
 
 class IssueForm(forms.ModelForm):
@@ -21,19 +23,13 @@ class IssueForm(forms.ModelForm):
         model = Issue
         fields = ['stock_item', 'quantity_issued', 'remarks', 'date_issued']
         widgets = {
+            'stock_item': ItemAutocomplete(),
             'date_issued': forms.DateInput(attrs={
                 'type': 'date',             # ✅ triggers native calendar popup
                 'class': 'form-control'     # ✅ applies Bootstrap styling
             }),
         }
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        
-        # Only include unique stock items by name (first occurrence)
-        unique_names = StockItem.objects.values_list('name', flat=True).distinct()
-        self.fields['stock_item'].queryset = StockItem.objects.filter(name__in=unique_names).order_by('name')
-        
 class OfficeForm(forms.ModelForm):
     class Meta:
         model = Office
@@ -59,19 +55,38 @@ class ReportSearchForm(forms.Form):
         widget=forms.Select(attrs={'class': 'form-select'})
     )
 
+class BatchPrintForm(forms.Form):
+    kind = forms.ChoiceField(choices=batchprint.KINDS.items(), widget=forms.Select(attrs={'class': 'form-select'}))
+    start_date = forms.DateField(widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}))
+    end_date = forms.DateField(widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}))
+    office = forms.ModelChoiceField(
+        queryset=Office.objects.all(), required=False, empty_label="All Offices",
+        help_text="Issue slips only.", widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    vendor = forms.ModelChoiceField(
+        queryset=Vendor.objects.all(), required=False, empty_label="All Vendors",
+        help_text="Vouchers only.", widget=forms.Select(attrs={'class': 'form-select'})
+    )
+
+    def clean(self):
+        cleaned = super().clean()
+        if cleaned.get('start_date') and cleaned.get('end_date') and cleaned['start_date'] > cleaned['end_date']:
+            raise forms.ValidationError("The start date is after the end date.")
+        return cleaned
+
 class StockCategoryForm(forms.ModelForm):
     class Meta:
         model = StockCategory
-        fields = ['name']
+        fields = ['name', 'reorder_level']
         
 class VendorStockForm(forms.ModelForm):
     class Meta:
         model = VendorStock
         fields = ['stock_item', 'purchase_price', 'quantity']
+        widgets = {'stock_item': ItemAutocomplete()}
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.fields['stock_item'].queryset = StockItem.objects.all()
         self.fields['stock_item'].widget.attrs.update({'class': 'form-select'})
         self.fields['purchase_price'].widget.attrs.update({'class': 'form-control'})
         self.fields['quantity'].widget.attrs.update({'class': 'form-control'})
@@ -80,17 +95,25 @@ class ReceiptForm(forms.ModelForm):
     class Meta:
         model = Receipt
         fields = ['stock_item', 'unit_price', 'quantity_received']
+        widgets = {'stock_item': ItemAutocomplete()}
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.fields['stock_item'].queryset = StockItem.objects.all()
-        
 class VendorReceiptForm(forms.ModelForm):
     class Meta:
         model = Receipt
         fields = ['stock_item', 'unit_price', 'quantity_received']
         widgets = {
-            'stock_item': forms.Select(attrs={'class': 'form-select'}),
+            'stock_item': ItemAutocomplete(attrs={'class': 'form-select'}),
             'unit_price': forms.NumberInput(attrs={'class': 'form-control'}),
             'quantity_received': forms.NumberInput(attrs={'class': 'form-control'}),
-        }
\ No newline at end of file
+        }
+class ImportForm(forms.Form):
+    kind = forms.ChoiceField(
+        choices=[('items', 'Stock items'), ('receipts', 'Receipts'), ('issues', 'Issues')],
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    file = forms.FileField(
+        help_text="CSV or .xlsx; the first row holds the column names.",
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,.xlsx'})
+    )
+    create_missing = forms.BooleanField(required=False, label="Create missing vendors, categories and offices")
+    dry_run = forms.BooleanField(required=False, label="Validate only (don't save)")
@@ -0,0 +1,358 @@
+"""
+Bulk import of stock items, receipts and issues from CSV or XLSX.
+
+Rows are read one at a time (``csv.reader`` or ``xlsx.read_xlsx``),
+validated in chunks, and each chunk's valid rows are written with
+``bulk_create`` in one transaction. Vendor/category/office/item names are
+resolved to ids with one query per chunk and remembered for later chunks.
+Receipts and issues go through the model ``bulk_create`` hooks, so stock
+balances and voucher totals stay current. Issues are recorded as given:
+imported history isn't checked against available stock.
+
+The column names match the report export (``Date``, ``Item``, ``Quantity``,
+``Unit Price``, ``Office``, ``Voucher``, ``Remarks``, ...) and are matched
+case-insensitively, so an exported file can be imported again. The export
+mixes receipts and issues; with a ``Type`` column, rows of the other kind
+are skipped.
+
+A file that turns out to be unreadable part-way raises ``InvalidImport``;
+chunks written before that point stay imported, and the message says so.
+"""
+import codecs
+import csv
+import zipfile
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
+from xml.etree.ElementTree import ParseError
+
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from . import dashboard, search, xlsx
+from .models import Issue, ItemValuation, Office, Receipt, StockBalance, StockCategory, StockItem, Vendor
+
+KINDS = ('items', 'receipts', 'issues')
+CHUNK_SIZE = 1000
+MAX_ERRORS = 1000
+
+# Accepted header spellings for each field, after lower-casing and replacing
+# spaces with underscores.
+COLUMNS = {
+    'name': ('name', 'item', 'stock_item'),
+    'item': ('item', 'stock_item', 'name'),
+    'vendor': ('vendor',),
+    'category': ('category',),
+    'unit': ('unit',),
+    'purchase_price': ('purchase_price', 'price', 'unit_price'),
+    'reorder_level': ('reorder_level',),
+    'quantity': ('quantity', 'quantity_received', 'quantity_issued'),
+    'unit_price': ('unit_price', 'price', 'purchase_price'),
+    'date': ('date', 'date_received', 'date_issued'),
+    'voucher': ('voucher', 'voucher_number'),
+    'office': ('office',),
+    'remarks': ('remarks',),
+    'type': ('type',),
+}
+REQUIRED = {
+    'items': ('name', 'vendor', 'purchase_price'),
+    'receipts': ('item', 'quantity', 'unit_price', 'date'),
+    'issues': ('item', 'quantity', 'date'),
+}
+OPTIONAL = {
+    'items': ('category', 'unit', 'reorder_level'),
+    'receipts': ('voucher', 'type'),
+    'issues': ('office', 'remarks', 'type'),
+}
+# Values of the export's Type column for each kind.
+TYPES = {'receipts': 'receipt', 'issues': 'issue'}
+
+EXCEL_EPOCH = date(1899, 12, 30)
+
+
+class InvalidImport(Exception):
+    """The file as a whole can't be imported (unreadable, or missing columns)."""
+
+
+class RowError(Exception):
+    pass
+
+
+class ImportResult:
+    def __init__(self, kind, dry_run=False):
+        self.kind = kind
+        self.dry_run = dry_run
+        self.rows = 0
+        self.created = 0
+        self.skipped = 0
+        self.errors = []
+        self.error_count = 0
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((line, message))
+
+    def __str__(self):
+        verb = 'would create' if self.dry_run else 'created'
+        skipped = f", {self.skipped} of another type skipped" if self.skipped else ''
+        return f"{self.rows} {self.kind} row(s) read, {self.created} {verb}{skipped}, {self.error_count} error(s)."
+
+
+# ---------------- Reading ----------------
+def _normalise(header):
+    return str(header or '').strip().lower().replace(' ', '_')
+
+
+def read_rows(fileobj, filename):
+    """Yield (line number, {column: value}) from a CSV or XLSX file opened in binary mode."""
+    if filename.lower().endswith('.xlsx'):
+        rows = xlsx.read_xlsx(fileobj)
+    else:
+        rows = csv.reader(codecs.iterdecode(fileobj, 'utf-8-sig'))
+    try:
+        header = [_normalise(h) for h in next(rows)]
+    except StopIteration:
+        return
+    for line, values in enumerate(rows, start=2):
+        if not any(v not in (None, '') for v in values):
+            continue
+        yield line, dict(zip(header, values))
+
+
+def column_map(kind, header):
+    """Map each field of ``kind`` to the header column that supplies it."""
+    mapping = {}
+    for field in REQUIRED[kind] + OPTIONAL[kind]:
+        for alias in COLUMNS[field]:
+            if alias in header:
+                mapping[field] = alias
+                break
+    missing = [field for field in REQUIRED[kind] if field not in mapping]
+    if missing:
+        raise InvalidImport(f"Missing column(s) for {kind}: {', '.join(missing)}.")
+    return mapping
+
+
+# ---------------- Values ----------------
+def _text(value):
+    return '' if value is None else str(value).strip()
+
+
+def _decimal(value, field):
+    try:
+        number = Decimal(_text(value).replace(',', ''))
+    except InvalidOperation:
+        raise RowError(f"{field}: '{_text(value)}' is not a number.")
+    if not number.is_finite() or number < 0:
+        raise RowError(f"{field}: '{_text(value)}' must be a number of zero or more.")
+    return number
+
+
+def _quantity(value, field='quantity'):
+    number = _decimal(value, field)
+    if number != number.to_integral_value() or number <= 0:
+        raise RowError(f"{field}: '{_text(value)}' is not a whole number above zero.")
+    return int(number)
+
+
+def _date(value):
+    text = _text(value)
+    try:
+        parsed = parse_date(text[:10])
+    except ValueError:
+        parsed = None
+    if parsed:
+        return parsed
+    try:
+        # XLSX dates are day counts from the 1899-12-30 epoch.
+        return EXCEL_EPOCH + timedelta(days=int(Decimal(text)))
+    except (InvalidOperation, ValueError, OverflowError):
+        raise RowError(f"date: '{text}' is not a date (use YYYY-MM-DD).")
+
+
+# ---------------- Name lookups ----------------
+class Lookup:
+    """Name -> id cache for one model, filled a chunk at a time."""
+
+    def __init__(self, model, create_missing=False, defaults=None):
+        self.model = model
+        self.create_missing = create_missing
+        self.defaults = defaults or {}
+        self.ids = {}
+
+    def load(self, names):
+        names = {name for name in names if name and name not in self.ids}
+        if not names:
+            return
+        # Names aren't unique for every model; the oldest row wins.
+        for name, pk in self.model.objects.filter(name__in=names).order_by('-pk').values_list('name', 'pk'):
+            self.ids[name] = pk
+        missing = names - self.ids.keys()
+        if missing and self.create_missing:
+            self.model.objects.bulk_create([self.model(name=name, **self.defaults) for name in missing])
+            created = self.model.objects.filter(name__in=missing).values_list('name', 'pk')
+            for name, pk in created:
+                self.ids.setdefault(name, pk)
+            search.index_model(self.model, [pk for _, pk in created])
+
+    def get(self, name, label):
+        if not name:
+            raise RowError(f"{label}: required.")
+        if name not in self.ids:
+            raise RowError(f"{label}: no {self.model._meta.verbose_name} named '{name}'.")
+        return self.ids[name]
+
+
+# ---------------- Importer ----------------
+class Importer:
+    def __init__(self, kind, create_missing=False, dry_run=False, chunk_size=CHUNK_SIZE, progress=None):
+        if kind not in KINDS:
+            raise InvalidImport(f"Unknown import kind '{kind}'; expected one of {', '.join(KINDS)}.")
+        self.kind = kind
+        self.dry_run = dry_run
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.result = ImportResult(kind, dry_run)
+        # Nothing is created in a dry run, so missing names are reported instead.
+        create = create_missing and not dry_run
+        self.vendors = Lookup(Vendor, create)
+        self.categories = Lookup(StockCategory, create)
+        self.offices = Lookup(Office, create)
+        self.items = Lookup(StockItem)
+
+    def run(self, rows):
+        mapping = None
+        chunk = []
+        try:
+            for line, row in rows:
+                if mapping is None:
+                    mapping = column_map(self.kind, row.keys())
+                chunk.append((line, {field: row.get(column) for field, column in mapping.items()}))
+                if len(chunk) >= self.chunk_size:
+                    self._import_chunk(chunk)
+                    chunk = []
+            if chunk:
+                self._import_chunk(chunk)
+        finally:
+            if self.result.created and not self.dry_run:
+                dashboard.invalidate()
+        return self.result
+
+    def _import_chunk(self, chunk):
+        self.result.rows += len(chunk)
+        with transaction.atomic():
+            self._resolve_names(chunk)
+            build = getattr(self, f'_build_{self.kind[:-1]}')
+            objs = []
+            for line, row in chunk:
+                try:
+                    if self._other_type(row):
+                        self.result.skipped += 1
+                        continue
+                    objs.append(build(row))
+                except RowError as e:
+                    self.result.add_error(line, str(e))
+            if objs and not self.dry_run:
+                self._save(objs)
+            self.result.created += len(objs)
+        if self.progress:
+            self.progress(self.result)
+
+    def _other_type(self, row):
+        """True for a row whose Type column names the other kind (a combined export)."""
+        kind = _text(row.get('type')).lower()
+        if not kind or kind == TYPES[self.kind]:
+            return False
+        if kind in TYPES.values():
+            return True
+        raise RowError(f"type: '{_text(row.get('type'))}' is not {TYPES[self.kind].capitalize()}.")
+
+    def _resolve_names(self, chunk):
+        rows = [row for _, row in chunk]
+        if self.kind == 'items':
+            self.vendors.load(_text(row['vendor']) for row in rows)
+            self.categories.load(_text(row.get('category')) for row in rows)
+            self.items.load(_text(row['name']) for row in rows)
+        else:
+            self.items.load(_text(row['item']) for row in rows)
+            if self.kind == 'issues':
+                self.offices.load(_text(row.get('office')) for row in rows)
+
+    def _save(self, objs):
+        if self.kind == 'items':
+            StockItem.objects.bulk_create(objs)
+            # bulk_create skips the post_save signal that opens each balance and valuation row.
+            ids = dict(StockItem.objects.filter(name__in=[obj.name for obj in objs]).values_list('name', 'pk'))
+            self.items.ids.update(ids)
+            search.index('item', ids.values())
+            StockBalance.objects.bulk_create(
+                [StockBalance(stock_item_id=pk) for pk in ids.values()], ignore_conflicts=True
+            )
+            ItemValuation.objects.bulk_create(
+                [ItemValuation(stock_item_id=pk) for pk in ids.values()], ignore_conflicts=True
+            )
+        elif self.kind == 'receipts':
+            Receipt.objects.bulk_create(objs)
+        else:
+            Issue.objects.bulk_create(objs)
+
+    # ---------------- Row builders ----------------
+    def _build_item(self, row):
+        name = _text(row['name'])
+        if not name:
+            raise RowError("name: required.")
+        if name in self.items.ids:
+            raise RowError(f"name: item '{name}' already exists.")
+        price = _decimal(row['purchase_price'], 'purchase_price')
+        category = _text(row.get('category'))
+        reorder_level = _text(row.get('reorder_level'))
+        item = StockItem(
+            name=name,
+            vendor_id=self.vendors.get(_text(row['vendor']), 'vendor'),
+            category_id=self.categories.get(category, 'category') if category else None,
+            unit=_text(row.get('unit')) or None,
+            purchase_price=price,
+            reorder_level=_quantity(reorder_level, 'reorder_level') if reorder_level else None,
+            total_price=0,
+        )
+        # Claim the name so a repeat further down the file is reported.
+        self.items.ids[name] = None
+        return item
+
+    def _build_receipt(self, row):
+        return Receipt(
+            stock_item_id=self.items.get(_text(row['item']), 'item'),
+            quantity_received=_quantity(row['quantity']),
+            unit_price=_decimal(row['unit_price'], 'unit_price'),
+            date_received=_date(row['date']),
+            voucher_number=_text(row.get('voucher'))[:50],
+        )
+
+    def _build_issue(self, row):
+        office = _text(row.get('office'))
+        return Issue(
+            stock_item_id=self.items.get(_text(row['item']), 'item'),
+            quantity_issued=_quantity(row['quantity']),
+            office_id=self.offices.get(office, 'office') if office else None,
+            date_issued=_date(row['date']),
+            remarks=_text(row.get('remarks')),
+        )
+
+
+def _readable(rows, filename, result):
+    """``rows``, with errors from reading the file raised as ``InvalidImport``."""
+    line = 1
+    try:
+        for line, row in rows:
+            yield line, row
+    except (UnicodeDecodeError, csv.Error, zipfile.BadZipFile, ParseError, KeyError, ValueError) as e:
+        message = f"Couldn't read {filename} after line {line}: {e}."
+        if result.created and not result.dry_run:
+            message += f" The {result.created} row(s) before it were imported."
+        raise InvalidImport(message)
+
+
+def import_file(fileobj, filename, kind, **options):
+    """Import ``fileobj`` (CSV or XLSX, by ``filename``) as ``kind`` rows."""
+    importer = Importer(kind, **options)
+    return importer.run(_readable(read_rows(fileobj, filename), filename, importer.result))
@@ -0,0 +1,220 @@
+"""
+Per-view request instrumentation.
+
+``InstrumentationMiddleware`` times every request and, per URL name, records
+the latency, the number of SQL queries and their total time (through
+``connection.execute_wrapper``), the time spent rendering templates and the
+time spent in ``pisa.CreatePDF``. Totals and the latest ``SAMPLES`` values
+of each measure are kept in memory, per process, and served as JSON or in
+the Prometheus text format by the staff-only ``metrics`` view.
+
+Queries slower than ``STORE_SLOW_QUERY_MS`` are logged to
+``store.instrumentation``; set it to None to turn that off.
+
+Template time comes from wrapping the Django backend's ``Template.render``.
+The wrapper is installed while at least one request is in flight and the
+previous method is put back when the last one finishes.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import Template
+
+logger = logging.getLogger(__name__)
+
+SAMPLES = 1000
+QUANTILES = (0.5, 0.9, 0.99)
+MEASURES = ('latency', 'queries', 'query_time', 'template_time', 'pdf_time')
+
+_local = threading.local()
+_lock = threading.Lock()
+_views = {}
+_render_lock = threading.Lock()
+_render_users = 0
+_original_render = None
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0.0
+        self.template_time = 0.0
+        self.pdf_time = 0.0
+        self.template_depth = 0
+
+
+class ViewStats:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.totals = dict.fromkeys(MEASURES, 0.0)
+        self.samples = {measure: deque(maxlen=SAMPLES) for measure in MEASURES}
+
+    def add(self, values, error=False):
+        self.count += 1
+        self.errors += error
+        for measure, value in values.items():
+            self.totals[measure] += value
+            self.samples[measure].append(value)
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            **{
+                measure: {'total': self.totals[measure], **percentiles(self.samples[measure])}
+                for measure in MEASURES
+            },
+        }
+
+
+def percentiles(values, quantiles=QUANTILES):
+    """Nearest-rank percentiles of ``values``: {'p50': ..., 'p90': ..., ...}."""
+    ordered = sorted(values)
+    if not ordered:
+        return {f'p{round(q * 100)}': None for q in quantiles}
+    return {
+        f'p{round(q * 100)}': ordered[min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))]
+        for q in quantiles
+    }
+
+
+def current():
+    """Stats of the request being handled on this thread, if any."""
+    return getattr(_local, 'stats', None)
+
+
+def record_pdf(seconds):
+    stats = current()
+    if stats is not None:
+        stats.pdf_time += seconds
+
+
+def snapshot():
+    with _lock:
+        return {name: view.summary() for name, view in sorted(_views.items())}
+
+
+def reset():
+    with _lock:
+        _views.clear()
+
+
+# ---------------- Hooks ----------------
+def _query_wrapper(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        stats = current()
+        if stats is not None:
+            stats.queries += 1
+            stats.query_time += elapsed
+        threshold = getattr(settings, 'STORE_SLOW_QUERY_MS', None)
+        if threshold is not None and elapsed * 1000 >= threshold:
+            logger.warning(
+                "Slow query (%.1f ms) in %s: %s", elapsed * 1000, getattr(_local, 'path', None) or '-', sql
+            )
+
+
+def _timed_render(self, context=None, request=None):
+    # Only the outermost render counts; included templates are part of it.
+    stats = current()
+    if stats is None or stats.template_depth:
+        return _original_render(self, context, request)
+    stats.template_depth += 1
+    started = time.perf_counter()
+    try:
+        return _original_render(self, context, request)
+    finally:
+        stats.template_time += time.perf_counter() - started
+        stats.template_depth -= 1
+
+
+@contextmanager
+def _timing_templates():
+    """Time template renders for the duration of the block (see the module docstring)."""
+    global _original_render, _render_users
+    with _render_lock:
+        if not _render_users:
+            _original_render = Template.render
+            Template.render = _timed_render
+        _render_users += 1
+    try:
+        yield
+    finally:
+        with _render_lock:
+            _render_users -= 1
+            if not _render_users:
+                Template.render = _original_render
+
+
+# ---------------- Middleware ----------------
+class InstrumentationMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = _local.stats = RequestStats()
+        _local.path = request.path
+        started = time.perf_counter()
+        response = None
+        try:
+            with ExitStack() as stack:
+                stack.enter_context(_timing_templates())
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(_query_wrapper))
+                response = self.get_response(request)
+            return response
+        finally:
+            latency = time.perf_counter() - started
+            match = getattr(request, 'resolver_match', None)
+            name = match.view_name if match else 'unresolved'
+            error = response is None or response.status_code >= 500
+            with _lock:
+                _views.setdefault(name, ViewStats()).add({
+                    'latency': latency,
+                    'queries': stats.queries,
+                    'query_time': stats.query_time,
+                    'template_time': stats.template_time,
+                    'pdf_time': stats.pdf_time,
+                }, error=error)
+            _local.stats = _local.path = None
+
+
+# ---------------- Prometheus ----------------
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus(data=None):
+    """The snapshot in the Prometheus text exposition format."""
+    data = snapshot() if data is None else data
+    lines = [
+        '# HELP store_requests_total Requests handled, by view.',
+        '# TYPE store_requests_total counter',
+    ]
+    lines += [f'store_requests_total{{view="{_label(name)}"}} {view["count"]}' for name, view in data.items()]
+    lines += [
+        '# HELP store_request_errors_total Requests that raised or returned 5xx, by view.',
+        '# TYPE store_request_errors_total counter',
+    ]
+    lines += [f'store_request_errors_total{{view="{_label(name)}"}} {view["errors"]}' for name, view in data.items()]
+    for measure in MEASURES:
+        metric = f'store_request_{measure}' if measure == 'queries' else f'store_request_{measure}_seconds'
+        lines += [f'# HELP {metric} Per-request {measure.replace("_", " ")}, by view.', f'# TYPE {metric} summary']
+        for name, view in data.items():
+            label = _label(name)
+            for quantile in QUANTILES:
+                value = view[measure][f'p{round(quantile * 100)}']
+                if value is not None:
+                    lines.append(f'{metric}{{view="{label}",quantile="{quantile}"}} {value}')
+            lines.append(f'{metric}_sum{{view="{label}"}} {view[measure]["total"]}')
+            lines.append(f'{metric}_count{{view="{label}"}} {view["count"]}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,83 @@
+"""
+Atomic multi-line stock issuance.
+
+All lines of a batch are validated against the ledger balances and written
+in a single transaction, so a batch is either issued in full or not at all.
+"""
+from collections import defaultdict
+
+from django.db import connection, transaction
+
+from .models import Issue, StockBalance
+
+
+class InsufficientStock(Exception):
+    def __init__(self, shortages):
+        # shortages: {stock_item_id: (requested, available)}
+        self.shortages = shortages
+        super().__init__(
+            "Not enough stock for: " + ", ".join(
+                f"item {item_id} (requested {requested}, available {available})"
+                for item_id, (requested, available) in shortages.items()
+            )
+        )
+
+
+def _shortages(requested):
+    available = dict(
+        StockBalance.objects.filter(stock_item_id__in=requested.keys())
+        .values_list('stock_item_id', 'quantity_available')
+    )
+    return {
+        item_id: (quantity, available.get(item_id, 0))
+        for item_id, quantity in requested.items()
+        if quantity > available.get(item_id, 0)
+    }
+
+
+def issue_stock(office, issues, date_issued=None):
+    """
+    Issue unsaved ``Issue`` instances to ``office`` as one batch. With
+    ``office=None`` each issue keeps the office it already has.
+
+    Raises ``InsufficientStock`` (and writes nothing) if any item would go
+    below zero.
+    """
+    issues = [issue for issue in issues if issue.quantity_issued]
+    requested = defaultdict(int)
+    for issue in issues:
+        if office is not None:
+            issue.office = office
+        if date_issued:
+            issue.date_issued = date_issued
+        requested[issue.stock_item_id] += issue.quantity_issued
+    if not issues:
+        return []
+
+    with transaction.atomic():
+        if connection.features.has_select_for_update:
+            # Lock in a fixed order so two batches can't deadlock each other.
+            list(
+                StockBalance.objects.select_for_update()
+                .filter(stock_item_id__in=requested.keys())
+                .order_by('stock_item_id')
+                .values_list('id', flat=True)
+            )
+            shortages = _shortages(requested)
+            if shortages:
+                raise InsufficientStock(shortages)
+
+        # bulk_create decrements the balances with F() expressions.
+        issues = Issue.objects.bulk_create(issues)
+
+        # Re-check after our own write. Without row locks (SQLite) this is
+        # what stops two concurrent batches from overselling.
+        shortages = {
+            item_id: (requested[item_id], available + requested[item_id])
+            for item_id, available in StockBalance.objects.filter(
+                stock_item_id__in=requested.keys(), quantity_available__lt=0
+            ).values_list('stock_item_id', 'quantity_available')
+        }
+        if shortages:
+            raise InsufficientStock(shortages)
+    return issues
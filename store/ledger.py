@@ -0,0 +1,119 @@
+"""
+Stock-balance ledger.
+
+Every Receipt/Issue write adjusts the item's StockBalance row with F()
+expressions inside the same transaction, so readers can fetch all balances
+in one query instead of aggregating the raw rows per item.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F, Sum
+
+from .models import Issue, OpeningBalance, Receipt, StockBalance, StockItem
+
+
+def movement(instance):
+    """Return ``(stock_item_id, received, issued)`` for a Receipt or Issue."""
+    if isinstance(instance, Receipt):
+        return instance.stock_item_id, instance.quantity_received, 0
+    return instance.stock_item_id, 0, instance.quantity_issued
+
+
+def apply(stock_item_id, received=0, issued=0, create_missing=True):
+    """Add received/issued deltas to one item's balance."""
+    if not received and not issued:
+        return
+    updated = StockBalance.objects.filter(stock_item_id=stock_item_id).update(
+        quantity_received=F('quantity_received') + received,
+        quantity_issued=F('quantity_issued') + issued,
+        quantity_available=F('quantity_available') + received - issued,
+    )
+    if not updated and create_missing:
+        # No balance row yet (e.g. the item itself was bulk-created); the raw
+        # rows already include this movement, so build it from them.
+        rebuild([stock_item_id])
+
+
+def record(instances, sign=1):
+    """Apply the movements of many rows, one UPDATE per affected item."""
+    deltas = defaultdict(lambda: [0, 0])
+    for instance in instances:
+        stock_item_id, received, issued = movement(instance)
+        deltas[stock_item_id][0] += received
+        deltas[stock_item_id][1] += issued
+    with transaction.atomic():
+        for stock_item_id, (received, issued) in deltas.items():
+            apply(stock_item_id, sign * received, sign * issued)
+
+
+def compute_balances(stock_item_ids=None):
+    """
+    Recompute ``{stock_item_id: (received, issued)}`` from the raw rows and
+    the opening balances of archived history (store.archive).
+    """
+    items = StockItem.objects.all()
+    receipts = Receipt.objects.all()
+    issues = Issue.objects.all()
+    openings = OpeningBalance.objects.all()
+    if stock_item_ids is not None:
+        items = items.filter(id__in=stock_item_ids)
+        receipts = receipts.filter(stock_item_id__in=stock_item_ids)
+        issues = issues.filter(stock_item_id__in=stock_item_ids)
+        openings = openings.filter(stock_item_id__in=stock_item_ids)
+
+    received = dict(receipts.values_list('stock_item_id').annotate(qty=Sum('quantity_received')).order_by())
+    issued = dict(issues.values_list('stock_item_id').annotate(qty=Sum('quantity_issued')).order_by())
+    opened = {
+        item_id: (opening_received, opening_issued)
+        for item_id, opening_received, opening_issued in openings.values_list(
+            'stock_item_id', 'quantity_received', 'quantity_issued'
+        )
+    }
+    return {
+        item_id: (
+            (received.get(item_id) or 0) + opened.get(item_id, (0, 0))[0],
+            (issued.get(item_id) or 0) + opened.get(item_id, (0, 0))[1],
+        )
+        for item_id in items.values_list('id', flat=True)
+    }
+
+
+def rebuild(stock_item_ids=None):
+    """Overwrite balances with values computed from the raw rows."""
+    expected = compute_balances(stock_item_ids)
+    with transaction.atomic():
+        existing = StockBalance.objects.select_for_update()
+        if stock_item_ids is not None:
+            existing = existing.filter(stock_item_id__in=stock_item_ids)
+        existing = {balance.stock_item_id: balance for balance in existing}
+        to_update, to_create = [], []
+        for item_id, (received, issued) in expected.items():
+            balance = existing.get(item_id) or StockBalance(stock_item_id=item_id)
+            balance.quantity_received = received
+            balance.quantity_issued = issued
+            balance.quantity_available = received - issued
+            (to_update if balance.pk else to_create).append(balance)
+        StockBalance.objects.bulk_update(
+            to_update, ['quantity_received', 'quantity_issued', 'quantity_available'], batch_size=500
+        )
+        StockBalance.objects.bulk_create(to_create, batch_size=500)
+    return len(expected)
+
+
+def verify():
+    """Return ``(stock_item_id, stored, expected)`` for every drifted balance."""
+    expected = compute_balances()
+    stored = {
+        row[0]: row[1:]
+        for row in StockBalance.objects.values_list(
+            'stock_item_id', 'quantity_received', 'quantity_issued', 'quantity_available'
+        )
+    }
+    mismatches = []
+    for item_id, (received, issued) in expected.items():
+        want = (received, issued, received - issued)
+        have = stored.get(item_id)
+        if have != want:
+            mismatches.append((item_id, have, want))
+    return mismatches
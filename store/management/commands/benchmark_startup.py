@@ -0,0 +1,126 @@
+import json
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from store import benchmarks
+
+# Modules a web worker should only load once it renders a PDF (see store.pdf),
+# and NumPy, which only the forecast_consumption command needs.
+HEAVY_MODULES = ('xhtml2pdf', 'reportlab', 'html5lib', 'PIL', 'numpy')
+
+# Run in a fresh interpreter: load the WSGI application and the URLconf (which
+# imports every view module, as the first request would) and report the
+# wall time, the resident memory and which heavy modules got loaded.
+PROBE = '''
+import json, sys, time
+started = time.perf_counter()
+import inventory_project.wsgi
+from django.urls import get_resolver
+get_resolver().url_patterns
+for name in sys.argv[1:]:
+    __import__(name)
+elapsed = time.perf_counter() - started
+rss = 0
+try:
+    with open('/proc/self/status') as fh:
+        rss = next(int(line.split()[1]) for line in fh if line.startswith('VmRSS:'))
+except (OSError, StopIteration):
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({'ms': elapsed * 1000, 'rss_kib': rss, 'heavy': sorted(
+    name for name in sys.modules if name.split('.')[0] in %r and '.' not in name
+)}))
+''' % (HEAVY_MODULES,)
+
+
+def parse_importtime(output):
+    """[(module, cumulative µs)] for the top-level imports in ``-X importtime`` output."""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not name.startswith('  '):  # nested imports are indented further
+            rows.append((name.strip(), int(cumulative)))
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the cold start of inventory_project.wsgi in fresh interpreters (python -X importtime "
+        "and resident memory per worker), fail if it loads the PDF stack, and compare with an earlier run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help="Fresh interpreters per measurement (default 5).")
+        parser.add_argument('--output', default='startup-results.json', help="Where to write the JSON results.")
+        parser.add_argument('--baseline', help="Earlier results file to compare against.")
+        parser.add_argument(
+            '--max-regression', type=float,
+            help="Exit non-zero if the median start-up time grew by more than this many percent over the baseline.",
+        )
+        parser.add_argument('--max-ms', type=float, help="Exit non-zero if the median start-up time exceeds this.")
+        parser.add_argument('--max-rss-mib', type=float, help="Exit non-zero if a worker's median RSS exceeds this.")
+        parser.add_argument('--top', type=int, default=10, help="Slowest top-level imports to list (default 10).")
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError("--repeat must be at least 1.")
+
+        results = {}
+        for name, extra in (('wsgi', []), ('wsgi_with_pdf', ['store.pdf'])):
+            runs = [self._probe(extra) for _ in range(options['repeat'])]
+            imports = {}
+            for module, cumulative in runs[-1]['imports']:
+                imports[module] = imports.get(module, 0) + cumulative / 1000
+            results[name] = {
+                'first_ms': runs[0]['ms'],
+                'ms': benchmarks.summarize([run['ms'] for run in runs]),
+                'import_ms': benchmarks.summarize([sum(c for _, c in run['imports']) / 1000 for run in runs]),
+                'rss_mib': benchmarks.summarize([run['rss_kib'] / 1024 for run in runs]),
+                'heavy_modules': runs[-1]['heavy'],
+                'slowest_imports': sorted(imports.items(), key=lambda item: -item[1])[:options['top']],
+            }
+            result = results[name]
+            self.stdout.write(
+                f"{name:<14} median {result['ms']['median']:7.1f} ms  imports {result['import_ms']['median']:7.1f} ms  "
+                f"RSS {result['rss_mib']['median']:6.1f} MiB  heavy: {', '.join(result['heavy_modules']) or '-'}"
+            )
+        for module, ms in results['wsgi']['slowest_imports']:
+            self.stdout.write(f"  {module:<40} {ms:7.1f} ms")
+
+        data = {**benchmarks.environment(), 'repeat': options['repeat'], 'results': results}
+        benchmarks.write_results(options['output'], data)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}."))
+
+        failures = []
+        wsgi = results['wsgi']
+        if wsgi['heavy_modules']:
+            failures.append(f"the WSGI application loads {', '.join(wsgi['heavy_modules'])}")
+        if options['max_ms'] is not None and wsgi['ms']['median'] > options['max_ms']:
+            failures.append(f"start-up took {wsgi['ms']['median']:.0f} ms (limit {options['max_ms']:g})")
+        if options['max_rss_mib'] is not None and wsgi['rss_mib']['median'] > options['max_rss_mib']:
+            failures.append(f"a worker uses {wsgi['rss_mib']['median']:.1f} MiB (limit {options['max_rss_mib']:g})")
+        if options['baseline']:
+            for name, before, after, change in benchmarks.compare(benchmarks.load_results(options['baseline']), data):
+                if change is None:
+                    continue
+                self.stdout.write(f"  {name:<14} {before:7.1f} -> {after:7.1f} ms  ({change:+.1f}%)")
+                if name == 'wsgi' and options['max_regression'] is not None and change > options['max_regression']:
+                    failures.append(f"start-up is {change:.1f}% slower than the baseline")
+        if failures:
+            raise CommandError("Start-up check failed: " + '; '.join(failures) + '.')
+
+    def _probe(self, extra):
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', PROBE, *extra],
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+        )
+        if completed.returncode:
+            raise CommandError(f"Start-up probe failed:\n{completed.stderr[-2000:]}")
+        run = json.loads(completed.stdout.strip().splitlines()[-1])
+        run['imports'] = parse_importtime(completed.stderr)
+        return run
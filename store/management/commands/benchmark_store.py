@@ -0,0 +1,140 @@
+import shutil
+from datetime import timedelta
+from pathlib import Path
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Max
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from store import benchmarks
+from store.models import Issue, Office, Receipt, StockItem, Vendor, Voucher
+
+PDF_VIEWS = {'voucher_print', 'issue_print', 'report_pdf'}
+
+
+def targets():
+    """(name, url) for every benchmarked view, pointed at the busiest rows in the database."""
+    latest = max(filter(None, [
+        Receipt.objects.aggregate(latest=Max('date_received'))['latest'],
+        Issue.objects.aggregate(latest=Max('date_issued'))['latest'],
+    ]), default=None)
+    if latest is None:
+        raise CommandError("No receipts or issues to benchmark; run generate_store_data first.")
+    quarter = {'start_date': latest - timedelta(days=90), 'end_date': latest}
+    voucher = Voucher.objects.order_by('-total_quantity').values_list('number', flat=True).first()
+    vendor = Vendor.objects.annotate(n=Count('voucher')).order_by('-n').values_list('pk', flat=True).first()
+    batch = (
+        Issue.objects.filter(office__isnull=False).values('date_issued', 'office_id')
+        .annotate(n=Count('id')).order_by('-n').first()
+    )
+
+    urls = [
+        ('dashboard', reverse('dashboard')),
+        ('stock_list', reverse('stock_list')),
+        ('issue_create', reverse('issue_create')),
+        ('report_view', reverse('report_view') + '?' + urlencode({
+            **quarter, 'include_receipts': 1, 'include_issues': 1, 'show_vendor': 1, 'show_office': 1,
+        })),
+        ('report_search', reverse('report_search') + '?' + urlencode(quarter)),
+        ('report_pdf', reverse('report_pdf') + '?' + urlencode({**quarter, 'include_issues': 1})),
+    ]
+    if voucher:
+        urls += [
+            ('voucher_detail', reverse('voucher_detail', args=[voucher])),
+            ('voucher_print', reverse('voucher_print', args=[voucher])),
+        ]
+    if vendor:
+        urls.append(('vendor_detail', reverse('vendor_detail', args=[vendor])))
+    if batch:
+        urls.append(('issue_print', reverse('issue_print', args=[batch['date_issued'], batch['office_id']])))
+    return urls
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the main store views through the test client (wall time, query count, peak memory) "
+        "and write the results as JSON, optionally compared against an earlier run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help="Requests per view (default 5).")
+        parser.add_argument('--output', default='benchmark-results.json', help="Where to write the JSON results.")
+        parser.add_argument('--baseline', help="Earlier results file to compare against.")
+        parser.add_argument(
+            '--max-regression', type=float,
+            help="Exit non-zero if any view's median time grew by more than this many percent over the baseline.",
+        )
+        parser.add_argument('--only', action='append', help="Benchmark only this view (repeatable).")
+        parser.add_argument('--skip-pdf', action='store_true', help="Leave out the PDF views.")
+        parser.add_argument(
+            '--clear-pdf-cache', action='store_true',
+            help="Empty STORE_PDF_CACHE_DIR first, so the first PDF request of each view is a cold render.",
+        )
+        parser.add_argument('--user', help="Username to sign in as (default: the first superuser).")
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.filter(is_active=True)
+        user = (users.filter(username=options['user']) if options['user'] else users.filter(is_superuser=True)).first()
+        if user is None:
+            raise CommandError("No user to sign in as; create a superuser or pass --user.")
+        if options['repeat'] < 1:
+            raise CommandError("--repeat must be at least 1.")
+        if options['clear_pdf_cache']:
+            shutil.rmtree(Path(settings.STORE_PDF_CACHE_DIR), ignore_errors=True)
+
+        selected = [
+            (name, url) for name, url in targets()
+            if (not options['only'] or name in options['only'])
+            and not (options['skip_pdf'] and name in PDF_VIEWS)
+        ]
+        client = Client()
+        client.force_login(user)
+
+        results = {}
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for name, url in selected:
+                result = benchmarks.measure(lambda: client.get(url).status_code, options['repeat'])
+                result['status'] = result.pop('result')
+                result['url'] = url
+                result['peak_kib'] = benchmarks.peak_memory(lambda: client.get(url))
+                results[name] = result
+                self.stdout.write(
+                    f"{name:<16} {result['status']}  first {result['first_ms']:8.1f} ms  "
+                    f"median {result['ms']['median']:8.1f} ms  queries {result['queries']['median']:>5g}  "
+                    f"peak {result['peak_kib']:9.0f} KiB"
+                )
+
+        data = {
+            **benchmarks.environment(),
+            'repeat': options['repeat'],
+            'rows': {
+                model.__name__: model.objects.count()
+                for model in (Vendor, Office, StockItem, Voucher, Receipt, Issue)
+            },
+            'results': results,
+        }
+        benchmarks.write_results(options['output'], data)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}."))
+
+        if options['baseline']:
+            self._compare(benchmarks.load_results(options['baseline']), data, options['max_regression'])
+
+    def _compare(self, baseline, data, max_regression):
+        regressions = []
+        self.stdout.write("Median time against the baseline:")
+        for name, before, after, change in benchmarks.compare(baseline, data):
+            if change is None:
+                self.stdout.write(f"  {name:<16} {after:8.1f} ms")
+                continue
+            line = f"  {name:<16} {before:8.1f} -> {after:8.1f} ms  ({change:+.1f}%)"
+            if max_regression is not None and change > max_regression:
+                regressions.append(name)
+                line = self.style.WARNING(line)
+            self.stdout.write(line)
+        if regressions:
+            raise CommandError(f"Slower than the baseline by more than {max_regression}%: {', '.join(regressions)}.")
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from store import rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Update the daily rollup tables from receipts and issues changed since the last run. "
+        "After raw SQL that deletes rows or changes dates, use --full."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Rebuild every day from the raw rows.")
+
+    def handle(self, *args, **options):
+        days = rollups.catch_up(full=options['full'])
+        if days is None:
+            self.stdout.write(self.style.SUCCESS("Rebuilt all daily rollups."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Recomputed {days} day(s) of rollups."))
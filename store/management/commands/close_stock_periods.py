@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from store import periods
+from store.models import StockPeriod
+
+
+class Command(BaseCommand):
+    help = "Close every complete month since the last close, snapshotting per-item and per-office totals."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--through', help="Close months ending on or before this date (YYYY-MM-DD).")
+        parser.add_argument('--rebuild', action='store_true', help="Drop every existing close first.")
+
+    def handle(self, *args, **options):
+        through = None
+        if options['through']:
+            through = parse_date(options['through'])
+            if through is None:
+                raise CommandError("--through must be a date (YYYY-MM-DD).")
+        if options['rebuild']:
+            StockPeriod.objects.all().delete()
+
+        closed = periods.close_periods(through)
+        for period in closed:
+            self.stdout.write(f"Closed {period.period_end}")
+        self.stdout.write(self.style.SUCCESS(f"Closed {len(closed)} period(s)."))
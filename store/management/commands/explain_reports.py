@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from store import queryplans
+
+
+class Command(BaseCommand):
+    help = "Explain every registered report query and fail if any of them scans a whole table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help="Print the full plan of every query.")
+        parser.add_argument(
+            '--allow-scans', action='store_true',
+            help="Report full scans without exiting non-zero.",
+        )
+
+    def handle(self, *args, **options):
+        flagged = 0
+        for name, plan, scans in queryplans.audit():
+            if scans:
+                flagged += 1
+                self.stdout.write(self.style.WARNING(f"FULL SCAN  {name}: {', '.join(scans)}"))
+            else:
+                self.stdout.write(f"ok         {name}")
+            if scans or options['verbose_plans']:
+                for line in plan.splitlines():
+                    self.stdout.write(f"    {line}")
+
+        if flagged and not options['allow_scans']:
+            raise CommandError(f"{flagged} report quer{'y' if flagged == 1 else 'ies'} scan a whole table.")
+        self.stdout.write(self.style.SUCCESS("Query plan audit finished."))
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from store import forecasting, reports
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the per-item and per-office consumption forecast (moving average and exponential "
+        "smoothing of the daily issue rollups) and the reorder points the dashboard suggests from."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--as-of', help="Forecast from the history up to this day (YYYY-MM-DD); default today.")
+
+    def handle(self, *args, **options):
+        as_of = None
+        if options['as_of']:
+            as_of = parse_date(options['as_of'])
+            if as_of is None:
+                raise CommandError("--as-of must be a date (YYYY-MM-DD).")
+        started = time.perf_counter()
+        items, pairs = forecasting.refresh(as_of)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Forecast {items} item(s) and {pairs} item/office pair(s) in {elapsed:.2f} s; "
+            f"{reports.reorder_suggestions().count()} item(s) at or below their reorder point."
+        ))
@@ -0,0 +1,129 @@
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from store import search, valuation
+from store.models import Issue, ItemValuation, Office, Receipt, StockBalance, StockCategory, StockItem, Vendor
+
+ADJECTIVES = ['Blue', 'Black', 'Red', 'Large', 'Small', 'Heavy', 'Plain', 'Ruled', 'Steel', 'Plastic']
+NOUNS = ['Pen', 'Pencil', 'Stapler', 'File Cover', 'Register', 'Toner', 'Paper Ream', 'Envelope',
+         'Marker', 'Folder', 'Binder Clip', 'Cable', 'Mouse', 'Keyboard', 'Battery', 'Tape']
+UNITS = ['each', 'box', 'pack', 'ream', 'dozen']
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill an empty database with a synthetic store: vendors, categories, items, offices and "
+        "years of receipts and issues. The same options and --seed always produce the same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vendors', type=int, default=20)
+        parser.add_argument('--categories', type=int, default=8)
+        parser.add_argument('--items', type=int, default=500)
+        parser.add_argument('--offices', type=int, default=30)
+        parser.add_argument('--years', type=float, default=2)
+        parser.add_argument('--vouchers-per-day', type=int, default=3)
+        parser.add_argument('--issues-per-day', type=int, default=20)
+        parser.add_argument('--end', help="Last day of history (YYYY-MM-DD); default today.")
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        if StockItem.objects.exists() or Receipt.objects.exists() or Issue.objects.exists():
+            raise CommandError("generate_store_data only fills an empty store; this database has stock data.")
+        end = parse_date(options['end']) if options['end'] else date.today()
+        if end is None:
+            raise CommandError("--end must be a date (YYYY-MM-DD).")
+        rng = random.Random(options['seed'])
+
+        vendors = Vendor.objects.bulk_create([
+            Vendor(name=f"Vendor {n:03d}", contact=f"0300-{rng.randrange(10**7):07d}")
+            for n in range(1, options['vendors'] + 1)
+        ])
+        categories = StockCategory.objects.bulk_create([
+            StockCategory(name=f"Category {n:02d}", reorder_level=rng.choice([None, 20, 50]))
+            for n in range(1, options['categories'] + 1)
+        ])
+        offices = Office.objects.bulk_create([
+            Office(name=f"Office {n:03d}", location=f"Block {rng.choice('ABCDEFG')}-{rng.randint(1, 20)}")
+            for n in range(1, options['offices'] + 1)
+        ])
+        items = StockItem.objects.bulk_create([
+            StockItem(
+                name=f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {n:05d}",
+                vendor=rng.choice(vendors),
+                category=rng.choice(categories) if categories else None,
+                purchase_price=Decimal(rng.randint(50, 50000)) / 100,
+                unit=rng.choice(UNITS),
+                reorder_level=rng.choice([None, None, 10, 30]),
+            )
+            for n in range(1, options['items'] + 1)
+        ], batch_size=1000)
+        if not items or not vendors:
+            raise CommandError("--items and --vendors must be at least 1.")
+        # bulk_create skips the post_save signals that open balances and valuations and index documents.
+        StockBalance.objects.bulk_create([StockBalance(stock_item=item) for item in items], batch_size=1000)
+        ItemValuation.objects.bulk_create([ItemValuation(stock_item=item) for item in items], batch_size=1000)
+        for model, objs in ((Vendor, vendors), (Office, offices), (StockItem, items)):
+            search.index_model(model, [obj.pk for obj in objs])
+
+        by_vendor = {}
+        for item in items:
+            by_vendor.setdefault(item.vendor_id, []).append(item)
+        vendor_ids = sorted(by_vendor)
+
+        start = end - timedelta(days=round(options['years'] * 365))
+        available = {item.pk: 0 for item in items}
+        receipts, issues, voucher_count = [], [], 0
+        totals = {'receipts': 0, 'issues': 0}
+        day = start
+        while day <= end:
+            for _ in range(options['vouchers_per_day']):
+                voucher_count += 1
+                vendor_items = by_vendor[rng.choice(vendor_ids)]
+                for item in rng.sample(vendor_items, min(len(vendor_items), rng.randint(1, 6))):
+                    quantity = rng.randint(10, 200)
+                    receipts.append(Receipt(
+                        stock_item=item, quantity_received=quantity, date_received=day,
+                        unit_price=item.purchase_price, voucher_number=f"GEN-{voucher_count:07d}",
+                    ))
+                    available[item.pk] += quantity
+            stocked = [pk for pk, quantity in available.items() if quantity > 0]
+            for _ in range(min(options['issues_per_day'], len(stocked))):
+                pk = rng.choice(stocked)
+                if not available[pk]:
+                    continue
+                quantity = rng.randint(1, min(available[pk], 25))
+                available[pk] -= quantity
+                issues.append(Issue(
+                    stock_item_id=pk, office=rng.choice(offices) if offices else None,
+                    quantity_issued=quantity, date_issued=day, remarks=f"Requisition {day:%y%m}-{rng.randint(1, 99)}",
+                ))
+            if day.day == 1 or day == end:
+                self._flush(receipts, issues, totals)
+                self.stdout.write(f"  through {day}: {totals['receipts']} receipts, {totals['issues']} issues")
+            day += timedelta(days=1)
+        self._flush(receipts, issues, totals)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {len(vendors)} vendors, {len(items)} items, {len(offices)} offices, "
+            f"{voucher_count} vouchers, {totals['receipts']} receipts and {totals['issues']} issues "
+            f"from {start} to {end}. Run close_stock_periods to snapshot the months."
+        ))
+
+    def _flush(self, receipts, issues, totals):
+        # The model bulk_create hooks keep the ledger, vouchers, rollups and
+        # valuation current; the batch values the month's rows in date order.
+        with transaction.atomic(), valuation.batch():
+            if receipts:
+                Receipt.objects.bulk_create(receipts, batch_size=1000)
+                totals['receipts'] += len(receipts)
+            if issues:
+                Issue.objects.bulk_create(issues, batch_size=1000)
+                totals['issues'] += len(issues)
+        receipts.clear()
+        issues.clear()
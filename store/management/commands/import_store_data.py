@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from store import importer
+
+
+class Command(BaseCommand):
+    help = "Bulk-import stock items, receipts or issues from a CSV or XLSX file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=importer.KINDS)
+        parser.add_argument('path', help="CSV or .xlsx file; the first row holds the column names.")
+        parser.add_argument('--chunk-size', type=int, default=importer.CHUNK_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help="Validate every row without saving.")
+        parser.add_argument(
+            '--create-missing', action='store_true',
+            help="Create vendors, categories and offices that don't exist yet instead of rejecting the row.",
+        )
+
+    def handle(self, *args, **options):
+        def progress(result):
+            self.stdout.write(f"  {result.rows} rows read, {result.created} ok, {result.error_count} error(s)")
+
+        try:
+            with open(options['path'], 'rb') as f:
+                result = importer.import_file(
+                    f, options['path'], options['kind'],
+                    create_missing=options['create_missing'], dry_run=options['dry_run'],
+                    chunk_size=options['chunk_size'], progress=progress,
+                )
+        except (OSError, importer.InvalidImport) as e:
+            raise CommandError(str(e))
+
+        for line, message in result.errors:
+            self.stderr.write(f"Line {line}: {message}")
+        if result.error_count > len(result.errors):
+            self.stderr.write(f"... and {result.error_count - len(result.errors)} more error(s).")
+        style = self.style.WARNING if result.error_count else self.style.SUCCESS
+        self.stdout.write(style(str(result)))
@@ -0,0 +1,101 @@
+import sqlite3
+import tempfile
+import time
+from multiprocessing import get_context
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from store import benchmarks, instrumentation
+from store.models import Office, StockBalance
+
+# Django's stock SQLite configuration, which this project used before the
+# tuned backend: rollback journal, Python's 5 second busy timeout, deferred
+# transactions, a new connection per request.
+BASELINE = {'ENGINE': 'django.db.backends.sqlite3', 'OPTIONS': {}, 'CONN_MAX_AGE': 0}
+START_DELAY = 3  # seconds for the workers to import Django before the clock starts
+
+
+class Command(BaseCommand):
+    help = (
+        "Write receipts and issues from several processes at once and report the throughput. On SQLite "
+        "it runs on a copy of the database, and --compare runs Django's stock SQLite settings first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=10)
+        parser.add_argument('--compare', action='store_true', help="SQLite: also run the untuned baseline.")
+        parser.add_argument('--output', help="Write the results as JSON.")
+        parser.add_argument(
+            '--in-place', action='store_true',
+            help="Non-SQLite databases: run against the configured database (the test rows stay there).",
+        )
+
+    def handle(self, *args, **options):
+        items = list(
+            StockBalance.objects.filter(quantity_available__gt=0).order_by('-quantity_available')
+            .values_list('stock_item_id', flat=True)[:50]
+        )
+        offices = list(Office.objects.values_list('pk', flat=True)[:20])
+        if not items or not offices:
+            raise CommandError("Needs items in stock and at least one office; run generate_store_data first.")
+
+        results = {}
+        if connection.vendor == 'sqlite':
+            source = settings.DATABASES['default']['NAME']
+            modes = ['baseline', 'tuned'] if options['compare'] else ['tuned']
+            with tempfile.TemporaryDirectory() as tmp:
+                for mode in modes:
+                    path = Path(tmp) / f'{mode}.sqlite3'
+                    self._copy(source, path, journal_mode='DELETE' if mode == 'baseline' else 'WAL')
+                    database = {**BASELINE, 'NAME': str(path)} if mode == 'baseline' else {'NAME': str(path)}
+                    results[mode] = self._run(mode, database, items, offices, options)
+        elif options['in_place']:
+            results['configured'] = self._run('configured', None, items, offices, options)
+        else:
+            raise CommandError(f"On {connection.vendor} the load test writes to the real database; pass --in-place.")
+
+        if 'baseline' in results:
+            before, after = results['baseline']['ops_per_second'], results['tuned']['ops_per_second']
+            if before:
+                self.stdout.write(self.style.SUCCESS(f"Tuned throughput: {after / before:.1f}x the baseline."))
+        if options['output']:
+            benchmarks.write_results(options['output'], {
+                **benchmarks.environment(), 'workers': options['workers'], 'seconds': options['seconds'],
+                'results': results,
+            })
+            self.stdout.write(f"Wrote {options['output']}.")
+
+    def _copy(self, source, target, journal_mode):
+        # The backup API gives a consistent copy even with a live WAL file.
+        with sqlite3.connect(source) as src, sqlite3.connect(target) as dst:
+            src.backup(dst)
+        with sqlite3.connect(target) as dst:
+            dst.execute(f'PRAGMA journal_mode = {journal_mode}')
+
+    def _run(self, mode, database, items, offices, options):
+        start = time.time() + START_DELAY
+        jobs = [
+            {'database': database, 'seed': n, 'items': items, 'offices': offices,
+             'start': start, 'end': start + options['seconds']}
+            for n in range(options['workers'])
+        ]
+        with get_context('spawn').Pool(options['workers']) as pool:
+            outcomes = pool.map(benchmarks.write_load, jobs)
+
+        latencies = [ms for outcome in outcomes for ms in outcome.pop('latencies')]
+        totals = {key: sum(outcome[key] for outcome in outcomes) for key in outcomes[0]}
+        result = {
+            **totals,
+            'ops_per_second': totals['ops'] / options['seconds'],
+            'latency_ms': {**benchmarks.summarize(latencies), **instrumentation.percentiles(latencies, (0.5, 0.95, 0.99))},
+        }
+        self.stdout.write(
+            f"{mode:<10} {result['ops_per_second']:8.1f} writes/s  {totals['ops']} ok, "
+            f"{totals['locked']} 'database is locked', {totals['rejected']} short of stock  "
+            f"p50 {result['latency_ms']['p50'] or 0:.1f} ms  p95 {result['latency_ms']['p95'] or 0:.1f} ms"
+        )
+        return result
@@ -0,0 +1,71 @@
+import shutil
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.utils.dateparse import parse_date
+
+from store import batchprint, rendering
+
+
+class Command(BaseCommand):
+    help = (
+        "Render every issue slip or voucher in a date range in parallel, merge them into one PDF "
+        "and report the throughput in pages per second."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(batchprint.KINDS))
+        parser.add_argument('start', help="First day (YYYY-MM-DD).")
+        parser.add_argument('end', help="Last day (YYYY-MM-DD).")
+        parser.add_argument('--office', type=int, help="Issue slips of this office only.")
+        parser.add_argument('--vendor', type=int, help="Vouchers of this vendor only.")
+        parser.add_argument('--output', help="Where to copy the merged PDF (default <kind>_<start>_<end>.pdf).")
+        parser.add_argument(
+            '--workers', type=int,
+            help=f"Render processes (default STORE_PDF_WORKERS, {settings.STORE_PDF_WORKERS}; 0 renders inline).",
+        )
+        parser.add_argument(
+            '--clear-pdf-cache', action='store_true',
+            help="Empty STORE_PDF_CACHE_DIR first, so every document is rendered (for measuring).",
+        )
+
+    def handle(self, *args, **options):
+        start, end = parse_date(options['start']), parse_date(options['end'])
+        if start is None or end is None:
+            raise CommandError("start and end must be dates (YYYY-MM-DD).")
+        if options['clear_pdf_cache']:
+            shutil.rmtree(Path(settings.STORE_PDF_CACHE_DIR), ignore_errors=True)
+        workers = settings.STORE_PDF_WORKERS if options['workers'] is None else options['workers']
+
+        with override_settings(STORE_PDF_WORKERS=workers):
+            started = time.perf_counter()
+            documents = batchprint.documents(
+                options['kind'], start, end, office_id=options['office'], vendor_id=options['vendor']
+            )
+            if not documents:
+                raise CommandError("Nothing to print in that range.")
+            fetched = time.perf_counter()
+            batch = batchprint.submit(documents)
+            queued = time.perf_counter()
+            if batch.join() != 'ready':
+                error = rendering.paths(batch.key)[2]
+                raise CommandError(f"Batch failed: {error.read_text() if error.exists() else 'unknown error'}")
+            finished = time.perf_counter()
+
+        pdf_path = rendering.paths(batch.key)[0]
+        pages = batch.pages or batchprint.page_count(pdf_path)
+        output = options['output'] or f"{options['kind']}_{start}_{end}.pdf"
+        shutil.copyfile(pdf_path, output)
+
+        elapsed = finished - started
+        self.stdout.write(
+            f"{len(documents)} documents, {pages} pages with {workers} workers in {elapsed:.2f} s: "
+            f"fetch {fetched - started:.2f} s, HTML and queueing {queued - fetched:.2f} s, "
+            f"render and merge {finished - queued:.2f} s."
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{pages / elapsed:.1f} pages/s, {len(documents) / elapsed:.1f} documents/s. Wrote {output}."
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from store import search
+
+
+class Command(BaseCommand):
+    help = "Repopulate the search index from items, vendors, offices and vouchers."
+
+    def handle(self, *args, **options):
+        backend = search.backend()
+        if backend != 'fts5':
+            self.stdout.write(f"The {backend} search backend has no separate index; nothing to rebuild.")
+            return
+        count = search.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} document(s)."))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from store import ledger
+
+
+class Command(BaseCommand):
+    help = "Rebuild StockBalance rows from the raw Receipt/Issue rows, or verify them."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify', action='store_true',
+            help="Only compare stored balances with the raw rows; exit non-zero on drift.",
+        )
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            mismatches = ledger.verify()
+            for item_id, stored, expected in mismatches:
+                self.stderr.write(
+                    f"Item {item_id}: stored (received, issued, available)={stored}, expected={expected}"
+                )
+            if mismatches:
+                raise CommandError(f"{len(mismatches)} stock balance(s) out of date.")
+            self.stdout.write(self.style.SUCCESS("All stock balances match the raw rows."))
+            return
+
+        count = ledger.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} stock balance(s)."))
@@ -0,0 +1,58 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from store import valuation
+from store.models import StockItem
+
+
+class Command(BaseCommand):
+    help = (
+        "Bring the FIFO and moving-average valuation up to date (items changed since the last run, "
+        "or every item with --full), verify it, or value all stock as of a date."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Replay every item's history.")
+        parser.add_argument(
+            '--verify', action='store_true',
+            help="Only compare the stored valuations with a full replay; exit non-zero on drift.",
+        )
+        parser.add_argument('--as-of', help="Value every item at the end of this day (YYYY-MM-DD); writes nothing.")
+        parser.add_argument('--output', help="With --as-of: write the per-item values as CSV.")
+
+    def handle(self, *args, **options):
+        if options['as_of']:
+            self._as_of(options)
+        elif options['verify']:
+            mismatches = valuation.verify()
+            for item_id, stored, expected in mismatches:
+                self.stderr.write(f"Item {item_id}: stored {stored}, expected {expected}")
+            if mismatches:
+                raise CommandError(f"{len(mismatches)} valuation(s) out of date.")
+            self.stdout.write(self.style.SUCCESS("All stored valuations match a full replay."))
+        else:
+            count = valuation.catch_up(full=options['full'])
+            self.stdout.write(self.style.SUCCESS(f"Revalued {count} item(s)."))
+
+    def _as_of(self, options):
+        as_of = parse_date(options['as_of'])
+        if as_of is None:
+            raise CommandError("--as-of must be a date (YYYY-MM-DD).")
+        values = valuation.value_as_of(as_of)
+        if options['output']:
+            names = dict(StockItem.objects.filter(pk__in=values).values_list('pk', 'name'))
+            with open(options['output'], 'w', newline='') as fh:
+                writer = csv.writer(fh)
+                writer.writerow(['Item', 'Quantity', 'FIFO Value', 'Average Cost', 'Average Value'])
+                for item_id, row in sorted(values.items(), key=lambda pair: names.get(pair[0], '')):
+                    writer.writerow([
+                        names.get(item_id, item_id), row['quantity'], row['fifo_value'],
+                        row['average_cost'], row['average_value'],
+                    ])
+        totals = valuation.totals(values)
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(values)} item(s) as of {as_of}: FIFO value {totals['fifo_value']:,.2f}, "
+            f"moving-average value {totals['average_value']:,.2f}."
+        ))
@@ -0,0 +1,109 @@
+import os
+import random
+import tempfile
+import threading
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from django.db.models import Sum
+from django.test.utils import setup_databases, teardown_databases
+
+from store import issuance, ledger
+from store.models import Issue, Office, Receipt, StockItem, Vendor
+
+
+class Command(BaseCommand):
+    help = (
+        "Concurrency harness for store.issuance: hammers issue_stock from many "
+        "threads against a throwaway file-backed test database and checks that "
+        "no item was oversold. store.tests.test_issuance covers the same race in "
+        "the test suite; this is the heavier, tunable run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--batches', type=int, default=25, help="Batches issued per thread.")
+        parser.add_argument('--items', type=int, default=5)
+        parser.add_argument('--stock', type=int, default=100, help="Opening quantity per item.")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite':
+            # The default SQLite test database lives in memory, which threads
+            # can't share; point it at a temporary file instead.
+            fd, path = tempfile.mkstemp(suffix='.sqlite3')
+            os.close(fd)
+            settings.DATABASES['default'].setdefault('TEST', {})['NAME'] = path
+            connections['default'].settings_dict.setdefault('TEST', {})['NAME'] = path
+
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            self.run_harness(**options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+    def run_harness(self, threads, batches, items, stock, seed, **options):
+        vendor = Vendor.objects.create(name="Stress vendor")
+        office = Office.objects.create(name="Stress office", location="-")
+        stock_items = [
+            StockItem.objects.create(name=f"Stress item {n}", vendor=vendor, purchase_price=1)
+            for n in range(items)
+        ]
+        Receipt.objects.bulk_create([
+            Receipt(stock_item=item, quantity_received=stock, unit_price=1, date_received=date.today())
+            for item in stock_items
+        ])
+        item_ids = [item.id for item in stock_items]
+        results = {'issued': 0, 'rejected': 0, 'locked': 0, 'errors': []}
+        lock = threading.Lock()
+
+        def worker(n):
+            rng = random.Random(seed + n)
+            try:
+                for _ in range(batches):
+                    lines = [
+                        Issue(stock_item_id=item_id, quantity_issued=rng.randint(1, 10))
+                        for item_id in rng.sample(item_ids, rng.randint(1, len(item_ids)))
+                    ]
+                    try:
+                        issuance.issue_stock(office, lines, date_issued=date.today())
+                        outcome = 'issued'
+                    except issuance.InsufficientStock:
+                        outcome = 'rejected'
+                    except OperationalError:
+                        # SQLite gave up waiting for the write lock; the batch
+                        # was rolled back as a whole.
+                        outcome = 'locked'
+                    with lock:
+                        results[outcome] += 1
+            except Exception as exc:  # pragma: no cover - reported below
+                with lock:
+                    results['errors'].append(repr(exc))
+            finally:
+                connections.close_all()
+
+        workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        self.stdout.write(
+            f"Batches issued: {results['issued']}, rejected for stock: {results['rejected']}, "
+            f"rolled back on lock timeout: {results['locked']}"
+        )
+        issued = dict(
+            Issue.objects.values_list('stock_item_id').annotate(qty=Sum('quantity_issued')).order_by()
+        )
+        oversold = {item_id: qty for item_id, qty in issued.items() if qty > stock}
+        drift = ledger.verify()
+
+        if results['errors']:
+            raise CommandError("Worker errors:\n" + "\n".join(results['errors']))
+        if oversold:
+            raise CommandError(f"Oversold items (issued > {stock}): {oversold}")
+        if drift:
+            raise CommandError(f"Ledger drift after run: {drift}")
+        self.stdout.write(self.style.SUCCESS("No overselling; balances match the raw rows."))
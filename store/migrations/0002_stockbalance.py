@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-17 22:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Sum
+
+
+def backfill_balances(apps, schema_editor):
+    StockItem = apps.get_model('store', 'StockItem')
+    StockBalance = apps.get_model('store', 'StockBalance')
+    Receipt = apps.get_model('store', 'Receipt')
+    Issue = apps.get_model('store', 'Issue')
+
+    received = dict(Receipt.objects.values_list('stock_item_id').annotate(qty=Sum('quantity_received')).order_by())
+    issued = dict(Issue.objects.values_list('stock_item_id').annotate(qty=Sum('quantity_issued')).order_by())
+    StockBalance.objects.bulk_create([
+        StockBalance(
+            stock_item_id=item_id,
+            quantity_received=received.get(item_id) or 0,
+            quantity_issued=issued.get(item_id) or 0,
+            quantity_available=(received.get(item_id) or 0) - (issued.get(item_id) or 0),
+        )
+        for item_id in StockItem.objects.values_list('id', flat=True)
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity_received', models.PositiveIntegerField(default=0)),
+                ('quantity_issued', models.PositiveIntegerField(default=0)),
+                ('quantity_available', models.IntegerField(default=0)),
+                ('stock_item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='balance', to='store.stockitem')),
+            ],
+        ),
+        migrations.RunPython(backfill_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.2.30 on 2026-10-17 23:02
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import F, Min, OuterRef, Subquery, Sum
+
+
+def backfill_vouchers(apps, schema_editor):
+    Receipt = apps.get_model('store', 'Receipt')
+    Voucher = apps.get_model('store', 'Voucher')
+
+    rows = (
+        Receipt.objects.exclude(voucher_number='').values('voucher_number')
+        .annotate(
+            vendor_id=Min('stock_item__vendor_id'),
+            first_date=Min('date_received'),
+            quantity=Sum('quantity_received'),
+            total=Sum(F('quantity_received') * F('unit_price'), output_field=models.DecimalField()),
+        )
+        .order_by()
+    )
+    Voucher.objects.bulk_create([
+        Voucher(
+            number=row['voucher_number'],
+            vendor_id=row['vendor_id'],
+            date=row['first_date'],
+            total_quantity=row['quantity'] or 0,
+            total_price=row['total'] or 0,
+        )
+        for row in rows
+    ], batch_size=500)
+    Receipt.objects.exclude(voucher_number='').update(
+        voucher=Subquery(Voucher.objects.filter(number=OuterRef('voucher_number')).values('id')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0002_stockbalance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Voucher',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.CharField(max_length=50, unique=True)),
+                ('date', models.DateField()),
+                ('total_quantity', models.PositiveIntegerField(default=0)),
+                ('total_price', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('vendor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='store.vendor')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='receipt',
+            name='voucher',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='receipts', to='store.voucher'),
+        ),
+        migrations.RunPython(backfill_vouchers, migrations.RunPython.noop),
+    ]
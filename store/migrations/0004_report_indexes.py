@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-17 23:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0003_voucher'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['date_issued', 'id'], name='store_issue_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(fields=['office', 'date_issued'], name='store_issue_office_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='receipt',
+            index=models.Index(fields=['date_received', 'id'], name='store_receipt_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='receipt',
+            index=models.Index(fields=['voucher_number'], name='store_receipt_voucher_no_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='receipt',
+            index=models.Index(fields=['stock_item', 'date_received'], name='store_receipt_item_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockitem',
+            index=models.Index(fields=['quantity'], name='store_item_quantity_idx'),
+        ),
+    ]
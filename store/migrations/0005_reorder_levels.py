@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-17 23:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0004_report_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockcategory',
+            name='reorder_level',
+            field=models.PositiveIntegerField(blank=True, help_text='Low-stock threshold for items in this category.', null=True),
+        ),
+        migrations.AddField(
+            model_name='stockitem',
+            name='reorder_level',
+            field=models.PositiveIntegerField(blank=True, help_text="Low-stock threshold; falls back to the category's, then the site default.", null=True),
+        ),
+    ]
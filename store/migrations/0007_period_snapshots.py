@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-17 23:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0006_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_end', models.DateField(unique=True)),
+                ('closed_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity_received', models.PositiveIntegerField(default=0)),
+                ('quantity_issued', models.PositiveIntegerField(default=0)),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='store.stockperiod')),
+                ('stock_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='store.stockitem')),
+            ],
+            options={
+                'unique_together': {('period', 'stock_item')},
+            },
+        ),
+        migrations.CreateModel(
+            name='OfficeIssueSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity_issued', models.PositiveIntegerField(default=0)),
+                ('office', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='store.office')),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='office_snapshots', to='store.stockperiod')),
+                ('stock_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='store.stockitem')),
+            ],
+            options={
+                'unique_together': {('period', 'office', 'stock_item')},
+            },
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 4.2.30 on 2026-10-17 23:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Sum
+from django.utils import timezone
+
+
+def backfill_rollups(apps, schema_editor):
+    Issue = apps.get_model('store', 'Issue')
+    Receipt = apps.get_model('store', 'Receipt')
+    DailyIssueRollup = apps.get_model('store', 'DailyIssueRollup')
+    DailyReceiptRollup = apps.get_model('store', 'DailyReceiptRollup')
+    RollupWatermark = apps.get_model('store', 'RollupWatermark')
+
+    started = timezone.now()
+    DailyIssueRollup.objects.bulk_create([
+        DailyIssueRollup(day=row['date_issued'], office_id=row['office_id'],
+                         stock_item_id=row['stock_item_id'], quantity=row['quantity'])
+        for row in Issue.objects.values('date_issued', 'office_id', 'stock_item_id')
+        .annotate(quantity=Sum('quantity_issued')).order_by()
+    ], batch_size=1000)
+    DailyReceiptRollup.objects.bulk_create([
+        DailyReceiptRollup(day=row['date_received'], stock_item_id=row['stock_item_id'],
+                           vendor_id=row['stock_item__vendor_id'], quantity=row['quantity'], value=row['value'])
+        for row in Receipt.objects.values('date_received', 'stock_item_id', 'stock_item__vendor_id')
+        .annotate(quantity=Sum('quantity_received'), value=Sum('total_price')).order_by()
+    ], batch_size=1000)
+    RollupWatermark.objects.create(name='daily', processed_until=started)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0007_period_snapshots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('processed_until', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyIssueRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('quantity', models.IntegerField(default=0)),
+                ('office', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='store.office')),
+                ('stock_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='store.stockitem')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyReceiptRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('quantity', models.IntegerField(default=0)),
+                ('value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('stock_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='store.stockitem')),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='store.vendor')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['vendor', 'day'], name='store_rcpt_rollup_vendor_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dailyreceiptrollup',
+            constraint=models.UniqueConstraint(fields=('day', 'stock_item'), name='store_receipt_rollup_key'),
+        ),
+        migrations.AddIndex(
+            model_name='dailyissuerollup',
+            index=models.Index(fields=['office', 'day'], name='store_issue_rollup_office_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyissuerollup',
+            constraint=models.UniqueConstraint(fields=('day', 'office', 'stock_item'), name='store_issue_rollup_key'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyissuerollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('office__isnull', True)), fields=('day', 'stock_item'), name='store_issue_rollup_no_office_key'),
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+from django.db import migrations, OperationalError
+
+# Searched columns that get a trigram index on PostgreSQL. Django's icontains
+# compiles to UPPER(column) LIKE UPPER(%s), so the indexes are on UPPER().
+TRIGRAM_COLUMNS = [
+    ('store_stockitem', 'name'),
+    ('store_vendor', 'name'),
+    ('store_vendor', 'contact'),
+    ('store_office', 'name'),
+    ('store_office', 'location'),
+    ('store_voucher', 'number'),
+]
+
+SQLITE_POPULATE = [
+    """
+    INSERT INTO store_search (rowid, title, body, kind, object_id)
+    SELECT i.id * 8 + 1, i.name, TRIM(COALESCE(i.unit, '') || ' ' || COALESCE(c.name, '') || ' ' || v.name), 'item', i.id
+    FROM store_stockitem i
+    JOIN store_vendor v ON v.id = i.vendor_id
+    LEFT JOIN store_stockcategory c ON c.id = i.category_id
+    """,
+    "INSERT INTO store_search (rowid, title, body, kind, object_id) "
+    "SELECT id * 8 + 2, name, contact, 'vendor', id FROM store_vendor",
+    "INSERT INTO store_search (rowid, title, body, kind, object_id) "
+    "SELECT id * 8 + 3, name, location, 'office', id FROM store_office",
+    """
+    INSERT INTO store_search (rowid, title, body, kind, object_id)
+    SELECT vo.id * 8 + 4, vo.number, COALESCE(v.name, ''), 'voucher', vo.id
+    FROM store_voucher vo LEFT JOIN store_vendor v ON v.id = vo.vendor_id
+    """,
+]
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        try:
+            schema_editor.execute(
+                "CREATE VIRTUAL TABLE store_search USING fts5("
+                "title, body, kind UNINDEXED, object_id UNINDEXED, tokenize='trigram')"
+            )
+        except OperationalError:
+            # SQLite built without FTS5 or older than 3.34: store.search
+            # falls back to icontains.
+            return
+        for sql in SQLITE_POPULATE:
+            schema_editor.execute(sql)
+    elif vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for table, column in TRIGRAM_COLUMNS:
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS {table}_{column}_trgm '
+                f'ON {table} USING gin (UPPER({column}) gin_trgm_ops)'
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS store_search')
+    elif vendor == 'postgresql':
+        for table, column in TRIGRAM_COLUMNS:
+            schema_editor.execute(f'DROP INDEX IF EXISTS {table}_{column}_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0008_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.30 on 2026-10-17 23:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0009_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IssueCost',
+            fields=[
+                ('issue', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='cost', serialize=False, to='store.issue')),
+                ('fifo_cost', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('average_cost', models.DecimalField(decimal_places=2, max_digits=14)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ItemValuation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField(default=0)),
+                ('fifo_value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('average_cost', models.DecimalField(decimal_places=4, default=0, max_digits=14)),
+                ('average_value', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('last_date', models.DateField(blank=True, null=True)),
+                ('last_kind', models.PositiveSmallIntegerField(default=0)),
+                ('last_id', models.PositiveIntegerField(default=0)),
+                ('stale', models.BooleanField(default=False)),
+                ('stock_item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='valuation', to='store.stockitem')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CostLayer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('unit_cost', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('remaining', models.PositiveIntegerField()),
+                ('receipt', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='cost_layer', to='store.receipt')),
+                ('stock_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cost_layers', to='store.stockitem')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['stock_item', 'date', 'receipt'], name='store_cost_layer_fifo_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-17 23:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0010_valuation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsumptionForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('as_of', models.DateField()),
+                ('issued', models.IntegerField(default=0)),
+                ('moving_average', models.FloatField(default=0)),
+                ('smoothed', models.FloatField(default=0)),
+                ('deviation', models.FloatField(default=0)),
+                ('days_of_cover', models.FloatField(blank=True, null=True)),
+                ('reorder_point', models.IntegerField(blank=True, null=True)),
+                ('order_up_to', models.IntegerField(blank=True, null=True)),
+                ('office', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='store.office')),
+                ('stock_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='forecasts', to='store.stockitem')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='consumptionforecast',
+            constraint=models.UniqueConstraint(fields=('stock_item', 'office'), name='store_forecast_key'),
+        ),
+        migrations.AddConstraint(
+            model_name='consumptionforecast',
+            constraint=models.UniqueConstraint(condition=models.Q(('office__isnull', True)), fields=('stock_item',), name='store_forecast_item_key'),
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 4.2.30 on 2026-10-18 00:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0011_forecast'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cutoff', models.DateField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('receipts', models.PositiveIntegerField(default=0)),
+                ('issues', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='costlayer',
+            name='receipt',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='cost_layer', to='store.receipt'),
+        ),
+        migrations.CreateModel(
+            name='OpeningLayer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('unit_cost', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('quantity', models.PositiveIntegerField()),
+                ('stock_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='opening_layers', to='store.stockitem')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='OpeningBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('as_of', models.DateField()),
+                ('quantity_received', models.PositiveIntegerField(default=0)),
+                ('quantity_issued', models.PositiveIntegerField(default=0)),
+                ('average_cost', models.DecimalField(decimal_places=4, default=0, max_digits=14)),
+                ('stock_item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='opening', to='store.stockitem')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedReceipt',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('quantity_received', models.PositiveIntegerField()),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('total_price', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('date_received', models.DateField()),
+                ('voucher_number', models.CharField(blank=True, default='', max_length=50)),
+                ('stock_item', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='store.stockitem')),
+                ('voucher', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='store.voucher')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date_received', 'id'], name='store_arch_receipt_date_idx'), models.Index(fields=['stock_item', 'date_received'], name='store_arch_receipt_item_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedIssue',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('quantity_issued', models.PositiveIntegerField()),
+                ('remarks', models.TextField(blank=True)),
+                ('date_issued', models.DateField()),
+                ('fifo_cost', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True)),
+                ('average_cost', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True)),
+                ('office', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='store.office')),
+                ('stock_item', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='store.stockitem')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date_issued', 'id'], name='store_arch_issue_date_idx'), models.Index(fields=['office', 'date_issued'], name='store_arch_issue_office_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 00:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0012_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockitem',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
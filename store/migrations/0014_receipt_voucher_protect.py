@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 00:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0013_stockitem_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='receipt',
+            name='voucher',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='receipts', to='store.voucher'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 00:45
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0014_receipt_voucher_protect'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='stockitem',
+            name='store_item_quantity_idx',
+        ),
+    ]
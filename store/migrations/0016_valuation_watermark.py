@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-18 00:47
+
+from django.db import migrations, models
+
+
+def move_watermark(apps, schema_editor):
+    """Valuation shared the rollups' table under the name 'valuation'; give it its own row."""
+    RollupWatermark = apps.get_model('store', 'RollupWatermark')
+    ValuationWatermark = apps.get_model('store', 'ValuationWatermark')
+    old = RollupWatermark.objects.filter(name='valuation').first()
+    if old is not None:
+        ValuationWatermark.objects.create(pk=1, processed_until=old.processed_until)
+        old.delete()
+
+
+def restore_watermark(apps, schema_editor):
+    RollupWatermark = apps.get_model('store', 'RollupWatermark')
+    ValuationWatermark = apps.get_model('store', 'ValuationWatermark')
+    for row in ValuationWatermark.objects.all():
+        RollupWatermark.objects.update_or_create(name='valuation', defaults={'processed_until': row.processed_until})
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0015_drop_stockitem_quantity_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ValuationWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('processed_until', models.DateTimeField()),
+            ],
+        ),
+        migrations.RunPython(move_watermark, restore_watermark),
+    ]
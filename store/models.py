@@ -1,9 +1,14 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import models, transaction
 from django.db.models import Sum
+from django.utils import timezone
 
 class Office(models.Model):
     name = models.CharField(max_length=200)
     location = models.CharField(max_length=200)
+    # Also bumped whenever one of the office's issues changes (store.conditional).
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -11,12 +16,17 @@ class Office(models.Model):
 class Vendor(models.Model):
     name = models.CharField(max_length=200)
     contact = models.CharField(max_length=200, blank=True)
+    # Also bumped whenever one of the vendor's vouchers changes (store.conditional).
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
 
 class StockCategory(models.Model):
     name = models.CharField(max_length=100, unique=True)
+    reorder_level = models.PositiveIntegerField(
+        null=True, blank=True, help_text="Low-stock threshold for items in this category."
+    )
 
     def __str__(self):
         return self.name
@@ -27,9 +37,16 @@ class StockItem(models.Model):
     vendor = models.ForeignKey('Vendor', on_delete=models.CASCADE)
     category = models.ForeignKey('StockCategory', on_delete=models.CASCADE, null=True, blank=True)  # ✅ re-add this
     purchase_price = models.DecimalField(max_digits=10, decimal_places=2)
+    # Legacy columns, not kept up to date by receipts and issues: the stock
+    # on hand is the item's StockBalance (store.ledger).
     quantity = models.PositiveIntegerField(default=0)
     total_price = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     unit = models.CharField(max_length=100, blank=True, null=True)
+    reorder_level = models.PositiveIntegerField(
+        null=True, blank=True, help_text="Low-stock threshold; falls back to the category's, then the site default."
+    )
+    # Vouchers and issue batches show item names; their ETags include this (store.conditional).
+    updated_at = models.DateTimeField(auto_now=True)
 
     def save(self, *args, **kwargs):
         self.total_price = self.purchase_price * self.quantity
@@ -43,17 +60,144 @@ class StockItem(models.Model):
     def __str__(self):
         return self.name
 
+class StockBalance(models.Model):
+    """Running totals per item, maintained by ``store.ledger``."""
+    stock_item = models.OneToOneField(StockItem, on_delete=models.CASCADE, related_name='balance')
+    quantity_received = models.PositiveIntegerField(default=0)
+    quantity_issued = models.PositiveIntegerField(default=0)
+    quantity_available = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.stock_item_id}: {self.quantity_available}"
+
+
+class MovementQuerySet(models.QuerySet):
+    """
+    ``update()`` on receipts or issues keeps the derived tables current the
+    way ``save()`` does: the rows are read before and after, the old rows'
+    contributions are reversed and the new ones applied (``_changed``).
+    """
+
+    def update(self, **kwargs):
+        kwargs.setdefault('updated_at', timezone.now())
+        with transaction.atomic(using=self.db):
+            before = list(self.select_for_update())
+            count = super().update(**kwargs)
+            after = list(self.model.objects.using(self.db).filter(pk__in=[row.pk for row in before]))
+            if after:
+                self._changed(before, after)
+        return count
+
+
+class IssueQuerySet(MovementQuerySet):
+    def _changed(self, before, after):
+        from . import conditional, dashboard, ledger, periods, rollups, valuation
+        ledger.record(before, sign=-1)
+        ledger.record(after)
+        rollups.record_issues(before, sign=-1)
+        rollups.record_issues(after)
+        valuation.invalidate({row.stock_item_id for row in before + after})
+        conditional.touch_offices({row.office_id for row in before + after})
+        periods.invalidate_from(*{row.date_issued for row in before + after})
+        dashboard.invalidate(self.db)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from . import conditional, dashboard, ledger, periods, rollups, valuation
+        with transaction.atomic(using=self.db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            ledger.record(objs)
+            rollups.record_issues(objs)
+            valuation.record(objs)
+            conditional.touch_offices({obj.office_id for obj in objs})
+            periods.invalidate_from(*{obj.date_issued for obj in objs})
+            dashboard.invalidate(self.db)
+        return objs
+
+
 class Issue(models.Model):
     stock_item = models.ForeignKey(StockItem, on_delete=models.CASCADE)
     office = models.ForeignKey(Office, on_delete=models.SET_NULL, null=True, blank=True)
     quantity_issued = models.PositiveIntegerField()
     remarks = models.TextField(blank=True)
     date_issued = models.DateField(auto_now_add=False, auto_now=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = IssueQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['date_issued', 'id'], name='store_issue_date_idx'),
+            models.Index(fields=['office', 'date_issued'], name='store_issue_office_date_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Issued {self.quantity_issued} of {self.stock_item.name} to {self.office.name}"
 
 
+class Voucher(models.Model):
+    number = models.CharField(max_length=50, unique=True)
+    vendor = models.ForeignKey('Vendor', on_delete=models.SET_NULL, null=True, blank=True)
+    date = models.DateField()
+    # Cached from the receipts by store.vouchers.refresh_totals
+    total_quantity = models.PositiveIntegerField(default=0)
+    total_price = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.number
+
+
+class ReceiptQuerySet(MovementQuerySet):
+    def _changed(self, before, after):
+        from . import dashboard, ledger, periods, rollups, valuation, vouchers
+        stale = [row for row in after if row.total_price != row.unit_price * row.quantity_received]
+        if stale:
+            # Not self.update(): that would come back here.
+            models.QuerySet.update(
+                Receipt.objects.using(self.db).filter(pk__in=[row.pk for row in stale]),
+                total_price=models.ExpressionWrapper(vouchers.LINE_TOTAL, output_field=models.DecimalField()),
+            )
+            for row in stale:
+                row.total_price = row.unit_price * row.quantity_received
+        # An edited voucher number moves the receipt to that voucher.
+        links = {row.pk: (row.voucher_id, row.voucher_number) for row in after}
+        vouchers.attach_vouchers(after)
+        for row in after:
+            if (row.voucher_id, row.voucher_number) != links[row.pk]:
+                models.QuerySet.update(
+                    Receipt.objects.using(self.db).filter(pk=row.pk),
+                    voucher_id=row.voucher_id, voucher_number=row.voucher_number,
+                )
+        ledger.record(before, sign=-1)
+        ledger.record(after)
+        rollups.record_receipts(before, sign=-1)
+        rollups.record_receipts(after)
+        valuation.invalidate({row.stock_item_id for row in before + after})
+        vouchers.refresh_totals({row.voucher_id for row in before + after})
+        periods.invalidate_from(*{row.date_received for row in before + after})
+        dashboard.invalidate(self.db)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from . import dashboard, ledger, periods, rollups, valuation, vouchers
+        objs = list(objs)
+        for obj in objs:
+            obj.total_price = obj.unit_price * obj.quantity_received
+        with transaction.atomic(using=self.db):
+            vouchers.attach_vouchers(objs)
+            objs = super().bulk_create(objs, *args, **kwargs)
+            ledger.record(objs)
+            rollups.record_receipts(objs)
+            valuation.record(objs)
+            vouchers.refresh_totals({obj.voucher_id for obj in objs})
+            periods.invalidate_from(*{obj.date_received for obj in objs})
+            dashboard.invalidate(self.db)
+        return objs
+
+
 class Receipt(models.Model):
     stock_item = models.ForeignKey(StockItem, on_delete=models.CASCADE)
     quantity_received = models.PositiveIntegerField()
@@ -61,10 +205,24 @@ class Receipt(models.Model):
     total_price = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     date_received = models.DateField()
     voucher_number = models.CharField(max_length=50, default='', blank=True)
+    voucher = models.ForeignKey(Voucher, on_delete=models.PROTECT, null=True, blank=True, related_name='receipts')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ReceiptQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['date_received', 'id'], name='store_receipt_date_idx'),
+            models.Index(fields=['voucher_number'], name='store_receipt_voucher_no_idx'),
+            models.Index(fields=['stock_item', 'date_received'], name='store_receipt_item_date_idx'),
+        ]
 
     def save(self, *args, **kwargs):
+        from . import vouchers
         self.total_price = self.unit_price * self.quantity_received
-        super().save(*args, **kwargs)
+        with transaction.atomic(using=kwargs.get('using')):
+            vouchers.attach_vouchers([self])
+            super().save(*args, **kwargs)
 
 class VendorStock(models.Model):
     vendor = models.ForeignKey('Vendor', on_delete=models.CASCADE)
@@ -73,4 +231,248 @@ class VendorStock(models.Model):
     quantity = models.PositiveIntegerField()
 
     def __str__(self):
-        return f"{self.vendor.name} - {self.stock_item.name}"
\ No newline at end of file
+        return f"{self.vendor.name} - {self.stock_item.name}"
+
+# ---------------- Period-close snapshots (store.periods) ----------------
+class StockPeriod(models.Model):
+    """A closed month; its snapshots hold cumulative totals through ``period_end``."""
+    period_end = models.DateField(unique=True)
+    closed_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Period ending {self.period_end}"
+
+
+class StockSnapshot(models.Model):
+    period = models.ForeignKey(StockPeriod, on_delete=models.CASCADE, related_name='stock_snapshots')
+    stock_item = models.ForeignKey(StockItem, on_delete=models.CASCADE)
+    quantity_received = models.PositiveIntegerField(default=0)
+    quantity_issued = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('period', 'stock_item')
+
+
+class OfficeIssueSnapshot(models.Model):
+    period = models.ForeignKey(StockPeriod, on_delete=models.CASCADE, related_name='office_snapshots')
+    office = models.ForeignKey(Office, on_delete=models.CASCADE)
+    stock_item = models.ForeignKey(StockItem, on_delete=models.CASCADE)
+    quantity_issued = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('period', 'office', 'stock_item')
+
+
+# ---------------- Daily rollups (store.rollups) ----------------
+class DailyIssueRollup(models.Model):
+    day = models.DateField()
+    office = models.ForeignKey(Office, on_delete=models.CASCADE, null=True, blank=True)
+    stock_item = models.ForeignKey(StockItem, on_delete=models.CASCADE)
+    quantity = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'office', 'stock_item'], name='store_issue_rollup_key'),
+            # NULLs never collide in a plain unique constraint.
+            models.UniqueConstraint(
+                fields=['day', 'stock_item'], condition=models.Q(office__isnull=True),
+                name='store_issue_rollup_no_office_key',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['office', 'day'], name='store_issue_rollup_office_idx'),
+        ]
+
+
+class DailyReceiptRollup(models.Model):
+    day = models.DateField()
+    stock_item = models.ForeignKey(StockItem, on_delete=models.CASCADE)
+    vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE)
+    quantity = models.IntegerField(default=0)
+    value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'stock_item'], name='store_receipt_rollup_key'),
+        ]
+        indexes = [
+            models.Index(fields=['vendor', 'day'], name='store_rcpt_rollup_vendor_idx'),
+        ]
+
+
+class RollupWatermark(models.Model):
+    """
+    How far ``catch_up_rollups`` has processed rows, by ``updated_at``.
+    Rollups only; valuation keeps its own (``ValuationWatermark``).
+    """
+    name = models.CharField(max_length=50, unique=True)
+    processed_until = models.DateTimeField()
+
+
+# ---------------- Inventory valuation (store.valuation) ----------------
+class ItemValuation(models.Model):
+    """FIFO and moving-average valuation of an item's stock on hand."""
+    stock_item = models.OneToOneField(StockItem, on_delete=models.CASCADE, related_name='valuation')
+    quantity = models.IntegerField(default=0)
+    fifo_value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    average_cost = models.DecimalField(max_digits=14, decimal_places=4, default=0)
+    average_value = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    # The last movement applied, in (date, receipts before issues, id) order.
+    last_date = models.DateField(null=True, blank=True)
+    last_kind = models.PositiveSmallIntegerField(default=0)
+    last_id = models.PositiveIntegerField(default=0)
+    # Set when a change lands before the last movement; store.valuation.refresh replays the item.
+    stale = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"{self.stock_item_id}: {self.quantity} @ {self.fifo_value}"
+
+
+class ValuationWatermark(models.Model):
+    """How far ``revalue_stock`` has checked rows for writes that bypassed the models. One row."""
+    processed_until = models.DateTimeField()
+
+
+class CostLayer(models.Model):
+    """The units of one receipt still on hand, consumed oldest first by FIFO."""
+    stock_item = models.ForeignKey(StockItem, on_delete=models.CASCADE, related_name='cost_layers')
+    # Empty for layers carried over from an opening balance (store.archive).
+    receipt = models.OneToOneField(
+        Receipt, on_delete=models.CASCADE, null=True, blank=True, related_name='cost_layer'
+    )
+    date = models.DateField()
+    unit_cost = models.DecimalField(max_digits=10, decimal_places=2)
+    remaining = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['stock_item', 'date', 'receipt'], name='store_cost_layer_fifo_idx'),
+        ]
+
+
+class IssueCost(models.Model):
+    """Cost of the goods in one issue, under both methods."""
+    issue = models.OneToOneField(Issue, on_delete=models.CASCADE, primary_key=True, related_name='cost')
+    fifo_cost = models.DecimalField(max_digits=14, decimal_places=2)
+    average_cost = models.DecimalField(max_digits=14, decimal_places=2)
+
+    @property
+    def fifo_unit_cost(self):
+        quantity = self.issue.quantity_issued
+        return (self.fifo_cost / quantity).quantize(Decimal('0.01')) if quantity else self.fifo_cost
+
+
+# ---------------- Consumption forecast (store.forecasting) ----------------
+class ConsumptionForecast(models.Model):
+    """
+    Daily consumption rates of an item, overall (``office`` empty) or for one
+    office, as of the last ``forecast_consumption`` run. Cover and reorder
+    figures are only set on the overall rows.
+    """
+    stock_item = models.ForeignKey(StockItem, on_delete=models.CASCADE, related_name='forecasts')
+    office = models.ForeignKey(Office, on_delete=models.CASCADE, null=True, blank=True)
+    as_of = models.DateField()
+    issued = models.IntegerField(default=0)  # over the whole history window
+    moving_average = models.FloatField(default=0)
+    smoothed = models.FloatField(default=0)
+    deviation = models.FloatField(default=0)
+    days_of_cover = models.FloatField(null=True, blank=True)
+    reorder_point = models.IntegerField(null=True, blank=True)
+    order_up_to = models.IntegerField(null=True, blank=True)  # reorder point plus the review period's demand
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['stock_item', 'office'], name='store_forecast_key'),
+            models.UniqueConstraint(
+                fields=['stock_item'], condition=models.Q(office__isnull=True), name='store_forecast_item_key',
+            ),
+        ]
+
+
+# ---------------- Archive (store.archive) ----------------
+class ArchiveRun(models.Model):
+    """One ``archive_history`` run; the latest cutoff is the archive's."""
+    cutoff = models.DateField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+    receipts = models.PositiveIntegerField(default=0)
+    issues = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Archived through {self.cutoff}"
+
+
+class OpeningBalance(models.Model):
+    """
+    An item's archived receipts and issues folded into one row: the totals
+    and average cost at the archive cutoff. ``OpeningLayer`` holds its FIFO
+    layers still on hand then.
+    """
+    stock_item = models.OneToOneField(StockItem, on_delete=models.CASCADE, related_name='opening')
+    as_of = models.DateField()
+    quantity_received = models.PositiveIntegerField(default=0)
+    quantity_issued = models.PositiveIntegerField(default=0)
+    average_cost = models.DecimalField(max_digits=14, decimal_places=4, default=0)
+
+    @property
+    def quantity(self):
+        return self.quantity_received - self.quantity_issued
+
+
+class OpeningLayer(models.Model):
+    stock_item = models.ForeignKey(StockItem, on_delete=models.CASCADE, related_name='opening_layers')
+    date = models.DateField()
+    unit_cost = models.DecimalField(max_digits=10, decimal_places=2)
+    quantity = models.PositiveIntegerField()
+
+
+# The archived rows keep their ids and may live in another database (see
+# store.routers), so their foreign keys have no database constraint and
+# their related rows are loaded with prefetch_related.
+class ArchivedReceipt(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    stock_item = models.ForeignKey(StockItem, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    quantity_received = models.PositiveIntegerField()
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+    total_price = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    date_received = models.DateField()
+    voucher_number = models.CharField(max_length=50, default='', blank=True)
+    voucher = models.ForeignKey(
+        Voucher, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name='+'
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['date_received', 'id'], name='store_arch_receipt_date_idx'),
+            models.Index(fields=['stock_item', 'date_received'], name='store_arch_receipt_item_idx'),
+        ]
+
+
+class ArchivedIssue(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    stock_item = models.ForeignKey(StockItem, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    office = models.ForeignKey(
+        Office, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name='+'
+    )
+    quantity_issued = models.PositiveIntegerField()
+    remarks = models.TextField(blank=True)
+    date_issued = models.DateField()
+    # From IssueCost when the issue was archived.
+    fifo_cost = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+    average_cost = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['date_issued', 'id'], name='store_arch_issue_date_idx'),
+            models.Index(fields=['office', 'date_issued'], name='store_arch_issue_office_idx'),
+        ]
+
+    @property
+    def cost(self):
+        """Stands in for ``Issue.cost`` in the report templates."""
+        return self
+
+    @property
+    def fifo_unit_cost(self):
+        if self.fifo_cost is None or not self.quantity_issued:
+            return self.fifo_cost
+        return (self.fifo_cost / self.quantity_issued).quantize(Decimal('0.01'))
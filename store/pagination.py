@@ -0,0 +1,153 @@
+"""
+Keyset (cursor) pagination.
+
+Pages are selected with ``WHERE (date, id) < (cursor)`` instead of OFFSET,
+so fetching a later page costs the same as the first one. Cursors are the
+sort-key values of the last (or first) row on the page, encoded into the
+``after``/``before`` query parameters.
+
+Grouped querysets (``values().annotate()``) are paged on an aggregate such
+as ``last_id``, which the database can only compare after grouping, in
+HAVING. Pass the ungrouped rows as ``window`` and the grouping is limited
+to the few leading-key values (dates) the page can reach, found on the
+index first.
+"""
+import base64
+import json
+from datetime import date, datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+PER_PAGE = 50
+
+
+def encode_cursor(values):
+    values = [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, size):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except ValueError:
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    if not all(value is None or isinstance(value, (str, int, float)) for value in values):
+        return None
+    return values
+
+
+def _value(row, field):
+    return row[field] if isinstance(row, dict) else getattr(row, field)
+
+
+def _past(keys, values, reverse=False):
+    """Q matching rows that sort after ``values`` in ``keys`` order (before, if ``reverse``)."""
+    condition = Q()
+    for n in range(len(keys) - 1, -1, -1):
+        field = keys[n].lstrip('-')
+        descending = keys[n].startswith('-') != reverse
+        step = Q(**{f"{field}__{'lt' if descending else 'gt'}": values[n]})
+        if n < len(keys) - 1:
+            step |= Q(**{field: values[n]}) & condition
+        condition = step
+    return condition
+
+
+class KeysetPage:
+    def __init__(self, object_list, keys, params, has_next, has_previous):
+        self.object_list = object_list
+        self.keys = keys
+        self.params = params
+        self.has_next = has_next
+        self.has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def _query(self, name, row):
+        params = self.params.copy()
+        params.pop('after', None)
+        params.pop('before', None)
+        params[name] = encode_cursor([_value(row, key.lstrip('-')) for key in self.keys])
+        return params.urlencode()
+
+    @property
+    def next_query(self):
+        return self._query('after', self.object_list[-1]) if self.has_next and self.object_list else ''
+
+    @property
+    def previous_query(self):
+        return self._query('before', self.object_list[0]) if self.has_previous and self.object_list else ''
+
+    @property
+    def first_query(self):
+        params = self.params.copy()
+        params.pop('after', None)
+        params.pop('before', None)
+        return params.urlencode()
+
+
+def _window(queryset, window, keys, per_page, cursor, reverse=False):
+    """
+    Limit ``queryset`` to the rows whose leading key is among the next
+    ``per_page + 2`` distinct values in ``window``: enough for a page and the
+    look-ahead row even if the cursor's own value has no groups left.
+    """
+    field = keys[0].lstrip('-')
+    descending = keys[0].startswith('-') != reverse
+    if cursor is not None:
+        window = window.filter(**{f"{field}__{'lte' if descending else 'gte'}": cursor[0]})
+    edge = list(
+        window.order_by(f'-{field}' if descending else field)
+        .values_list(field, flat=True).distinct()[per_page + 1:per_page + 2]
+    )
+    if not edge:
+        return queryset
+    return queryset.filter(**{f"{field}__{'gte' if descending else 'lte'}": edge[0]})
+
+
+def _rows(queryset, window, keys, per_page, cursor=None, reverse=False):
+    order = [key[1:] if key.startswith('-') else f'-{key}' for key in keys] if reverse else keys
+    if window is not None:
+        rows = list(_window(queryset, window, keys, per_page, cursor, reverse).order_by(*order)[:per_page + 1])
+        if len(rows) > per_page:
+            return rows
+        # A HAVING filter dropped groups inside the window; look further.
+    return list(queryset.order_by(*order)[:per_page + 1])
+
+
+def paginate(queryset, params, keys, per_page=PER_PAGE, window=None):
+    """
+    Return a ``KeysetPage`` of ``queryset`` ordered by ``keys`` (e.g.
+    ``('-date_issued', '-id')``). The last key must be unique. For a grouped
+    ``queryset`` pass the rows it groups as ``window`` (see above). A cursor
+    that doesn't fit the keys gives the first page.
+    """
+    after = decode_cursor(params.get('after', ''), len(keys)) if params.get('after') else None
+    before = decode_cursor(params.get('before', ''), len(keys)) if params.get('before') else None
+    first_field = keys[0].lstrip('-')
+
+    try:
+        if before is not None:
+            # A plain bound on the leading key lets the database use its index.
+            bound = 'gte' if keys[0].startswith('-') else 'lte'
+            qs = queryset.filter(**{f'{first_field}__{bound}': before[0]}).filter(_past(keys, before, reverse=True))
+            rows = _rows(qs, window, keys, per_page, before, reverse=True)
+            has_previous = len(rows) > per_page
+            rows = rows[:per_page][::-1]
+            return KeysetPage(rows, keys, params, has_next=bool(rows), has_previous=has_previous)
+        if after is not None:
+            bound = 'lte' if keys[0].startswith('-') else 'gte'
+            qs = queryset.filter(**{f'{first_field}__{bound}': after[0]}).filter(_past(keys, after))
+            rows = _rows(qs, window, keys, per_page, after)
+            return KeysetPage(rows[:per_page], keys, params, has_next=len(rows) > per_page, has_previous=True)
+    except (TypeError, ValueError, ValidationError):
+        pass  # mangled cursor: fall back to the first page
+    rows = _rows(queryset, window, keys, per_page)
+    return KeysetPage(rows[:per_page], keys, params, has_next=len(rows) > per_page, has_previous=False)
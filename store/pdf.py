@@ -0,0 +1,37 @@
+"""
+HTML to PDF with xhtml2pdf.
+
+xhtml2pdf pulls in reportlab, html5lib and Pillow, which cost a web worker
+noticeable import time and memory. Only ``store.rendering`` imports this
+module, and only when it has a PDF to render, so workers that never print
+don't load any of it; ``benchmark_startup`` checks that this stays true.
+"""
+import os
+import time
+from pathlib import Path
+
+from xhtml2pdf import pisa
+
+
+def render(html, pdf_path):
+    """
+    Runs in a pool worker: write ``html`` as a PDF to ``pdf_path``. Returns
+    the seconds spent in ``pisa.CreatePDF``.
+    """
+    pdf_path = Path(pdf_path)
+    tmp_path = pdf_path.with_suffix(f'.{os.getpid()}.tmp')
+    try:
+        with open(tmp_path, 'wb') as fh:
+            started = time.perf_counter()
+            result = pisa.CreatePDF(html, dest=fh)
+            elapsed = time.perf_counter() - started
+        if result.err:
+            raise RuntimeError(f"xhtml2pdf reported {result.err} error(s)")
+        os.replace(tmp_path, pdf_path)
+    except Exception as exc:
+        pdf_path.with_suffix('.err').write_text(str(exc))
+        raise
+    finally:
+        pdf_path.with_suffix('.pending').unlink(missing_ok=True)
+        tmp_path.unlink(missing_ok=True)
+    return elapsed
@@ -0,0 +1,200 @@
+"""
+Monthly period-close snapshots for as-of stock queries.
+
+Closing a month stores, per item, the cumulative quantity received and
+issued through the month end, and per (office, item) the cumulative quantity
+issued. Each close starts from the previous close and adds only that month's
+rows, so closing is incremental. An as-of query reads the nearest close on or
+before the date and adds the rows after it, so it never sums more than about
+a month of raw rows however long the history gets.
+
+Writes dated on or before a close (back-dated entries, edits, deletes) drop
+that close and every later one, and ``close_stock_periods`` rebuilds them.
+Until then, as-of queries fall back to the last close that is still valid.
+Ranges that reach back to the archive cutoff also count the archived rows
+(store.archive).
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Min, Sum
+from django.utils.dateparse import parse_date
+
+from . import archive
+from .models import Issue, OfficeIssueSnapshot, Receipt, StockPeriod, StockSnapshot
+
+
+def month_end(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+
+
+def as_date(value):
+    return parse_date(value) if isinstance(value, str) else value
+
+
+def invalidate_from(*days):
+    """Drop the closes whose totals include anything dated on or after the earliest of ``days``."""
+    days = [as_date(day) for day in days if day]
+    if days:
+        StockPeriod.objects.filter(period_end__gte=min(days)).delete()
+
+
+def _between(queryset, field, after, through):
+    if after:
+        queryset = queryset.filter(**{f'{field}__gt': after})
+    return queryset.filter(**{f'{field}__lte': through})
+
+
+def _sources(after):
+    """(receipts, issues) querysets to read for rows dated after ``after``: live, then archived if in range."""
+    sources = [(Receipt.objects.all(), Issue.objects.all())]
+    if archive.overlaps(after=after):
+        sources.append((archive.receipts(), archive.issues()))
+    return sources
+
+
+def _item_deltas(after, through, stock_item_ids=None):
+    """{item_id: [received, issued]} for rows dated in (after, through]."""
+    totals = defaultdict(lambda: [0, 0])
+    for receipts, issues in _sources(after):
+        receipts = _between(receipts, 'date_received', after, through)
+        issues = _between(issues, 'date_issued', after, through)
+        if stock_item_ids is not None:
+            receipts = receipts.filter(stock_item_id__in=stock_item_ids)
+            issues = issues.filter(stock_item_id__in=stock_item_ids)
+        for item_id, quantity in receipts.values_list('stock_item_id').annotate(
+            q=Sum('quantity_received')
+        ).order_by():
+            totals[item_id][0] += quantity
+        for item_id, quantity in issues.values_list('stock_item_id').annotate(q=Sum('quantity_issued')).order_by():
+            totals[item_id][1] += quantity
+    return totals
+
+
+def _office_deltas(after, through, office_id=None, stock_item_ids=None):
+    """{(office_id, item_id): issued} for rows dated in (after, through]."""
+    totals = defaultdict(int)
+    for _, issues in _sources(after):
+        issues = _between(issues.filter(office__isnull=False), 'date_issued', after, through)
+        if office_id:
+            issues = issues.filter(office_id=office_id)
+        if stock_item_ids is not None:
+            issues = issues.filter(stock_item_id__in=stock_item_ids)
+        for office, item, quantity in issues.values_list('office_id', 'stock_item_id').annotate(
+            q=Sum('quantity_issued')
+        ).order_by():
+            totals[office, item] += quantity
+    return dict(totals)
+
+
+def nearest_period(as_of):
+    return StockPeriod.objects.filter(period_end__lte=as_of).order_by('-period_end').first()
+
+
+# ---------------- Closing ----------------
+def close_period(period_end):
+    """Snapshot cumulative totals through ``period_end`` (the previous close plus the rows since)."""
+    with transaction.atomic():
+        previous = nearest_period(period_end - timedelta(days=1))
+        after = previous.period_end if previous else None
+
+        items = defaultdict(lambda: [0, 0])
+        offices = defaultdict(int)
+        if previous:
+            for item_id, received, issued in previous.stock_snapshots.values_list(
+                'stock_item_id', 'quantity_received', 'quantity_issued'
+            ):
+                items[item_id] = [received, issued]
+            for office_id, item_id, issued in previous.office_snapshots.values_list(
+                'office_id', 'stock_item_id', 'quantity_issued'
+            ):
+                offices[office_id, item_id] = issued
+        for item_id, (received, issued) in _item_deltas(after, period_end).items():
+            items[item_id][0] += received
+            items[item_id][1] += issued
+        for key, issued in _office_deltas(after, period_end).items():
+            offices[key] += issued
+
+        StockPeriod.objects.filter(period_end=period_end).delete()
+        period = StockPeriod.objects.create(period_end=period_end)
+        StockSnapshot.objects.bulk_create([
+            StockSnapshot(period=period, stock_item_id=item_id, quantity_received=received, quantity_issued=issued)
+            for item_id, (received, issued) in items.items()
+        ], batch_size=1000)
+        OfficeIssueSnapshot.objects.bulk_create([
+            OfficeIssueSnapshot(period=period, office_id=office_id, stock_item_id=item_id, quantity_issued=issued)
+            for (office_id, item_id), issued in offices.items()
+        ], batch_size=1000)
+    return period
+
+
+def _first_movement():
+    days = []
+    for receipts, issues in _sources(None):
+        days += [
+            receipts.aggregate(first=Min('date_received'))['first'],
+            issues.aggregate(first=Min('date_issued'))['first'],
+        ]
+    days = [day for day in days if day]
+    return min(days) if days else None
+
+
+def close_periods(through=None):
+    """
+    Close every month from the one after the latest close up to the month
+    ending on or before ``through`` (default: the last complete month).
+    """
+    through = through or date.today().replace(day=1) - timedelta(days=1)
+    latest = StockPeriod.objects.order_by('-period_end').first()
+    if latest:
+        period_end = month_end(latest.period_end + timedelta(days=1))
+    else:
+        first = _first_movement()
+        if first is None:
+            return []
+        period_end = month_end(first)
+
+    closed = []
+    while period_end <= through:
+        closed.append(close_period(period_end))
+        period_end = month_end(period_end + timedelta(days=1))
+    return closed
+
+
+# ---------------- As-of queries ----------------
+def stock_on_hand(as_of, stock_item_ids=None):
+    """{item_id: (received, issued, available)} as of the end of ``as_of``."""
+    period = nearest_period(as_of)
+    totals = defaultdict(lambda: [0, 0])
+    if period:
+        snapshots = period.stock_snapshots.all()
+        if stock_item_ids is not None:
+            snapshots = snapshots.filter(stock_item_id__in=stock_item_ids)
+        for item_id, received, issued in snapshots.values_list('stock_item_id', 'quantity_received', 'quantity_issued'):
+            totals[item_id] = [received, issued]
+    for item_id, (received, issued) in _item_deltas(
+        period.period_end if period else None, as_of, stock_item_ids
+    ).items():
+        totals[item_id][0] += received
+        totals[item_id][1] += issued
+    return {item_id: (received, issued, received - issued) for item_id, (received, issued) in totals.items()}
+
+
+def office_issued(as_of, office_id=None, stock_item_ids=None):
+    """{(office_id, item_id): quantity issued to the office} up to the end of ``as_of``."""
+    period = nearest_period(as_of)
+    totals = defaultdict(int)
+    if period:
+        snapshots = period.office_snapshots.all()
+        if office_id:
+            snapshots = snapshots.filter(office_id=office_id)
+        if stock_item_ids is not None:
+            snapshots = snapshots.filter(stock_item_id__in=stock_item_ids)
+        for office, item_id, issued in snapshots.values_list('office_id', 'stock_item_id', 'quantity_issued'):
+            totals[office, item_id] = issued
+    for key, issued in _office_deltas(
+        period.period_end if period else None, as_of, office_id, stock_item_ids
+    ).items():
+        totals[key] += issued
+    return dict(totals)
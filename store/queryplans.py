@@ -0,0 +1,90 @@
+"""
+Query-plan audit for the report queries.
+
+``report_queries()`` is the registry of the hot queries behind the report,
+voucher, issue and dashboard pages, built with representative filters.
+``audit()`` runs ``EXPLAIN QUERY PLAN`` (SQLite) or ``EXPLAIN`` (PostgreSQL)
+on each one through ``QuerySet.explain()`` and picks out full-table scans.
+"""
+import re
+from datetime import date, timedelta
+
+from django.db.models import F, Sum
+
+from . import archive, reports, vouchers
+from .models import Issue, Office, Receipt, StockItem, Voucher
+
+# Small lookup tables a plan may scan without it being a regression.
+ALLOWED_SCANS = {'store_office', 'store_vendor', 'store_stockcategory'}
+
+# Scans a query is known to need, by query name.
+EXPECTED_SCANS = {
+    # Each item is compared with its own reorder level, so every item is read;
+    # the result is cached by store.dashboard.
+    'dashboard low stock': {'store_stockitem', 'store_stockbalance'},
+}
+
+_FULL_SCAN = (
+    # SQLite: "SCAN store_issue" (but not "SCAN store_issue USING INDEX ...").
+    re.compile(r'\bSCAN (?:TABLE )?"?(\w+)"?(?! USING)(?:\s|$)'),
+    # PostgreSQL: "Seq Scan on store_issue".
+    re.compile(r'Seq Scan on "?(\w+)"?'),
+)
+
+
+def report_queries():
+    """(name, queryset) for every query the audit covers."""
+    end = date.today()
+    start = end - timedelta(days=30)
+    office_id = Office.objects.values_list('id', flat=True).first() or 1
+    item_id = StockItem.objects.values_list('id', flat=True).first() or 1
+    voucher_number = Voucher.objects.values_list('number', flat=True).first() or 'V1'
+    filters = {'start': start, 'end': end}
+
+    return [
+        ('report receipts', reports.receipts(**filters)),
+        ('report issues', reports.issues(**filters)),
+        ('report issues by office', reports.issues(office=office_id, **filters)),
+        ('report search', reports.issue_summary(**filters)),
+        ('dashboard low stock', reports.low_stock_items()),
+        ('dashboard reorder suggestions', reports.reorder_suggestions()),
+        ('report search received', reports.receipt_summary(**filters)),
+        ('office detail', reports.office_batches(office_id)),
+        ('issue detail', (
+            Issue.objects.filter(office_id=office_id, date_issued=end)
+            .values('stock_item__name', 'remarks')
+            .annotate(total_quantity=Sum('quantity_issued'))
+        )),
+        ('issue print', Issue.objects.filter(office_id=office_id, date_issued=end).order_by('id')),
+        ('voucher lookup', Voucher.objects.filter(number=voucher_number)),
+        ('voucher lines', vouchers.group_receipts(
+            Receipt.objects.filter(voucher__number=voucher_number), 'unit_price',
+            item_name=F('stock_item__name'), totals=True,
+        )),
+        ('receipts by voucher number', Receipt.objects.filter(voucher_number=voucher_number)),
+        ('item receipt history', Receipt.objects.filter(stock_item_id=item_id, date_received__gte=start)),
+        ('archived receipts', archive.receipts(start, end).order_by('date_received', 'id')),
+        ('archived issues by office', (
+            archive.issues(start, end).filter(office_id=office_id).order_by('date_issued', 'id')
+        )),
+    ]
+
+
+def full_scans(plan, allowed=()):
+    """Tables the plan reads in full, minus ``ALLOWED_SCANS`` and ``allowed``."""
+    tables = []
+    for line in plan.splitlines():
+        for pattern in _FULL_SCAN:
+            for table in pattern.findall(line):
+                if table not in ALLOWED_SCANS and table not in allowed and table not in tables:
+                    tables.append(table)
+    return tables
+
+
+def audit(queries=None):
+    """[(name, plan, scanned tables)] for each registered query."""
+    results = []
+    for name, queryset in queries or report_queries():
+        plan = queryset.explain()
+        results.append((name, plan, full_scans(plan, EXPECTED_SCANS.get(name, ()))))
+    return results
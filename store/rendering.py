@@ -0,0 +1,223 @@
+"""
+Background PDF rendering with an on-disk cache.
+
+Templates are rendered to HTML in the request (that needs the database), and
+the expensive HTML-to-PDF step in ``store.pdf`` runs on a local process pool.
+Finished PDFs are stored under ``STORE_PDF_CACHE_DIR`` keyed by a hash of the
+rows they were built from, so an unchanged voucher or issue batch is served
+straight from disk. The key doesn't depend on the HTML, so a PDF that is
+cached or already rendering costs no template render.
+
+``evict`` keeps the cache within ``STORE_PDF_CACHE_MAX_AGE`` and
+``STORE_PDF_CACHE_MAX_MB``; ``submit`` runs it every few minutes. A
+``.pending`` marker older than ``STORE_PDF_PENDING_TIMEOUT`` with no job in
+this process (a worker that died mid-render) reads as failed, so the next
+request renders it again.
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.http import FileResponse, Http404
+from django.shortcuts import redirect
+from django.template.loader import get_template
+from django.urls import reverse
+
+from . import instrumentation
+
+KEY_RE = re.compile(r'^[0-9a-f]{64}$')
+
+_executor = None
+_jobs = {}
+_lock = threading.Lock()
+_evicted_at = 0.0
+
+
+def cache_dir():
+    path = Path(settings.STORE_PDF_CACHE_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def paths(key):
+    if not KEY_RE.match(key):
+        raise Http404("Unknown render job.")
+    base = cache_dir() / key
+    return base.with_suffix('.pdf'), base.with_suffix('.pending'), base.with_suffix('.err')
+
+
+def content_key(kind, template_name, rows):
+    """Hash of the document kind, its template and the rows it shows."""
+    template = get_template(template_name)
+    origin = getattr(template, 'origin', None)
+    mtime = os.path.getmtime(origin.name) if origin and os.path.exists(origin.name) else 0
+    digest = hashlib.sha256()
+    digest.update(f"{kind}\0{template_name}\0{mtime}\0".encode())
+    for row in rows:
+        digest.update(repr(tuple(row)).encode())
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def evict():
+    """
+    Delete cached PDFs and error files older than ``STORE_PDF_CACHE_MAX_AGE``
+    seconds, then the least recently served ones until the cache fits in
+    ``STORE_PDF_CACHE_MAX_MB``. Returns the number of files removed.
+    """
+    max_age = getattr(settings, 'STORE_PDF_CACHE_MAX_AGE', 7 * 24 * 3600)
+    max_bytes = getattr(settings, 'STORE_PDF_CACHE_MAX_MB', 500) * 1024 * 1024
+    now = time.time()
+    files = []
+    for path in cache_dir().iterdir():
+        if path.suffix not in ('.pdf', '.err'):
+            continue
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+    files.sort()
+    total = sum(size for _, size, _ in files)
+    removed = 0
+    for mtime, size, path in files:
+        if now - mtime <= max_age and total <= max_bytes:
+            break
+        path.unlink(missing_ok=True)
+        total -= size
+        removed += 1
+    return removed
+
+
+def _evict_now_and_then():
+    global _evicted_at
+    with _lock:
+        if time.monotonic() - _evicted_at < getattr(settings, 'STORE_PDF_EVICT_INTERVAL', 300):
+            return
+        _evicted_at = time.monotonic()
+    evict()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.STORE_PDF_WORKERS, mp_context=get_context('spawn')
+        )
+    return _executor
+
+
+def submit(key, html):
+    """Queue ``html`` for rendering under ``key`` unless it's cached or queued."""
+    pdf_path, pending_path, err_path = paths(key)
+    _evict_now_and_then()
+    # Imported here so that only processes that render pay for xhtml2pdf.
+    from . import pdf
+
+    # The lock only covers the bookkeeping; the render itself runs outside it.
+    with _lock:
+        job = _jobs.get(key)
+        if job is not None and not job.done():
+            return job
+        if pdf_path.exists():
+            return None
+        err_path.unlink(missing_ok=True)
+        pending_path.touch()
+        if settings.STORE_PDF_WORKERS:
+            job = _jobs[key] = _get_executor().submit(pdf.render, html, str(pdf_path))
+            job.add_done_callback(lambda _: _jobs.pop(key, None))
+            return job
+        # Rendered inline below; until then other callers see it as pending.
+        job = _jobs[key] = Future()
+
+    try:
+        elapsed = pdf.render(html, str(pdf_path))
+    except Exception as exc:
+        job.set_exception(exc)  # also recorded in the .err file
+    else:
+        instrumentation.record_pdf(elapsed)
+        job.set_result(elapsed)
+    finally:
+        with _lock:
+            _jobs.pop(key, None)
+    return None
+
+
+def status(key):
+    """One of ``ready``, ``pending``, ``failed`` or ``unknown``."""
+    pdf_path, pending_path, err_path = paths(key)
+    if pdf_path.exists():
+        return 'ready'
+    if err_path.exists():
+        return 'failed'
+    if key in _jobs:
+        return 'pending'
+    try:
+        age = time.time() - pending_path.stat().st_mtime
+    except FileNotFoundError:
+        return 'ready' if pdf_path.exists() else 'unknown'
+    if age > getattr(settings, 'STORE_PDF_PENDING_TIMEOUT', 600):
+        # Nobody here is rendering it and nobody has for a while.
+        err_path.write_text("Rendering didn't finish; the worker may have stopped.")
+        pending_path.unlink(missing_ok=True)
+        return 'failed'
+    return 'pending'
+
+
+def queue(key, template_name, get_context):
+    """
+    Make sure ``key`` is cached or rendering. The template is only rendered
+    when it's neither. Returns the job to wait on if it runs in this process.
+    """
+    state = status(key)
+    if state == 'ready':
+        return None
+    if state == 'pending':
+        return _jobs.get(key)
+    return submit(key, get_template(template_name).render(get_context()))
+
+
+def file_response(key, filename=None, as_attachment=False):
+    pdf_path = paths(key)[0]
+    try:
+        os.utime(pdf_path)   # recently served; see evict()
+    except OSError:
+        pass
+    return FileResponse(
+        open(pdf_path, 'rb'), content_type='application/pdf',
+        as_attachment=as_attachment, filename=filename or f'{key}.pdf',
+    )
+
+
+def pdf_response(kind, template_name, rows, get_context, filename=None, as_attachment=False, wait=None):
+    """
+    Serve the PDF for ``rows``: from the cache if it's there, otherwise after
+    rendering it in the pool. If it takes longer than ``wait`` seconds the
+    client is redirected to the status page, which serves it once it's done.
+    """
+    key = content_key(kind, template_name, rows)
+    job = queue(key, template_name, get_context)
+    if job is not None and wait:
+        try:
+            # Counted against the request that waited for it.
+            instrumentation.record_pdf(job.result(timeout=wait))
+        except Exception:
+            pass  # status() below tells ready from pending/failed
+    if status(key) == 'ready':
+        return file_response(key, filename=filename, as_attachment=as_attachment)
+    return status_redirect(key, filename=filename, as_attachment=as_attachment)
+
+
+def status_redirect(key, filename=None, as_attachment=False):
+    """Send the client to the status page of a render that isn't finished yet."""
+    query = {'filename': filename or ''}
+    if as_attachment:
+        query['download'] = 1
+    return redirect(f"{reverse('render_status', args=[key])}?{urlencode(query)}")
@@ -0,0 +1,241 @@
+"""
+Report query builder.
+
+Builds the filtered receipt/issue/item querysets the report pages, the PDF
+exports and the dashboard share. Every queryset joins the relations its
+templates touch (``select_related``) and loads only the columns they show
+(``only``), so rendering a row never triggers another query.
+
+Receipts and issues moved to the archive (store.archive) are listed by
+``archived_receipts`` / ``archived_issues`` when a report's range reaches
+back to the cutoff. A report without dates reads only the live rows.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Count, ExpressionWrapper, F, FloatField, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils.dateparse import parse_date
+
+from . import archive, periods, search, valuation
+from .models import (
+    ArchivedIssue, ArchivedReceipt, ConsumptionForecast, DailyIssueRollup, DailyReceiptRollup, Issue, Receipt,
+    StockItem,
+)
+
+LOW_STOCK_THRESHOLD = 40
+
+ITEM_FIELDS = ('stock_item__name', 'stock_item__unit', 'stock_item__purchase_price', 'stock_item__vendor__name')
+
+
+def report_filters(params):
+    """Read the report filters from a QueryDict (``request.GET``)."""
+    include_receipts = 'include_receipts' in params or 'include_purchases' in params
+    include_issues = 'include_issues' in params
+    return {
+        'start': parse_date(params.get('start_date') or ''),
+        'end': parse_date(params.get('end_date') or ''),
+        'as_of': parse_date(params.get('as_of') or ''),
+        'office': params.get('office') or None,
+        'query': (params.get('query') or params.get('q') or '').strip(),
+        'include_receipts': include_receipts,
+        'include_issues': include_issues,
+        'show_vendor': 'show_vendor' in params,
+        'show_office': 'show_office' in params,
+    }
+
+
+def _item_query(qs, query, field='stock_item_id'):
+    """Rows whose item matches ``query`` by name, unit, category or vendor (see store.search)."""
+    return search.filter_queryset(qs, 'item', query, field=field)
+
+
+def receipts(start=None, end=None, office=None, query='', **kwargs):
+    """Receipts in the date range. Receipts have no office, so an office filter matches none."""
+    qs = Receipt.objects.select_related('stock_item', 'stock_item__vendor').only(
+        'quantity_received', 'unit_price', 'total_price', 'date_received', 'voucher_number', *ITEM_FIELDS
+    )
+    if office:
+        return qs.none()
+    if start:
+        qs = qs.filter(date_received__gte=start)
+    if end:
+        qs = qs.filter(date_received__lte=end)
+    if query:
+        qs = _item_query(qs, query)
+    return qs.order_by('date_received', 'id')
+
+
+def issues(start=None, end=None, office=None, query='', **kwargs):
+    """Issues in the date range with their cost (kept current on write by store.valuation)."""
+    qs = Issue.objects.select_related('stock_item', 'stock_item__vendor', 'office', 'cost').only(
+        'quantity_issued', 'remarks', 'date_issued', 'office__name', 'cost__fifo_cost', 'cost__average_cost',
+        *ITEM_FIELDS
+    )
+    if start:
+        qs = qs.filter(date_issued__gte=start)
+    if end:
+        qs = qs.filter(date_issued__lte=end)
+    if office:
+        qs = qs.filter(office_id=office)
+    if query:
+        qs = _item_query(qs, query)
+    return qs.order_by('date_issued', 'id')
+
+
+def _reaches_archive(start, end):
+    if start:
+        return archive.overlaps(start)
+    return bool(end) and archive.overlaps(end)
+
+
+def _archived_query(qs, query):
+    # Item ids rather than a subquery: the archive may be another database.
+    if query:
+        qs = qs.filter(stock_item_id__in=list(stock_items(query).values_list('pk', flat=True)))
+    return qs
+
+
+def archived_receipts(start=None, end=None, office=None, query='', **kwargs):
+    """Archived receipts in the date range, if it reaches back to the archive cutoff."""
+    if office or not _reaches_archive(start, end):
+        return ArchivedReceipt.objects.none()
+    qs = _archived_query(archive.receipts(start, end), query)
+    return qs.prefetch_related('stock_item', 'stock_item__vendor').order_by('date_received', 'id')
+
+
+def archived_issues(start=None, end=None, office=None, query='', **kwargs):
+    """Archived issues, with the cost they had when archived, as ``archived_receipts``."""
+    if not _reaches_archive(start, end):
+        return ArchivedIssue.objects.none()
+    qs = _archived_query(archive.issues(start, end), query)
+    if office:
+        qs = qs.filter(office_id=office)
+    return qs.prefetch_related('stock_item', 'stock_item__vendor', 'office').order_by('date_issued', 'id')
+
+
+def _rollup_range(qs, start=None, end=None, query=''):
+    if start:
+        qs = qs.filter(day__gte=start)
+    if end:
+        qs = qs.filter(day__lte=end)
+    if query:
+        qs = _item_query(qs, query)
+    return qs
+
+
+def issue_summary(start=None, end=None, office=None, query='', **kwargs):
+    """Issued quantity per (date, office, item), newest first, from the daily rollups."""
+    qs = _rollup_range(DailyIssueRollup.objects.all(), start, end, query)
+    if office:
+        qs = qs.filter(office_id=office)
+    return (
+        qs.values('office__name', 'stock_item__name', date_issued=F('day'))
+        .annotate(total_quantity=Sum('quantity'))
+        .order_by('-date_issued', 'office__name', 'stock_item__name')
+    )
+
+
+def receipt_summary(start=None, end=None, office=None, query='', **kwargs):
+    """Received quantity and value per (date, item), newest first, from the daily rollups."""
+    if office:
+        return DailyReceiptRollup.objects.none()
+    return (
+        _rollup_range(DailyReceiptRollup.objects.all(), start, end, query)
+        .values('stock_item__name', 'vendor__name', 'quantity', 'value', date_received=F('day'))
+        .order_by('-date_received', 'stock_item__name')
+    )
+
+
+def office_batches(office_id):
+    """Per-day issue totals for an office, newest first, from the daily rollups."""
+    return (
+        DailyIssueRollup.objects.filter(office_id=office_id)
+        .values(date=F('day'))
+        .annotate(total_items=Sum('quantity'), line_items=Count('stock_item'))
+        .order_by('-date')
+    )
+
+
+def stock_items(query=''):
+    qs = StockItem.objects.select_related('vendor').only('name', 'unit', 'purchase_price', 'vendor__name')
+    if query:
+        qs = _item_query(qs, query, field='pk')
+    return qs.order_by('name')
+
+
+def stock_as_of(as_of, query='', office=None):
+    """
+    Per-item received/issued/on-hand totals at the end of ``as_of`` (and,
+    with ``office``, the quantity issued to that office), from the period
+    snapshots plus the rows since, with the on-hand value under FIFO and
+    weighted-average cost from store.valuation.
+    """
+    items = list(stock_items(query).values('id', 'name', 'unit', 'vendor__name'))
+    ids = [item['id'] for item in items]
+    totals = periods.stock_on_hand(as_of, ids)
+    values = valuation.value_as_of(as_of, ids)
+    issued_to_office = {}
+    if office:
+        issued_to_office = {
+            item_id: quantity for (_, item_id), quantity in periods.office_issued(as_of, office, ids).items()
+        }
+    rows = []
+    for item in items:
+        received, issued, available = totals.get(item['id'], (0, 0, 0))
+        if not received and not issued:
+            continue
+        value = values.get(item['id'], {})
+        rows.append(dict(
+            item, received=received, issued=issued, available=available,
+            office_issued=issued_to_office.get(item['id'], 0),
+            fifo_value=value.get('fifo_value', 0), average_value=value.get('average_value', 0),
+        ))
+    return rows
+
+
+def stock_value(rows):
+    """Total FIFO and weighted-average value of ``stock_as_of`` rows."""
+    return {
+        'fifo_value': sum((row['fifo_value'] for row in rows), Decimal('0')),
+        'average_value': sum((row['average_value'] for row in rows), Decimal('0')),
+    }
+
+
+def reorder_level(default=None):
+    """The item's reorder level, else its category's, else the site default."""
+    if default is None:
+        default = getattr(settings, 'STORE_LOW_STOCK_THRESHOLD', LOW_STOCK_THRESHOLD)
+    return Coalesce('reorder_level', 'category__reorder_level', Value(default))
+
+
+def low_stock_items(threshold=None):
+    """Items whose ledger balance is below their reorder level, emptiest first."""
+    return (
+        StockItem.objects.select_related('vendor').only('name', 'vendor__name')
+        .annotate(
+            threshold=reorder_level(threshold),
+            remaining=Coalesce('balance__quantity_available', Value(0)),
+        )
+        .filter(remaining__lt=F('threshold'))
+        .order_by('remaining', 'name')
+    )
+
+
+def reorder_suggestions():
+    """
+    Items whose ledger balance is at or below the reorder point forecast by
+    store.forecasting, fewest days of cover first. ``suggested`` tops the
+    item up to its order-up-to level.
+    """
+    remaining = Coalesce('stock_item__balance__quantity_available', Value(0))
+    return (
+        ConsumptionForecast.objects.filter(office__isnull=True, smoothed__gt=0)
+        .annotate(remaining=remaining)
+        .filter(remaining__lte=F('reorder_point'))
+        .annotate(
+            cover=ExpressionWrapper(Greatest(F('remaining'), Value(0)) / F('smoothed'), output_field=FloatField()),
+            suggested=F('order_up_to') - F('remaining'),
+        )
+        .order_by('cover', 'stock_item__name')
+    )
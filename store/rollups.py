@@ -0,0 +1,199 @@
+"""
+Daily rollup tables for the report and office pages.
+
+``DailyIssueRollup`` holds the quantity issued per (day, office, item) and
+``DailyReceiptRollup`` the quantity and value received per (day, item), with
+the item's current vendor (reassigning the vendor moves its rows). Both are kept current on write: the Receipt/Issue signals
+and bulk_create hooks apply each row's contribution as an F() delta (and
+reverse the old one on edits and deletes).
+
+``QuerySet.update()`` on receipts or issues goes through the same path (see
+``MovementQuerySet`` in store.models): the old rows are reversed and the new
+ones applied, so a row moved to another day leaves the old day too.
+
+``catch_up_rollups`` recomputes, from the raw rows (archived ones included,
+see store.archive), the days of rows whose ``updated_at`` is past the stored
+watermark. That only covers writes that stamp ``updated_at``. Raw SQL that
+doesn't, changes a row's date, or deletes rows leaves nothing for it to find:
+run ``catch_up_rollups --full`` after such writes.
+"""
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from . import archive
+from .models import DailyIssueRollup, DailyReceiptRollup, Issue, Receipt, RollupWatermark, StockItem
+from .periods import as_date
+
+DAY_BATCH = 200
+# Above this many keys, apply deltas with one read and bulk writes instead of
+# an UPDATE per key.
+BULK_KEYS = 20
+
+
+def _apply(model, key, columns=None, **deltas):
+    """
+    Add ``deltas`` to the rollup row for ``key``, creating it if needed.
+    ``columns`` are plain values stored on the row but not part of its key.
+    """
+    columns = columns or {}
+    rows = model.objects.filter(**key)
+    changes = {**{field: F(field) + delta for field, delta in deltas.items()}, **columns}
+    if not rows.update(**changes):
+        try:
+            with transaction.atomic():
+                model.objects.create(**key, **columns, **deltas)
+        except IntegrityError:
+            # Another writer created it first.
+            rows.update(**changes)
+    if deltas['quantity'] < 0:
+        rows.filter(quantity__lte=0).delete()
+
+
+def _apply_many(model, key_fields, changes):
+    """
+    ``changes`` is [(key dict, deltas dict, columns dict)]. Existing rows are
+    read (and locked) once and written back with bulk_update, missing ones
+    bulk-created; if another writer creates one of them first, fall back to
+    ``_apply``.
+    """
+    if len(changes) <= BULK_KEYS:
+        for key, deltas, columns in changes:
+            _apply(model, key, columns, **deltas)
+        return
+    fields = [*changes[0][1], *changes[0][2]]
+    rows = model.objects.select_for_update().filter(
+        day__in={key['day'] for key, _, _ in changes},
+        stock_item_id__in={key['stock_item_id'] for key, _, _ in changes},
+    )
+    existing = {tuple(getattr(row, field) for field in key_fields): row for row in rows}
+    updated, created = [], []
+    for key, deltas, columns in changes:
+        row = existing.get(tuple(key[field] for field in key_fields))
+        if row is None:
+            created.append((key, deltas, columns))
+            continue
+        for field, delta in deltas.items():
+            setattr(row, field, getattr(row, field) + delta)
+        for field, value in columns.items():
+            setattr(row, field, value)
+        updated.append(row)
+    model.objects.bulk_update(updated, fields, batch_size=500)
+    try:
+        with transaction.atomic():
+            model.objects.bulk_create(
+                [model(**key, **columns, **deltas) for key, deltas, columns in created], batch_size=500
+            )
+    except IntegrityError:
+        for key, deltas, columns in created:
+            _apply(model, key, columns, **deltas)
+    emptied = [row.pk for row in updated if row.quantity <= 0]
+    if emptied:
+        model.objects.filter(pk__in=emptied).delete()
+
+
+def record_issues(issues, sign=1):
+    totals = defaultdict(int)
+    for issue in issues:
+        totals[as_date(issue.date_issued), issue.office_id, issue.stock_item_id] += issue.quantity_issued
+    _apply_many(DailyIssueRollup, ('day', 'office_id', 'stock_item_id'), [
+        ({'day': day, 'office_id': office_id, 'stock_item_id': stock_item_id}, {'quantity': sign * quantity}, {})
+        for (day, office_id, stock_item_id), quantity in totals.items() if quantity
+    ])
+
+
+def record_receipts(receipts, sign=1):
+    vendors = dict(StockItem.objects.filter(
+        id__in={receipt.stock_item_id for receipt in receipts}
+    ).values_list('id', 'vendor_id'))
+    totals = defaultdict(lambda: [0, 0])
+    for receipt in receipts:
+        key = as_date(receipt.date_received), receipt.stock_item_id
+        totals[key][0] += receipt.quantity_received
+        totals[key][1] += receipt.quantity_received * receipt.unit_price
+    # The row is keyed on (day, item) only; the vendor is whatever the item has now.
+    _apply_many(DailyReceiptRollup, ('day', 'stock_item_id'), [
+        (
+            {'day': day, 'stock_item_id': stock_item_id},
+            {'quantity': sign * quantity, 'value': sign * value},
+            {'vendor_id': vendors[stock_item_id]},
+        )
+        for (day, stock_item_id), (quantity, value) in totals.items() if quantity
+    ])
+
+
+def set_vendor(stock_item_id, vendor_id):
+    """Point an item's receipt rollups at its new vendor."""
+    DailyReceiptRollup.objects.filter(stock_item_id=stock_item_id).exclude(vendor_id=vendor_id).update(
+        vendor_id=vendor_id
+    )
+
+
+# ---------------- Catch-up ----------------
+def rebuild_days(days=None):
+    """Recompute the rollups of ``days`` (every day if None) from the raw rows."""
+    sources = [(Issue.objects.all(), Receipt.objects.all())]
+    if days is None or (days and archive.overlaps(min(as_date(day) for day in days))):
+        sources.append((archive.issues(), archive.receipts()))
+    with transaction.atomic():
+        if days is not None:
+            DailyIssueRollup.objects.filter(day__in=days).delete()
+            DailyReceiptRollup.objects.filter(day__in=days).delete()
+        else:
+            DailyIssueRollup.objects.all().delete()
+            DailyReceiptRollup.objects.all().delete()
+
+        issued = defaultdict(int)
+        received = defaultdict(lambda: [0, 0])
+        for issues, receipts in sources:
+            if days is not None:
+                issues = issues.filter(date_issued__in=days)
+                receipts = receipts.filter(date_received__in=days)
+            for day, office_id, stock_item_id, quantity in issues.values_list(
+                'date_issued', 'office_id', 'stock_item_id'
+            ).annotate(quantity=Sum('quantity_issued')).order_by().iterator():
+                issued[day, office_id, stock_item_id] += quantity
+            for day, stock_item_id, quantity, value in receipts.values_list('date_received', 'stock_item_id').annotate(
+                quantity=Sum('quantity_received'), value=Sum('total_price')
+            ).order_by().iterator():
+                received[day, stock_item_id][0] += quantity
+                received[day, stock_item_id][1] += value
+        # The vendor from the item, not a join: archived rows may live in another database.
+        vendors = dict(StockItem.objects.values_list('id', 'vendor_id'))
+
+        DailyIssueRollup.objects.bulk_create([
+            DailyIssueRollup(day=day, office_id=office_id, stock_item_id=stock_item_id, quantity=quantity)
+            for (day, office_id, stock_item_id), quantity in issued.items()
+        ], batch_size=1000)
+        DailyReceiptRollup.objects.bulk_create([
+            DailyReceiptRollup(day=day, stock_item_id=stock_item_id, vendor_id=vendors.get(stock_item_id),
+                               quantity=quantity, value=value)
+            for (day, stock_item_id), (quantity, value) in received.items()
+        ], batch_size=1000)
+
+
+def catch_up(full=False, name='daily'):
+    """
+    Bring the rollups up to date with rows changed since the watermark (or
+    rebuild everything with ``full``). Returns the number of days recomputed.
+    """
+    started = timezone.now()
+    watermark = RollupWatermark.objects.filter(name=name).first()
+    if full or watermark is None:
+        rebuild_days()
+        count = None
+    else:
+        since = watermark.processed_until
+        days = sorted(
+            set(Issue.objects.filter(updated_at__gt=since).values_list('date_issued', flat=True).distinct())
+            | set(Receipt.objects.filter(updated_at__gt=since).values_list('date_received', flat=True).distinct())
+        )
+        for start in range(0, len(days), DAY_BATCH):
+            rebuild_days(days[start:start + DAY_BATCH])
+        count = len(days)
+    # Rows written while this ran have updated_at > started and are picked
+    # up next time.
+    RollupWatermark.objects.update_or_create(name=name, defaults={'processed_until': started})
+    return count
@@ -0,0 +1,45 @@
+"""
+Database routing for the archive (store.archive).
+
+``ArchivedReceipt`` and ``ArchivedIssue`` live in the ``STORE_ARCHIVE_DATABASE``
+alias and everything else in ``default``. By default the two aliases are the
+same. Point the archive at a separate SQLite file and its connection is only
+opened when archived rows are read or written.
+"""
+from django.conf import settings
+
+ARCHIVE_MODELS = {'archivedreceipt', 'archivedissue'}
+
+
+def archive_database():
+    return getattr(settings, 'STORE_ARCHIVE_DATABASE', 'default')
+
+
+def is_archived(model):
+    return model._meta.app_label == 'store' and model._meta.model_name in ARCHIVE_MODELS
+
+
+class ArchiveRouter:
+    def db_for_read(self, model, **hints):
+        if is_archived(model):
+            return archive_database()
+        instance = hints.get('instance')
+        if instance is not None and is_archived(type(instance)):
+            # Related rows of an archived row (its item, office, voucher).
+            return 'default'
+        return None
+
+    db_for_write = db_for_read
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if is_archived(type(obj1)) or is_archived(type(obj2)):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        archive = archive_database()
+        if app_label == 'store' and model_name in ARCHIVE_MODELS:
+            return db == archive
+        if archive != 'default' and db == archive:
+            return False
+        return None
@@ -0,0 +1,292 @@
+"""
+Search across stock items, vendors, offices and vouchers.
+
+On SQLite the documents live in ``store_search``, an FTS5 table using the
+trigram tokenizer. That keeps ``icontains`` semantics (a query matches
+anywhere in a word) but answers from the index instead of ``LIKE '%q%'``
+scans. Rows are keyed by ``rowid = object_id * 8 + kind code`` so reindexing a
+row is a primary-key delete and insert; the signals in ``store.signals`` and
+the bulk write paths call ``index``/``unindex``, and ``rebuild_search_index``
+repopulates it from scratch.
+
+On PostgreSQL the migration installs ``pg_trgm`` and trigram GIN indexes on
+the searched columns, so ``icontains`` filters use them directly and ranked
+search combines ``SearchRank`` with ``TrigramSimilarity``. Any other backend
+(or an SQLite build without FTS5) falls back to plain ``icontains``.
+
+Item documents include the unit, category and vendor name, so an item is
+found by its vendor's name too; a vendor or category rename reindexes its
+items.
+"""
+from functools import reduce
+from operator import or_
+
+from django.db import connection
+from django.db.models import CharField, F, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce, Concat, Greatest
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from .models import Office, StockItem, Vendor, Voucher
+
+TABLE = 'store_search'
+MIN_TRIGRAM = 3
+RESULT_LIMIT = 20
+TRIGRAM_THRESHOLD = 0.3
+
+# kind -> (rowid code, model, title field, body fields)
+KINDS = {
+    'item': (1, StockItem, 'name', ('unit', 'category__name', 'vendor__name')),
+    'vendor': (2, Vendor, 'name', ('contact',)),
+    'office': (3, Office, 'name', ('location',)),
+    'voucher': (4, Voucher, 'number', ('vendor__name',)),
+}
+
+MODEL_KINDS = {model: kind for kind, (_, model, _, _) in KINDS.items()}
+
+_backend = None
+
+
+def backend():
+    """'fts5', 'postgresql' or 'basic'; decided once per process."""
+    global _backend
+    if _backend is None:
+        if connection.vendor == 'postgresql':
+            _backend = 'postgresql'
+        elif connection.vendor == 'sqlite' and TABLE in connection.introspection.table_names():
+            _backend = 'fts5'
+        else:
+            _backend = 'basic'
+    return _backend
+
+
+def reset_backend():
+    global _backend
+    _backend = None
+
+
+def _rowid(kind, pk):
+    return pk * 8 + KINDS[kind][0]
+
+
+# ---------------- Indexing (SQLite) ----------------
+def documents(kind, ids=None):
+    """(pk, title, body) for every object of ``kind`` (or just ``ids``)."""
+    _, model, title, body = KINDS[kind]
+    qs = model.objects.all()
+    if ids is not None:
+        qs = qs.filter(pk__in=ids)
+    for row in qs.values_list('pk', title, *body).order_by().iterator():
+        yield row[0], row[1] or '', ' '.join(str(value) for value in row[2:] if value)
+
+
+def unindex(kind, ids):
+    ids = [pk for pk in ids if pk]
+    if backend() != 'fts5' or not ids:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {TABLE} WHERE rowid = %s', [(_rowid(kind, pk),) for pk in ids])
+
+
+def index(kind, ids):
+    """(Re)index the given objects; ids that no longer exist are dropped."""
+    ids = [pk for pk in ids if pk]
+    if backend() != 'fts5' or not ids:
+        return
+    unindex(kind, ids)
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {TABLE} (rowid, title, body, kind, object_id) VALUES (%s, %s, %s, %s, %s)',
+            [(_rowid(kind, pk), title, body, kind, pk) for pk, title, body in documents(kind, ids)],
+        )
+
+
+def index_model(model, ids):
+    """``index`` for a model class; models that aren't searched are ignored."""
+    if model in MODEL_KINDS:
+        index(MODEL_KINDS[model], ids)
+
+
+def index_related_items(vendor_ids=(), category_ids=()):
+    """Reindex items (and vouchers) whose documents embed a vendor or category name."""
+    if backend() != 'fts5':
+        return
+    items = StockItem.objects.filter(Q(vendor_id__in=vendor_ids) | Q(category_id__in=category_ids))
+    index('item', list(items.values_list('pk', flat=True)))
+    if vendor_ids:
+        index('voucher', list(Voucher.objects.filter(vendor_id__in=vendor_ids).values_list('pk', flat=True)))
+
+
+def rebuild():
+    if backend() != 'fts5':
+        return 0
+    count = 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+        for kind in KINDS:
+            rows = [(_rowid(kind, pk), title, body, kind, pk) for pk, title, body in documents(kind)]
+            cursor.executemany(
+                f'INSERT INTO {TABLE} (rowid, title, body, kind, object_id) VALUES (%s, %s, %s, %s, %s)', rows
+            )
+            count += len(rows)
+        cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+    return count
+
+
+# ---------------- Queries ----------------
+def _terms(query):
+    return [term for term in query.split() if term]
+
+
+def _like(term):
+    """``term`` with LIKE's wildcards escaped, for ``LIKE %s ESCAPE '\\'``."""
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _fts_where(query, prefix=False):
+    """
+    WHERE clause and params for ``query`` against the FTS table. Terms of at
+    least three characters go through MATCH (each one a quoted substring);
+    shorter ones cannot use trigrams and fall back to LIKE on the (small)
+    index table. With ``prefix`` the title must start with the query.
+    """
+    clauses, params = [], []
+    long_terms = [term for term in _terms(query) if len(term) >= MIN_TRIGRAM]
+    if long_terms:
+        clauses.append(f'{TABLE} MATCH %s')
+        params.append(' AND '.join('"%s"' % term.replace('"', '""') for term in long_terms))
+    for term in _terms(query):
+        if len(term) < MIN_TRIGRAM:
+            clauses.append("(title || ' ' || body) LIKE %s ESCAPE '\\'")
+            params.append(f'%{_like(term)}%')
+    if prefix:
+        clauses.append("title LIKE %s ESCAPE '\\'")
+        params.append(f'{_like(query)}%')
+    return ' AND '.join(clauses) or '1 = 1', params
+
+
+def _basic_q(kind, query):
+    _, _, title, body = KINDS[kind]
+    return reduce(lambda q, term: q & reduce(or_, [
+        Q(**{f'{field}__icontains': term}) for field in (title, *body)
+    ]), _terms(query), Q())
+
+
+def filter_queryset(queryset, kind, query, field='pk'):
+    """
+    Restrict ``queryset`` to objects of ``kind`` matching ``query``. ``field``
+    names the column holding the object's id (e.g. 'stock_item_id' for rows
+    that point at an item).
+    """
+    if not query.strip():
+        return queryset
+    if backend() == 'fts5':
+        where, params = _fts_where(query)
+        return queryset.filter(**{f'{field}__in': RawSQL(
+            f'SELECT object_id FROM {TABLE} WHERE kind = %s AND {where}', [kind, *params]
+        )})
+    if field == 'pk':
+        return queryset.filter(_basic_q(kind, query))
+    model = KINDS[kind][1]
+    return queryset.filter(**{f'{field}__in': model.objects.filter(_basic_q(kind, query)).values('pk')})
+
+
+def _url(kind, pk, title):
+    if kind == 'item':
+        return reverse('item_list') + '?' + urlencode({'q': title})
+    if kind == 'vendor':
+        return reverse('vendor_detail', args=[pk])
+    if kind == 'office':
+        return reverse('office_detail', args=[pk])
+    return reverse('voucher_detail', args=[title])
+
+
+def _result(kind, pk, title, body, score):
+    return {'kind': kind, 'id': pk, 'title': title, 'detail': body, 'score': score, 'url': _url(kind, pk, title)}
+
+
+def _detail(body):
+    parts = [Coalesce(F(field), Value('')) for field in body]
+    for position in range(len(parts) - 1, 0, -1):
+        parts.insert(position, Value(' '))
+    return Concat(*parts, output_field=CharField()) if len(parts) > 1 else parts[0]
+
+
+def _postgres_search(query, kinds, limit):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+
+    results = []
+    for kind in kinds:
+        _, model, title, body = KINDS[kind]
+        rows = (
+            model.objects.annotate(
+                similarity=TrigramSimilarity(title, query),
+                score=Greatest(
+                    TrigramSimilarity(title, query),
+                    SearchRank(SearchVector(title, *body), SearchQuery(query)),
+                ),
+                detail=_detail(body),
+            )
+            .filter(_basic_q(kind, query) | Q(similarity__gte=TRIGRAM_THRESHOLD))
+            .order_by('-score')
+            .values_list('pk', title, 'detail', 'score')[:limit]
+        )
+        results += [_result(kind, pk, name, detail, score) for pk, name, detail, score in rows]
+    return results
+
+
+def search(query, kinds=None, limit=RESULT_LIMIT):
+    """Ranked matches across ``kinds`` (default: all), best first."""
+    kinds = [kind for kind in (kinds or KINDS) if kind in KINDS]
+    query = query.strip()
+    if not query or not kinds:
+        return []
+    if backend() == 'fts5':
+        where, params = _fts_where(query)
+        placeholders = ', '.join(['%s'] * len(kinds))
+        # bm25 is lower-is-better; title hits weigh ten times body hits, and a
+        # title that starts with the query ranks first.
+        sql = (
+            f'SELECT kind, object_id, title, body, bm25({TABLE}, 10.0, 1.0) AS rank FROM {TABLE} '
+            f'WHERE kind IN ({placeholders}) AND {where} '
+            f"ORDER BY title LIKE %s ESCAPE '\\' DESC, rank LIMIT %s"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [*kinds, *params, f'{_like(query)}%', limit])
+            return [_result(kind, pk, title, body, -rank) for kind, pk, title, body, rank in cursor.fetchall()]
+    if backend() == 'postgresql':
+        results = _postgres_search(query, kinds, limit)
+    else:
+        results = []
+        for kind in kinds:
+            _, model, title, body = KINDS[kind]
+            rows = (
+                model.objects.filter(_basic_q(kind, query)).annotate(detail=_detail(body))
+                .order_by(title).values_list('pk', title, 'detail')[:limit]
+            )
+            results += [
+                _result(kind, pk, name, detail, 1.0 if name.lower().startswith(query.lower()) else 0.5)
+                for pk, name, detail in rows
+            ]
+    return sorted(results, key=lambda result: -result['score'])[:limit]
+
+
+def autocomplete(prefix, kind='item', limit=10):
+    """Objects of ``kind`` whose title starts with ``prefix``, alphabetically: [(id, title)]."""
+    prefix = prefix.strip()
+    if not prefix:
+        return []
+    if backend() == 'fts5':
+        where, params = _fts_where(prefix, prefix=True)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT object_id, title FROM {TABLE} WHERE kind = %s AND {where} ORDER BY title LIMIT %s',
+                [kind, *params, limit],
+            )
+            return cursor.fetchall()
+    title = KINDS[kind][2]
+    return list(
+        KINDS[kind][1].objects.filter(**{f'{title}__istartswith': prefix})
+        .order_by(title).values_list('pk', title)[:limit]
+    )
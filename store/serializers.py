@@ -0,0 +1,71 @@
+from rest_framework import serializers
+
+from .models import Issue, Office, Receipt, StockItem, Vendor
+
+
+class FieldSelectionMixin:
+    """Limit a read to the fields named in ``?fields=a,b,c``."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method not in ('GET', 'HEAD'):
+            return
+        fields = request.query_params.get('fields')
+        if fields:
+            wanted = {name.strip() for name in fields.split(',')}
+            for name in set(self.fields) - wanted:
+                self.fields.pop(name)
+
+
+class OfficeSerializer(FieldSelectionMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Office
+        fields = ['id', 'name', 'location']
+
+
+class VendorSerializer(FieldSelectionMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Vendor
+        fields = ['id', 'name', 'contact']
+
+
+class StockItemSerializer(FieldSelectionMixin, serializers.ModelSerializer):
+    vendor_name = serializers.CharField(source='vendor.name', read_only=True)
+    category_name = serializers.CharField(source='category.name', read_only=True, default=None)
+    quantity_available = serializers.IntegerField(source='balance.quantity_available', read_only=True, default=0)
+
+    class Meta:
+        model = StockItem
+        fields = [
+            'id', 'name', 'unit', 'vendor', 'vendor_name', 'category', 'category_name',
+            'purchase_price', 'reorder_level', 'quantity_available',
+        ]
+
+
+class ReceiptSerializer(FieldSelectionMixin, serializers.ModelSerializer):
+    item_name = serializers.CharField(source='stock_item.name', read_only=True)
+
+    class Meta:
+        model = Receipt
+        fields = [
+            'id', 'stock_item', 'item_name', 'quantity_received', 'unit_price', 'total_price',
+            'date_received', 'voucher_number',
+        ]
+        read_only_fields = ['total_price']
+
+
+class IssueSerializer(FieldSelectionMixin, serializers.ModelSerializer):
+    item_name = serializers.CharField(source='stock_item.name', read_only=True)
+    office_name = serializers.CharField(source='office.name', read_only=True, default=None)
+
+    class Meta:
+        model = Issue
+        fields = [
+            'id', 'stock_item', 'item_name', 'office', 'office_name', 'quantity_issued', 'remarks', 'date_issued',
+        ]
+
+    def validate_quantity_issued(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Must be more than zero.")
+        return value
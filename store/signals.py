@@ -0,0 +1,198 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import archive, conditional, dashboard, ledger, periods, rollups, search, valuation, vouchers
+from .models import (
+    Issue, ItemValuation, Office, Receipt, StockBalance, StockCategory, StockItem, Vendor, Voucher,
+)
+
+
+# ---------------- Stock ledger ----------------
+@receiver(post_save, sender=StockItem)
+def open_stock_balance(sender, instance, created, **kwargs):
+    if created:
+        StockBalance.objects.get_or_create(stock_item=instance)
+        ItemValuation.objects.get_or_create(stock_item=instance)
+
+
+@receiver(pre_save, sender=Receipt)
+@receiver(pre_save, sender=Issue)
+def remember_previous_movement(sender, instance, **kwargs):
+    # Edits must reverse what the row contributed before the change.
+    previous = None
+    if instance.pk:
+        previous = sender.objects.filter(pk=instance.pk).first()
+    instance._ledger_previous = ledger.movement(previous) if previous else None
+    instance._previous_row = previous
+    if sender is Receipt:
+        instance._previous_voucher_id = previous.voucher_id if previous else None
+        instance._previous_date = previous.date_received if previous else None
+    else:
+        instance._previous_office_id = previous.office_id if previous else None
+        instance._previous_date = previous.date_issued if previous else None
+
+
+@receiver(post_save, sender=Receipt)
+@receiver(post_save, sender=Issue)
+def record_movement(sender, instance, **kwargs):
+    previous = getattr(instance, '_ledger_previous', None)
+    if previous:
+        stock_item_id, received, issued = previous
+        ledger.apply(stock_item_id, -received, -issued)
+    ledger.apply(*ledger.movement(instance))
+
+
+@receiver(post_delete, sender=Receipt)
+@receiver(post_delete, sender=Issue)
+def reverse_movement(sender, instance, **kwargs):
+    # When the item itself is being deleted its balance row may already be
+    # gone; don't recreate it.
+    stock_item_id, received, issued = ledger.movement(instance)
+    ledger.apply(stock_item_id, -received, -issued, create_missing=False)
+
+
+# ---------------- Voucher totals ----------------
+@receiver(post_save, sender=Receipt)
+def refresh_voucher_totals(sender, instance, **kwargs):
+    vouchers.refresh_totals({instance.voucher_id, getattr(instance, '_previous_voucher_id', None)})
+
+
+@receiver(post_delete, sender=Receipt)
+def refresh_voucher_totals_on_delete(sender, instance, **kwargs):
+    vouchers.refresh_totals({instance.voucher_id})
+
+
+# ---------------- Last-modified tracking ----------------
+@receiver(post_save, sender=Issue)
+def touch_issue_office(sender, instance, **kwargs):
+    conditional.touch_offices({instance.office_id, getattr(instance, '_previous_office_id', None)})
+
+
+@receiver(post_delete, sender=Issue)
+def touch_issue_office_on_delete(sender, instance, **kwargs):
+    conditional.touch_offices({instance.office_id})
+
+
+@receiver(post_save, sender=Voucher)
+@receiver(post_delete, sender=Voucher)
+def touch_voucher_vendor(sender, instance, **kwargs):
+    conditional.touch_vendors({instance.vendor_id})
+
+
+# ---------------- Period-close snapshots ----------------
+@receiver(post_save, sender=Receipt)
+@receiver(post_save, sender=Issue)
+def invalidate_closed_periods(sender, instance, **kwargs):
+    periods.invalidate_from(_movement_date(instance), getattr(instance, '_previous_date', None))
+
+
+@receiver(post_delete, sender=Receipt)
+@receiver(post_delete, sender=Issue)
+def invalidate_closed_periods_on_delete(sender, instance, **kwargs):
+    periods.invalidate_from(_movement_date(instance))
+
+
+def _movement_date(instance):
+    return instance.date_received if isinstance(instance, Receipt) else instance.date_issued
+
+
+# ---------------- Daily rollups ----------------
+def _record_rollup(instance, sign):
+    if isinstance(instance, Receipt):
+        rollups.record_receipts([instance], sign)
+    else:
+        rollups.record_issues([instance], sign)
+
+
+@receiver(post_save, sender=Receipt)
+@receiver(post_save, sender=Issue)
+def update_rollups(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_row', None)
+    if previous is not None:
+        _record_rollup(previous, -1)
+    _record_rollup(instance, 1)
+
+
+@receiver(post_delete, sender=Receipt)
+@receiver(post_delete, sender=Issue)
+def update_rollups_on_delete(sender, instance, **kwargs):
+    _record_rollup(instance, -1)
+
+
+@receiver(post_save, sender=StockItem)
+def move_receipt_rollups_to_vendor(sender, instance, created, **kwargs):
+    if not created:
+        rollups.set_vendor(instance.pk, instance.vendor_id)
+
+
+# ---------------- Inventory valuation ----------------
+VALUED_FIELDS = {
+    Receipt: ('stock_item_id', 'quantity_received', 'unit_price', 'date_received'),
+    Issue: ('stock_item_id', 'quantity_issued', 'date_issued'),
+}
+
+
+@receiver(post_save, sender=Receipt)
+@receiver(post_save, sender=Issue)
+def update_valuation(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_row', None)
+    if previous is None:
+        valuation.record([instance])
+    elif any(str(getattr(previous, field)) != str(getattr(instance, field)) for field in VALUED_FIELDS[sender]):
+        valuation.invalidate({instance.stock_item_id, previous.stock_item_id})
+
+
+@receiver(post_delete, sender=Receipt)
+@receiver(post_delete, sender=Issue)
+def update_valuation_on_delete(sender, instance, **kwargs):
+    valuation.invalidate({instance.stock_item_id})
+
+
+# ---------------- Archive ----------------
+@receiver(post_delete, sender=StockItem)
+@receiver(post_delete, sender=Office)
+@receiver(post_delete, sender=Voucher)
+def detach_archived_rows(sender, instance, **kwargs):
+    # Archived rows have no database constraints (they may live in another
+    # database), so deletes are followed here.
+    archive.detach(sender, instance.pk)
+
+
+# ---------------- Dashboard cache ----------------
+@receiver(post_save, sender=Vendor)
+@receiver(post_save, sender=StockCategory)
+@receiver(post_save, sender=StockItem)
+@receiver(post_save, sender=Issue)
+@receiver(post_save, sender=Receipt)
+@receiver(post_delete, sender=Vendor)
+@receiver(post_delete, sender=StockCategory)
+@receiver(post_delete, sender=StockItem)
+@receiver(post_delete, sender=Issue)
+@receiver(post_delete, sender=Receipt)
+def invalidate_dashboard(sender, using=None, **kwargs):
+    dashboard.invalidate(using)
+
+
+# ---------------- Search index ----------------
+@receiver(post_save, sender=StockItem)
+@receiver(post_save, sender=Vendor)
+@receiver(post_save, sender=Office)
+@receiver(post_save, sender=Voucher)
+def index_search_document(sender, instance, created=False, **kwargs):
+    search.index_model(sender, [instance.pk])
+    if sender is Vendor and not created:
+        search.index_related_items(vendor_ids=[instance.pk])
+
+
+@receiver(post_save, sender=StockCategory)
+def index_category_items(sender, instance, created, **kwargs):
+    if not created:
+        search.index_related_items(category_ids=[instance.pk])
+
+
+@receiver(post_delete, sender=StockItem)
+@receiver(post_delete, sender=Vendor)
+@receiver(post_delete, sender=Office)
+@receiver(post_delete, sender=Voucher)
+def unindex_search_document(sender, instance, **kwargs):
+    search.unindex(search.MODEL_KINDS[sender], [instance.pk])
@@ -0,0 +1,107 @@
+// Stock item picker for store.widgets.ItemAutocomplete. Listeners are
+// delegated from the document so formset rows added later (cloned or built
+// from empty_form) work without re-binding.
+(function () {
+    const DELAY = 200;
+    const timers = new WeakMap();
+
+    function parts(element) {
+        const root = element.closest('.item-autocomplete');
+        return {
+            root: root,
+            input: root.querySelector('.item-autocomplete-input'),
+            select: root.querySelector('select'),
+            results: root.querySelector('.item-autocomplete-results'),
+        };
+    }
+
+    function label(item) {
+        const unit = item.unit ? ` ${item.unit}` : '';
+        return `${item.name} (${item.available}${unit} available)`;
+    }
+
+    function show(widget, data, append) {
+        if (!append) {
+            widget.results.innerHTML = '';
+        }
+        const more = widget.results.querySelector('.item-autocomplete-more');
+        if (more) {
+            more.remove();
+        }
+        data.results.forEach(item => {
+            const button = document.createElement('button');
+            button.type = 'button';
+            button.className = 'list-group-item list-group-item-action item-autocomplete-option';
+            button.textContent = label(item);
+            button.dataset.id = item.id;
+            button.dataset.name = item.name;
+            button.dataset.available = item.available;
+            widget.results.appendChild(button);
+        });
+        if (!append && !data.results.length) {
+            widget.results.innerHTML = '<div class="list-group-item text-muted">No matching items</div>';
+        }
+        if (data.next) {
+            const button = document.createElement('button');
+            button.type = 'button';
+            button.className = 'list-group-item list-group-item-action text-primary item-autocomplete-more';
+            button.textContent = 'More…';
+            button.dataset.next = data.next;
+            widget.results.appendChild(button);
+        }
+    }
+
+    function load(widget, url, append) {
+        fetch(url, {headers: {'Accept': 'application/json'}, credentials: 'same-origin'})
+            .then(response => response.json())
+            .then(data => show(widget, data, append));
+    }
+
+    function choose(widget, option) {
+        widget.select.innerHTML = '<option value="">---------</option>';
+        const selected = new Option(option.dataset.name, option.dataset.id, true, true);
+        selected.dataset.available = option.dataset.available;
+        widget.select.appendChild(selected);
+        widget.input.value = option.dataset.name;
+        widget.results.innerHTML = '';
+        widget.select.dispatchEvent(new Event('change', {bubbles: true}));
+    }
+
+    document.addEventListener('input', function (event) {
+        if (!event.target.classList.contains('item-autocomplete-input')) {
+            return;
+        }
+        const widget = parts(event.target);
+        clearTimeout(timers.get(widget.input));
+        if (widget.select.value) {
+            widget.select.value = '';
+            widget.select.dispatchEvent(new Event('change', {bubbles: true}));
+        }
+        const query = widget.input.value.trim();
+        if (!query) {
+            widget.results.innerHTML = '';
+            return;
+        }
+        timers.set(widget.input, setTimeout(() => {
+            load(widget, `${widget.root.dataset.url}?q=${encodeURIComponent(query)}`, false);
+        }, DELAY));
+    });
+
+    document.addEventListener('click', function (event) {
+        const option = event.target.closest('.item-autocomplete-option');
+        if (option) {
+            choose(parts(option), option);
+            return;
+        }
+        const more = event.target.closest('.item-autocomplete-more');
+        if (more) {
+            load(parts(more), more.dataset.next, true);
+            return;
+        }
+        document.querySelectorAll('.item-autocomplete-results').forEach(results => {
+            if (!results.closest('.item-autocomplete').contains(event.target)) {
+                results.innerHTML = '';
+            }
+        });
+    });
+})();
@@ -0,0 +1,45 @@
+"""Small builders for the store tests; every write goes through the models, as the views' do."""
+from datetime import date
+from decimal import Decimal
+from itertools import count
+
+from django.contrib.auth.models import User
+
+from store.models import Issue, Office, Receipt, StockItem, Vendor
+
+DAY = date(2026, 1, 5)
+
+_names = count(1)
+
+
+def user(username='clerk', **kwargs):
+    return User.objects.create_user(username=username, password='secret', **kwargs)
+
+
+def vendor(name=None, **kwargs):
+    return Vendor.objects.create(name=name or f'Vendor {next(_names)}', **kwargs)
+
+
+def office(name=None, location='Head office'):
+    return Office.objects.create(name=name or f'Office {next(_names)}', location=location)
+
+
+def item(name=None, vendor=None, purchase_price='10.00', **kwargs):
+    return StockItem.objects.create(
+        name=name or f'Item {next(_names)}', vendor=vendor or globals()['vendor'](),
+        purchase_price=Decimal(purchase_price), **kwargs
+    )
+
+
+def receive(stock_item, quantity, unit_price=None, day=DAY, voucher=''):
+    return Receipt.objects.create(
+        stock_item=stock_item, quantity_received=quantity,
+        unit_price=Decimal(unit_price) if unit_price is not None else stock_item.purchase_price,
+        date_received=day, voucher_number=voucher,
+    )
+
+
+def issue(stock_item, quantity, office=None, day=DAY, remarks=''):
+    return Issue.objects.create(
+        stock_item=stock_item, office=office, quantity_issued=quantity, date_issued=day, remarks=remarks
+    )
@@ -0,0 +1,97 @@
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+
+from store import api
+from store.models import Issue, StockBalance, Voucher
+
+from . import factories
+
+
+class ApiTests(TestCase):
+    def setUp(self):
+        self.client.force_login(factories.user())
+        self.item = factories.item('Pens')
+        factories.receive(self.item, 10)
+
+    def post(self, name, data):
+        return self.client.post(reverse(name), data, content_type='application/json')
+
+    def available(self):
+        return StockBalance.objects.get(stock_item=self.item).quantity_available
+
+    def test_requires_login(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('api-item-list')).status_code, 403)
+
+    def test_items_with_fields_and_search(self):
+        factories.item('Paper')
+        response = self.client.get(reverse('api-item-list'), {'q': 'pen', 'fields': 'name,quantity_available'})
+        self.assertEqual(response.json()['results'], [{'name': 'Pens', 'quantity_available': 10}])
+
+    def test_malformed_filters_are_bad_requests(self):
+        for name, params in [
+            ('api-item-list', {'vendor': 'abc'}),
+            ('api-receipt-list', {'stock_item': '1.5'}),
+            ('api-issue-list', {'office': 'x'}),
+            ('api-issue-list', {'date_from': '2026-02-30'}),
+            ('api-receipt-list', {'date_to': 'yesterday'}),
+        ]:
+            with self.subTest(name=name, params=params):
+                response = self.client.get(reverse(name), params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(next(iter(params)), response.json())
+        response = self.client.get(reverse('api-item-list'), {'vendor': self.item.vendor_id})
+        self.assertEqual([row['name'] for row in response.json()['results']], ['Pens'])
+
+    def test_cursor_pages(self):
+        for _ in range(4):
+            factories.office()
+        names, url = [], reverse('api-office-list') + '?page_size=3'
+        while url:
+            data = self.client.get(url).json()
+            names += [row['name'] for row in data['results']]
+            url = data['next']
+        self.assertEqual(len(names), 4)
+        self.assertEqual(names, sorted(names, key=lambda name: -int(name.split()[-1])))
+
+    def test_etag(self):
+        url = reverse('api-item-detail', args=[self.item.id])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        factories.issue(self.item, 1)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_create_issue(self):
+        response = self.post('api-issue-list', {'stock_item': self.item.id, 'quantity_issued': 4, 'date_issued': '2026-01-06'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['item_name'], 'Pens')
+        self.assertEqual(self.available(), 6)
+
+    def test_bulk_issue_is_all_or_nothing(self):
+        response = self.post('api-issue-bulk', [
+            {'stock_item': self.item.id, 'quantity_issued': 6, 'date_issued': '2026-01-06'},
+            {'stock_item': self.item.id, 'quantity_issued': 6, 'date_issued': '2026-01-06'},
+        ])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['shortages'], {str(self.item.id): {'requested': 12, 'available': 10}})
+        self.assertFalse(Issue.objects.exists())
+        self.assertEqual(self.available(), 10)
+
+    def test_bulk_receipts(self):
+        response = self.post('api-receipt-bulk', [
+            {'stock_item': self.item.id, 'quantity_received': 5, 'unit_price': '2.00',
+             'date_received': '2026-01-06', 'voucher_number': 'V-7'},
+            {'stock_item': self.item.id, 'quantity_received': 1, 'unit_price': '3.00',
+             'date_received': '2026-01-06', 'voucher_number': 'V-7'},
+        ])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([row['total_price'] for row in response.json()], ['10.00', '3.00'])
+        self.assertEqual(self.available(), 16)
+        self.assertEqual(Voucher.objects.get(number='V-7').total_price, Decimal('13.00'))
+
+    def test_bulk_limits(self):
+        self.assertEqual(self.post('api-receipt-bulk', {'stock_item': self.item.id}).status_code, 400)
+        response = self.post('api-receipt-bulk', [{}] * (api.BULK_LIMIT + 1))
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,90 @@
+import csv
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from store import archive, ledger, periods, rollups, valuation
+from store.models import (
+    ArchivedIssue, ArchivedReceipt, Issue, IssueCost, ItemValuation, OpeningBalance, Receipt, StockBalance,
+)
+
+from . import factories
+from .test_rollups import snapshot
+
+CUTOFF = date(2026, 1, 31)
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.item = factories.item('Pens')
+        self.office = factories.office()
+        factories.receive(self.item, 10, unit_price='2.00', day=date(2026, 1, 2))
+        factories.receive(self.item, 10, unit_price='4.00', day=date(2026, 1, 10))
+        self.old_issue = factories.issue(self.item, 12, office=self.office, day=date(2026, 1, 20))
+        factories.receive(self.item, 5, unit_price='6.00', day=date(2026, 2, 3))
+        self.issue = factories.issue(self.item, 10, office=self.office, day=date(2026, 2, 10))
+
+    def state(self):
+        balance = StockBalance.objects.get(stock_item=self.item)
+        stored = ItemValuation.objects.get(stock_item=self.item)
+        return (
+            (balance.quantity_received, balance.quantity_issued, balance.quantity_available),
+            IssueCost.objects.get(issue=self.issue).fifo_cost,
+            periods.stock_on_hand(date(2026, 2, 28)),
+            periods.stock_on_hand(date(2026, 1, 15)),
+            valuation.value_as_of(date(2026, 2, 28)),
+            (stored.quantity, stored.fifo_value),
+            snapshot(),
+        )
+
+    def test_moves_rows_and_keeps_balances_and_costs(self):
+        before = self.state()
+        self.assertEqual(archive.archive(CUTOFF), (2, 1))
+        self.assertEqual(Receipt.objects.count(), 1)
+        self.assertEqual(list(Issue.objects.all()), [self.issue])
+        self.assertEqual(ArchivedReceipt.objects.count(), 2)
+        self.assertEqual(ArchivedIssue.objects.get().fifo_cost, Decimal('28.00'))   # 10 x 2 + 2 x 4
+        opening = OpeningBalance.objects.get(stock_item=self.item)
+        self.assertEqual((opening.as_of, opening.quantity_received, opening.quantity_issued), (CUTOFF, 20, 12))
+        self.assertEqual(self.state(), before)
+        self.assertEqual(ledger.verify(), [])
+        self.assertEqual(valuation.verify(), [])
+        rollups.rebuild_days()
+        self.assertEqual(snapshot(), before[-1])
+
+    def test_later_writes_start_from_the_opening(self):
+        archive.archive(CUTOFF)
+        with self.captureOnCommitCallbacks(execute=True):
+            factories.issue(self.item, 2, day=date(2026, 2, 11))
+        self.assertEqual(StockBalance.objects.get(stock_item=self.item).quantity_available, 1)
+        self.assertEqual(ledger.verify(), [])
+        self.assertEqual(valuation.verify(), [])
+
+    def test_reports_include_archived_rows(self):
+        archive.archive(CUTOFF)
+        self.client.force_login(factories.user())
+        response = self.client.get(reverse('report_export', args=['csv']), {'start_date': '2026-01-15'})
+        rows = list(csv.reader(StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([(row[0], row[1]) for row in rows[1:]], [
+            ('Receipt', '2026-02-03'), ('Issue', '2026-01-20'), ('Issue', '2026-02-10'),
+        ])
+
+    def test_cutoff_only_moves_forward(self):
+        archive.archive(CUTOFF)
+        self.assertEqual(archive.cutoff(), CUTOFF)
+        with self.assertRaises(ValueError):
+            archive.archive(date(2026, 1, 15))
+        with self.assertRaises(CommandError):
+            call_command('archive_history', '--before', '2026-01-15', stdout=StringIO())
+
+    def test_command(self):
+        out = StringIO()
+        call_command('archive_history', '--before', '2026-02-01', '--dry-run', stdout=out)
+        self.assertIn('Would archive 2 receipt(s) and 1 issue(s) dated through 2026-01-31.', out.getvalue())
+        self.assertFalse(ArchivedReceipt.objects.exists())
+        call_command('archive_history', '--before', '2026-02-01', stdout=StringIO())
+        self.assertEqual(archive.cutoff(), CUTOFF)
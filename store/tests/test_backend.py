@@ -0,0 +1,27 @@
+from unittest import skipUnless
+
+from django.db import connection, transaction
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from store.models import Office
+
+
+@skipUnless(connection.vendor == 'sqlite', "Tests the store's SQLite backend.")
+class SqliteBackendTests(TransactionTestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas(self):
+        pragmas = connection.settings_dict['OPTIONS']['pragmas']
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+        self.assertEqual(self.pragma('synchronous'), 1)   # NORMAL
+        self.assertEqual(self.pragma('busy_timeout'), pragmas['busy_timeout'])
+
+    def test_transactions_take_the_write_lock_up_front(self):
+        with CaptureQueriesContext(connection) as queries:
+            with transaction.atomic():
+                Office.objects.exists()
+        self.assertEqual(queries[0]['sql'], 'BEGIN IMMEDIATE')
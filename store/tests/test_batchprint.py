@@ -0,0 +1,67 @@
+import shutil
+import tempfile
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from store import batchprint, rendering, vouchers
+
+from . import factories
+
+
+class BatchPrintTests(TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        settings = override_settings(STORE_PDF_CACHE_DIR=self.dir, STORE_PDF_WORKERS=0)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.vendor = factories.vendor('Acme')
+        self.item = factories.item('Pens', vendor=self.vendor)
+        self.accounts, self.stores = factories.office('Accounts'), factories.office('Stores')
+        factories.receive(self.item, 10, unit_price='2.00', day=date(2026, 1, 2), voucher='V-1')
+        factories.receive(self.item, 4, unit_price='3.00', day=date(2026, 1, 3), voucher='V-2')
+        for office, day in [(self.accounts, 5), (self.stores, 5), (self.accounts, 5), (self.accounts, 6)]:
+            factories.issue(self.item, 1, office=office, day=date(2026, 1, day))
+        factories.issue(self.item, 1, day=date(2026, 1, 5))   # no office, no slip
+
+    def test_issue_slips_per_office_and_day(self):
+        documents = batchprint.documents('issues', date(2026, 1, 1), date(2026, 1, 31))
+        self.assertEqual(
+            [(context['issue_date'], context['office'].name, len(context['issues'])) for _, _, _, context in documents],
+            [(date(2026, 1, 5), 'Accounts', 2), (date(2026, 1, 5), 'Stores', 1), (date(2026, 1, 6), 'Accounts', 1)],
+        )
+        only = batchprint.documents('issues', date(2026, 1, 1), date(2026, 1, 31), office_id=self.stores.id)
+        self.assertEqual(len(only), 1)
+
+    def test_vouchers_match_the_single_voucher_view(self):
+        documents = batchprint.documents('vouchers', date(2026, 1, 1), date(2026, 1, 2))
+        self.assertEqual(len(documents), 1)
+        _, _, rows, context = documents[0]
+        self.assertEqual(context['grand_total'], Decimal('20.00'))
+        self.assertEqual(rows, batchprint.voucher_rows(vouchers.voucher_summary('V-1')))
+        with self.assertRaises(ValueError):
+            batchprint.documents('labels', date(2026, 1, 1), date(2026, 1, 2))
+
+    def test_merges_into_one_pdf(self):
+        documents = batchprint.documents('issues', date(2026, 1, 1), date(2026, 1, 31))
+        batch = batchprint.submit(documents)
+        self.assertEqual(batch.join(30), 'ready')
+        self.assertGreaterEqual(batchprint.page_count(rendering.paths(batch.key)[0]), 3)
+        again = batchprint.submit(documents)
+        self.assertEqual((again.key, again.thread), (batch.key, None))
+
+    def test_view(self):
+        self.client.force_login(factories.user())
+        response = self.client.get(reverse('batch_print'), {
+            'kind': 'vouchers', 'start_date': '2026-01-01', 'end_date': '2026-01-31',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        response = self.client.get(reverse('batch_print'), {
+            'kind': 'vouchers', 'start_date': '2026-02-01', 'end_date': '2026-02-28',
+        })
+        self.assertContains(response, 'Nothing to print in that range.')
@@ -0,0 +1,36 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from . import factories
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client.force_login(factories.user())
+        self.item = factories.item('Pens')
+        self.office = factories.office()
+        factories.receive(self.item, 10, voucher='V-100')
+        factories.issue(self.item, 2, office=self.office)
+
+    def assertRevalidates(self, url):
+        """A repeat request is a 304 until the item is renamed, then the new name is served."""
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.item.name = 'Ballpoint pens'
+        self.item.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Ballpoint pens')
+
+    def test_voucher(self):
+        self.assertRevalidates(reverse('voucher_detail', args=['V-100']))
+
+    def test_issue_batch(self):
+        self.assertRevalidates(reverse('issue_detail', args=[str(factories.DAY), self.office.id]))
+
+    def test_other_batches_keep_their_etag(self):
+        url = reverse('issue_detail', args=[str(factories.DAY), self.office.id])
+        etag = self.client.get(url)['ETag']
+        factories.issue(self.item, 1, office=self.office, day=factories.DAY.replace(day=6))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
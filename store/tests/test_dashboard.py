@@ -0,0 +1,61 @@
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase, override_settings
+
+from store import dashboard
+from store.models import StockCategory
+
+from . import factories
+
+
+class DashboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.item = factories.item('Pens')
+        factories.receive(self.item, 50)
+
+    def low_stock(self):
+        return [(row['name'], row['remaining'], row['threshold']) for row in dashboard.metrics()['low_stock_items']]
+
+    def test_threshold(self):
+        self.assertEqual(self.low_stock(), [])
+        cache.clear()
+        with override_settings(STORE_LOW_STOCK_THRESHOLD=60):
+            self.assertEqual(self.low_stock(), [('Pens', 50, 60)])
+
+    def test_item_and_category_levels(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.category = StockCategory.objects.create(name='Stationery', reorder_level=80)
+            self.item.save()
+        self.assertEqual(self.low_stock(), [('Pens', 50, 80)])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.reorder_level = 51
+            self.item.save()
+        self.assertEqual(self.low_stock(), [('Pens', 50, 51)])
+
+    def test_cached_until_a_write_commits(self):
+        self.assertEqual(dashboard.metrics()['issue_count'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            factories.issue(self.item, 1)
+            self.assertEqual(dashboard.metrics()['issue_count'], 0)
+        self.assertEqual(dashboard.metrics()['issue_count'], 1)
+        with self.assertNumQueries(0):
+            dashboard.metrics()
+
+    def test_category_writes_invalidate(self):
+        dashboard.metrics()
+        with self.captureOnCommitCallbacks(execute=True):
+            StockCategory.objects.create(name='Stationery')
+        self.assertIsNone(cache.get(dashboard.CACHE_KEY))
+
+    def test_invalidation_reaches_other_workers(self):
+        # LocMemCache is per process; a second connection to a shared backend
+        # stands in for another worker.
+        self.assertNotIsInstance(cache, LocMemCache)
+        other_worker = caches.create_connection('default')
+        dashboard.metrics()
+        self.assertIsNotNone(other_worker.get(dashboard.CACHE_KEY))
+        with self.captureOnCommitCallbacks(execute=True):
+            factories.issue(self.item, 1)
+        self.assertIsNone(other_worker.get(dashboard.CACHE_KEY))
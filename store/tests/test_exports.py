@@ -0,0 +1,49 @@
+import csv
+from datetime import date
+from io import BytesIO, StringIO
+
+from django.test import TestCase
+from django.urls import reverse
+from openpyxl import load_workbook
+
+from store import exports
+
+from . import factories
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.client.force_login(factories.user())
+        vendor = factories.vendor('Acme')
+        self.item = factories.item('Pens', vendor=vendor, unit='box')
+        factories.receive(self.item, 10, unit_price='2.00', day=date(2026, 1, 2), voucher='V-1')
+        factories.issue(self.item, 4, office=factories.office('Accounts'), day=date(2026, 1, 3), remarks='urgent')
+
+    def export(self, fmt, **params):
+        response = self.client.get(reverse('report_export', args=[fmt]), params)
+        self.assertEqual(response['Content-Disposition'], f'attachment; filename="report.{fmt}"')
+        return b''.join(response.streaming_content)
+
+    def test_csv(self):
+        rows = list(csv.reader(StringIO(self.export('csv').decode())))
+        self.assertEqual(rows, [
+            exports.HEADER,
+            ['Receipt', '2026-01-02', 'Pens', 'Acme', 'box', '10', '2.00', '', 'V-1', ''],
+            ['Issue', '2026-01-03', 'Pens', 'Acme', 'box', '4', '2.00', 'Accounts', '', 'urgent'],
+        ])
+
+    def test_filters(self):
+        rows = list(csv.reader(StringIO(self.export('csv', include_issues='on').decode())))
+        self.assertEqual([row[0] for row in rows[1:]], ['Issue'])
+        rows = list(csv.reader(StringIO(self.export('csv', start_date='2026-01-03').decode())))
+        self.assertEqual([row[0] for row in rows[1:]], ['Issue'])
+
+    def test_xlsx(self):
+        sheet = load_workbook(BytesIO(self.export('xlsx'))).active
+        rows = list(sheet.iter_rows(values_only=True))
+        self.assertEqual(list(rows[0]), exports.HEADER)
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[1][2], 'Pens')
+
+    def test_unknown_format(self):
+        self.assertEqual(self.client.get(reverse('report_export', args=['pdf'])).status_code, 404)
@@ -0,0 +1,56 @@
+from datetime import date, timedelta
+
+from django.test import TestCase, override_settings
+
+from store import forecasting
+from store.models import ConsumptionForecast, Issue
+
+from . import factories
+
+AS_OF = date(2026, 3, 31)
+
+
+@override_settings(STORE_FORECAST_HISTORY_DAYS=56, STORE_FORECAST_WINDOW_DAYS=28, STORE_FORECAST_LEAD_DAYS=14)
+class ForecastTests(TestCase):
+    def setUp(self):
+        self.item = factories.item()
+        self.office = factories.office()
+        factories.receive(self.item, 500, day=AS_OF - timedelta(days=100))
+        Issue.objects.bulk_create([
+            Issue(stock_item=self.item, office=self.office, quantity_issued=2, date_issued=AS_OF - timedelta(days=n))
+            for n in range(56)
+        ])
+        # Outside the history window.
+        factories.issue(self.item, 50, office=self.office, day=AS_OF - timedelta(days=56))
+
+    def test_steady_consumption(self):
+        self.assertEqual(forecasting.refresh(AS_OF), (1, 1))
+        overall = ConsumptionForecast.objects.get(stock_item=self.item, office=None)
+        self.assertEqual(overall.as_of, AS_OF)
+        self.assertEqual(overall.issued, 112)
+        self.assertAlmostEqual(overall.moving_average, 2)
+        self.assertAlmostEqual(overall.smoothed, 2)
+        self.assertAlmostEqual(overall.deviation, 0)
+        self.assertAlmostEqual(overall.days_of_cover, (500 - 162) / 2)
+        self.assertEqual((overall.reorder_point, overall.order_up_to), (28, 88))
+
+        at_office = ConsumptionForecast.objects.get(stock_item=self.item, office=self.office)
+        self.assertEqual(at_office.issued, 112)
+        self.assertIsNone(at_office.reorder_point)
+
+    def test_refresh_replaces_the_table(self):
+        forecasting.refresh(AS_OF)
+        forecasting.refresh(AS_OF + timedelta(days=1))
+        self.assertEqual(set(ConsumptionForecast.objects.values_list('as_of', flat=True)), {AS_OF + timedelta(days=1)})
+        self.assertEqual(ConsumptionForecast.objects.count(), 2)
+
+    def test_no_history(self):
+        Issue.objects.all().delete()
+        self.assertEqual(forecasting.refresh(AS_OF), (0, 0))
+        self.assertFalse(ConsumptionForecast.objects.exists())
+
+    def test_load_history(self):
+        items, offices, days, quantities = forecasting.load_history(AS_OF, 3)
+        self.assertEqual(sorted(days.tolist()), [0, 1, 2])
+        self.assertEqual(set(offices.tolist()), {self.office.id})
+        self.assertEqual(quantities.sum(), 6)
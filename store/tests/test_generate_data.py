@@ -0,0 +1,40 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase
+
+from store import benchmarks, ledger, rollups, valuation
+from store.models import Issue, Receipt, StockBalance, Voucher
+
+from .test_rollups import snapshot
+
+
+class GenerateDataTests(TestCase):
+    def generate(self, **options):
+        options = {'vendors': 3, 'categories': 2, 'items': 12, 'offices': 4, 'years': 0.25,
+                   'end': '2026-03-31', 'stdout': StringIO(), **options}
+        call_command('generate_store_data', **options)
+
+    def test_derived_tables_match_the_rows(self):
+        self.generate()
+        self.assertTrue(Receipt.objects.exists() and Issue.objects.exists())
+        self.assertEqual(ledger.verify(), [])
+        self.assertEqual(valuation.verify(), [])
+        self.assertFalse(StockBalance.objects.filter(quantity_available__lt=0).exists())
+        self.assertEqual(Voucher.objects.count(), Receipt.objects.values('voucher_number').distinct().count())
+        kept = snapshot()
+        rollups.rebuild_days()
+        self.assertEqual(snapshot(), kept)
+
+    def test_only_fills_an_empty_store(self):
+        self.generate(items=1, years=0.01)
+        with self.assertRaises(CommandError):
+            self.generate()
+
+
+class CompareTests(SimpleTestCase):
+    def test_compare(self):
+        baseline = {'results': {'a': {'ms': {'median': 10}}, 'b': {'ms': {'median': 0}}}}
+        current = {'results': {'a': {'ms': {'median': 15}}, 'b': {'ms': {'median': 4}}, 'c': {'ms': {'median': 1}}}}
+        self.assertEqual(benchmarks.compare(baseline, current), [('a', 10, 15, 50.0), ('b', 0, 4, None)])
+        self.assertEqual(benchmarks.summarize([3, 1, 2])['median'], 2)
@@ -0,0 +1,79 @@
+import io
+
+from django.test import TestCase
+
+from store import importer
+from store.models import Issue, Receipt, StockBalance, StockItem
+
+from . import factories
+
+EXPORT = '''Type,Date,Item,Vendor,Unit,Quantity,Unit Price,Office,Voucher,Remarks
+Receipt,2026-01-02,Pens,Acme,box,10,2.50,,V-1,
+Issue,2026-01-03,Pens,Acme,box,4,2.50,Accounts,,urgent
+Receipt,2026-01-04,Pens,Acme,box,5,3.00,,V-2,
+Issue,2026-01-05,Pens,Acme,box,1,2.50,,,
+'''
+
+
+def csv_file(text, encoding='utf-8'):
+    return io.BytesIO(text.encode(encoding))
+
+
+class ImportTests(TestCase):
+    def setUp(self):
+        self.pens = factories.item('Pens', vendor=factories.vendor('Acme'))
+        factories.office('Accounts')
+
+    def test_items(self):
+        result = importer.import_file(csv_file(
+            'Name,Vendor,Purchase Price,Unit\nStapler,Acme,4.00,each\nStapler,Acme,4.00,each\n'
+        ), 'items.csv', 'items')
+        self.assertEqual((result.created, result.error_count), (1, 1))
+        stapler = StockItem.objects.get(name='Stapler')
+        self.assertTrue(StockBalance.objects.filter(stock_item=stapler).exists())
+
+    def test_combined_export_as_receipts_skips_the_issues(self):
+        result = importer.import_file(csv_file(EXPORT), 'report.csv', 'receipts')
+        self.assertEqual((result.rows, result.created, result.skipped, result.error_count), (4, 2, 2, 0))
+        self.assertEqual(sorted(Receipt.objects.values_list('voucher_number', flat=True)), ['V-1', 'V-2'])
+        self.assertFalse(Issue.objects.exists())
+        self.assertIn('2 of another type skipped', str(result))
+
+    def test_combined_export_as_issues_skips_the_receipts(self):
+        factories.receive(self.pens, 20)
+        result = importer.import_file(csv_file(EXPORT), 'report.csv', 'issues')
+        self.assertEqual((result.created, result.skipped), (2, 2))
+        self.assertEqual(Receipt.objects.count(), 1)
+        self.assertEqual(StockBalance.objects.get(stock_item=self.pens).quantity_available, 15)
+
+    def test_unknown_type_is_an_error(self):
+        result = importer.import_file(csv_file(
+            'Type,Date,Item,Quantity\nTransfer,2026-01-02,Pens,1\n'
+        ), 'issues.csv', 'issues')
+        self.assertEqual(result.created, 0)
+        self.assertEqual(result.errors, [(2, "type: 'Transfer' is not Issue.")])
+
+    def test_dry_run_writes_nothing(self):
+        result = importer.import_file(csv_file(EXPORT), 'report.csv', 'receipts', dry_run=True)
+        self.assertEqual(result.created, 2)
+        self.assertFalse(Receipt.objects.exists())
+
+    def test_unreadable_file(self):
+        with self.assertRaisesMessage(importer.InvalidImport, "Couldn't read items.xlsx"):
+            importer.import_file(csv_file('not a zip'), 'items.xlsx', 'items')
+
+    def test_read_error_after_written_chunks_says_so(self):
+        rows = ''.join(f'2026-01-0{day},Pens,1,2.00\n' for day in range(1, 5))
+        data = csv_file('Date,Item,Quantity,Unit Price\n' + rows).getvalue() + b'2026-01-05,P\xffns,1,2.00\n'
+        with self.assertRaises(importer.InvalidImport) as raised:
+            importer.import_file(io.BytesIO(data), 'receipts.csv', 'receipts', chunk_size=2)
+        self.assertIn('after line 5', str(raised.exception))
+        self.assertIn('The 4 row(s) before it were imported.', str(raised.exception))
+        self.assertEqual(Receipt.objects.count(), 4)
+
+    def test_bugs_while_writing_are_not_reported_as_unreadable_files(self):
+        def progress(result):
+            raise KeyError('boom')
+
+        with self.assertRaises(KeyError):
+            importer.import_file(csv_file(EXPORT), 'report.csv', 'receipts', progress=progress)
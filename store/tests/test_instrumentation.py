@@ -0,0 +1,47 @@
+from django.core.cache import cache
+from django.template.backends.django import Template
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from store import instrumentation
+
+from . import factories
+
+
+class MiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        instrumentation.reset()
+        self.addCleanup(instrumentation.reset)
+        self.client.force_login(factories.user(is_staff=True))
+
+    def test_records_queries_and_template_time(self):
+        self.client.get(reverse('dashboard'))
+        dashboard = self.client.get(reverse('metrics')).json()['views']['dashboard']
+        self.assertEqual(dashboard['count'], 1)
+        self.assertGreater(dashboard['queries']['total'], 0)
+        self.assertGreater(dashboard['template_time']['total'], 0)
+
+    def test_template_render_is_restored_after_the_request(self):
+        render = Template.render
+        self.client.get(reverse('dashboard'))
+        self.assertIs(Template.render, render)
+
+    def test_prometheus(self):
+        self.client.get(reverse('dashboard'))
+        text = self.client.get(reverse('metrics'), {'format': 'prometheus'}).content.decode()
+        self.assertIn('store_requests_total{view="dashboard"} 1', text)
+
+
+class TimingTemplatesTests(SimpleTestCase):
+    def test_nested_requests_restore_once_the_last_finishes(self):
+        render = Template.render
+        with instrumentation._timing_templates():
+            with instrumentation._timing_templates():
+                self.assertIs(Template.render, instrumentation._timed_render)
+            self.assertIs(Template.render, instrumentation._timed_render)
+        self.assertIs(Template.render, render)
+
+    def test_percentiles(self):
+        self.assertEqual(instrumentation.percentiles(range(1, 101)), {'p50': 50, 'p90': 90, 'p99': 99})
+        self.assertEqual(instrumentation.percentiles([]), {'p50': None, 'p90': None, 'p99': None})
@@ -0,0 +1,124 @@
+import threading
+from datetime import date
+
+from django.db import OperationalError, connections
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from store import issuance, ledger
+from store.models import Issue, StockBalance
+
+from . import factories
+
+
+def available(stock_item):
+    return StockBalance.objects.get(stock_item=stock_item).quantity_available
+
+
+class IssueStockTests(TestCase):
+    def setUp(self):
+        self.office = factories.office()
+        self.pens = factories.item('Pens')
+        self.paper = factories.item('Paper')
+        factories.receive(self.pens, 10)
+        factories.receive(self.paper, 4)
+
+    def test_issues_every_line(self):
+        issued = issuance.issue_stock(self.office, [
+            Issue(stock_item=self.pens, quantity_issued=3),
+            Issue(stock_item=self.paper, quantity_issued=4),
+            Issue(stock_item=self.pens, quantity_issued=0),
+        ], date_issued=factories.DAY)
+
+        self.assertEqual(len(issued), 2)
+        self.assertEqual({issue.office for issue in issued}, {self.office})
+        self.assertEqual(available(self.pens), 7)
+        self.assertEqual(available(self.paper), 0)
+
+    def test_shortage_writes_nothing(self):
+        with self.assertRaises(issuance.InsufficientStock) as raised:
+            issuance.issue_stock(self.office, [
+                Issue(stock_item=self.pens, quantity_issued=3),
+                Issue(stock_item=self.paper, quantity_issued=3),
+                Issue(stock_item=self.paper, quantity_issued=3),
+            ], date_issued=factories.DAY)
+
+        self.assertEqual(raised.exception.shortages, {self.paper.id: (6, 4)})
+        self.assertFalse(Issue.objects.exists())
+        self.assertEqual(available(self.pens), 10)
+        self.assertEqual(available(self.paper), 4)
+
+
+
+class AddOfficeIssueViewTests(TestCase):
+    def setUp(self):
+        self.client.force_login(factories.user())
+        self.office = factories.office()
+        self.pens = factories.item('Pens')
+        factories.receive(self.pens, 10)
+
+    def post(self, date_issued):
+        return self.client.post(reverse('add_office_issue', args=[self.office.id]), {
+            'form-TOTAL_FORMS': 1, 'form-INITIAL_FORMS': 0,
+            'form-0-stock_item': self.pens.id, 'form-0-quantity_issued': 3, 'form-0-remarks': '',
+            'date_issued': date_issued,
+        })
+
+    def test_issues_on_the_posted_date(self):
+        self.assertRedirects(self.post('2026-01-07'), reverse('office_detail', args=[self.office.id]))
+        self.assertEqual(Issue.objects.get().date_issued, date(2026, 1, 7))
+
+    def test_malformed_date_is_a_form_error(self):
+        for value in ('07/01/2026', '2026-02-30'):
+            with self.subTest(value=value):
+                response = self.post(value)
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'enter the issue date as YYYY-MM-DD')
+        self.assertFalse(Issue.objects.exists())
+        self.assertEqual(available(self.pens), 10)
+
+class ConcurrentIssueTests(TransactionTestCase):
+    """Batches issued from several threads at once never oversell an item."""
+
+    threads = 6
+    batches = 8
+    stock = 40
+
+    def test_no_overselling(self):
+        office = factories.office()
+        items = [factories.item() for _ in range(3)]
+        for stock_item in items:
+            factories.receive(stock_item, self.stock)
+        outcomes, errors = [], []
+        start = threading.Barrier(self.threads)
+
+        def worker():
+            try:
+                start.wait()
+                for _ in range(self.batches):
+                    lines = [Issue(stock_item=stock_item, quantity_issued=3) for stock_item in items]
+                    try:
+                        issuance.issue_stock(office, lines, date_issued=factories.DAY)
+                        outcomes.append('issued')
+                    except (issuance.InsufficientStock, OperationalError):
+                        outcomes.append('rejected')
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        workers = [threading.Thread(target=worker) for _ in range(self.threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertIn('rejected', outcomes)   # 48 batches want 3 of each item; at most 13 fit in 40
+        for stock_item in items:
+            issued = Issue.objects.filter(stock_item=stock_item).aggregate(total=Sum('quantity_issued'))['total']
+            self.assertEqual(issued, outcomes.count('issued') * 3)
+            self.assertLessEqual(issued, self.stock)
+            self.assertEqual(available(stock_item), self.stock - issued)
+        self.assertEqual(ledger.verify(), [])
@@ -0,0 +1,40 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+
+from store import search, views
+
+from . import factories
+
+
+class ItemLookupTests(TestCase):
+    def setUp(self):
+        search.reset_backend()
+        self.client.force_login(factories.user())
+        self.pens = factories.item('Pens', unit='box')
+        factories.receive(self.pens, 12)
+        factories.issue(self.pens, 5)
+        self.pencils = factories.item('Pencils')
+        factories.item('Paper')
+
+    def test_matches_with_balances(self):
+        response = self.client.get(reverse('item_lookup'), {'q': 'pen'})
+        self.assertEqual(response.json(), {'results': [
+            {'id': self.pencils.id, 'name': 'Pencils', 'unit': None, 'available': 0},
+            {'id': self.pens.id, 'name': 'Pens', 'unit': 'box', 'available': 7},
+        ], 'next': None})
+
+    @mock.patch.object(views, 'ITEM_LOOKUP_PAGE', 2)
+    def test_pages_through_every_item(self):
+        names, url = [], reverse('item_lookup')
+        while url:
+            data = self.client.get(url).json()
+            names += [row['name'] for row in data['results']]
+            url = data['next']
+        self.assertEqual(names, ['Paper', 'Pencils', 'Pens'])
+
+    def test_autocomplete(self):
+        response = self.client.get(reverse('search_autocomplete'), {'q': 'Pe', 'kind': 'item'})
+        self.assertEqual([row['name'] for row in response.json()['results']], ['Pencils', 'Pens'])
+        self.assertEqual(self.client.get(reverse('search_autocomplete'), {'kind': 'nope'}).status_code, 404)
@@ -0,0 +1,77 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from store import ledger, reports
+from store.models import Issue, StockBalance, StockItem
+
+from . import factories
+
+
+class LedgerTests(TestCase):
+    def setUp(self):
+        self.item = factories.item()
+        self.receipt = factories.receive(self.item, 10)
+        self.issue = factories.issue(self.item, 3)
+
+    def balance(self):
+        balance = StockBalance.objects.get(stock_item=self.item)
+        return balance.quantity_received, balance.quantity_issued, balance.quantity_available
+
+    def test_follows_saves_and_deletes(self):
+        self.assertEqual(self.balance(), (10, 3, 7))
+        self.issue.quantity_issued = 5
+        self.issue.save()
+        self.assertEqual(self.balance(), (10, 5, 5))
+        self.receipt.quantity_received = 12
+        self.receipt.save()
+        self.assertEqual(self.balance(), (12, 5, 7))
+        self.issue.delete()
+        self.assertEqual(self.balance(), (12, 0, 12))
+        self.assertEqual(ledger.verify(), [])
+
+    def test_moving_a_movement_to_another_item(self):
+        other = factories.item()
+        self.issue.stock_item = other
+        self.issue.save()
+        self.assertEqual(self.balance(), (10, 0, 10))
+        self.assertEqual(StockBalance.objects.get(stock_item=other).quantity_available, -3)
+
+    def test_bulk_create(self):
+        Issue.objects.bulk_create([Issue(stock_item=self.item, quantity_issued=2, date_issued=factories.DAY) for _ in range(3)])
+        self.assertEqual(self.balance(), (10, 9, 1))
+
+    def test_reports_ignore_the_legacy_item_quantity(self):
+        StockItem.objects.filter(pk=self.item.pk).update(quantity=999)
+        self.assertEqual(reports.stock_as_of(factories.DAY)[0]['available'], 7)
+        self.assertNotIn('quantity', reports.stock_items().query.deferred_loading[0])
+        self.assertEqual(list(reports.low_stock_items(threshold=8).values_list('remaining', flat=True)), [7])
+
+    def test_verify_and_rebuild(self):
+        StockBalance.objects.filter(stock_item=self.item).update(quantity_available=99)
+        self.assertEqual(ledger.verify(), [(self.item.id, (10, 3, 99), (10, 3, 7))])
+        self.assertEqual(ledger.rebuild(), 1)
+        self.assertEqual(self.balance(), (10, 3, 7))
+        self.assertEqual(ledger.verify(), [])
+
+    def test_command(self):
+        StockBalance.objects.filter(stock_item=self.item).delete()
+        with self.assertRaises(CommandError):
+            call_command('rebuild_stock_balances', '--verify', stdout=StringIO(), stderr=StringIO())
+        call_command('rebuild_stock_balances', stdout=StringIO())
+        call_command('rebuild_stock_balances', '--verify', stdout=StringIO())
+        self.assertEqual(self.balance(), (10, 3, 7))
+
+
+class IssueCreateTests(TestCase):
+    def test_post_updates_the_balance(self):
+        item = factories.item()
+        factories.receive(item, 10)
+        self.client.force_login(factories.user())
+        response = self.client.post(reverse('issue_create'), {
+            'stock_item': item.id, 'quantity_issued': 4, 'remarks': '', 'date_issued': '2026-01-06',
+        })
+        self.assertRedirects(response, reverse('issue_create'))
+        self.assertEqual(StockBalance.objects.get(stock_item=item).quantity_available, 6)
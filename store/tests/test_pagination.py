@@ -0,0 +1,98 @@
+from datetime import date, timedelta
+
+from django.db import connection
+from django.db.models import Max, Sum
+from django.http import QueryDict
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from store import pagination
+from store.models import Issue
+
+from . import factories
+
+KEYS = ('-date_issued', '-last_id')
+
+
+def grouped(issues):
+    return issues.values('date_issued', 'stock_item__name').annotate(
+        total_quantity=Sum('quantity_issued'), last_id=Max('id'),
+    )
+
+
+class GroupedPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        items = [factories.item() for _ in range(3)]
+        for stock_item in items:
+            factories.receive(stock_item, 1000)
+        # Up to three groups a day, some days with several issues per group.
+        for n in range(12):
+            for stock_item in items[:n % 3 + 1]:
+                for _ in range(n % 2 + 1):
+                    factories.issue(stock_item, n + 1, day=date(2026, 1, 1) + timedelta(days=n))
+
+    def walk(self, queryset, window, per_page=4):
+        """Every row, following next links to the end and previous links back."""
+        pages = [pagination.paginate(queryset, QueryDict(), KEYS, per_page, window=window)]
+        while pages[-1].has_next:
+            params = QueryDict(pages[-1].next_query)
+            pages.append(pagination.paginate(queryset, params, KEYS, per_page, window=window))
+        forward = [row for page in pages for row in page]
+
+        backward = [list(pages[-1])]
+        page = pages[-1]
+        while page.has_previous:
+            page = pagination.paginate(queryset, QueryDict(page.previous_query), KEYS, per_page, window=window)
+            backward.insert(0, list(page))
+        self.assertEqual(backward, [list(page) for page in pages])
+        return forward
+
+    def test_window_pages_match_the_unbounded_order(self):
+        issues = Issue.objects.all()
+        expected = list(grouped(issues).order_by(*KEYS))
+        self.assertEqual(self.walk(grouped(issues), issues), expected)
+        self.assertEqual(self.walk(grouped(issues), None), expected)
+
+    def test_window_survives_a_having_filter(self):
+        issues = Issue.objects.all()
+        queryset = grouped(issues).filter(total_quantity__gte=20)
+        self.assertEqual(self.walk(queryset, issues), list(queryset.order_by(*KEYS)))
+
+    def test_grouping_is_limited_to_the_window(self):
+        issues = Issue.objects.all()
+        with CaptureQueriesContext(connection) as captured:
+            pagination.paginate(grouped(issues), QueryDict(), KEYS, 4, window=issues)
+        *_, aggregate = captured.captured_queries
+        self.assertIn('"date_issued" >=', aggregate['sql'])
+
+
+class BadCursorTests(TestCase):
+    def setUp(self):
+        self.client.force_login(factories.user())
+        stock_item = factories.item()
+        factories.receive(stock_item, 5, voucher='V-1')
+        factories.issue(stock_item, 1, office=factories.office())
+
+    def test_cursors_of_the_wrong_shape_give_the_first_page(self):
+        cursors = [
+            pagination.encode_cursor([1, 2]),
+            pagination.encode_cursor([{'a': 1}, [1]]),
+            pagination.encode_cursor(['2026-01-01']),
+            pagination.encode_cursor(['not a date', 'x']),
+            'not base64!',
+        ]
+        urls = [
+            reverse('stock_list'), reverse('issue_list'), reverse('item_list'),
+            reverse('vendor_detail', args=[factories.vendor().id]),
+        ]
+        for url in urls:
+            for cursor in cursors:
+                for name in ('after', 'before'):
+                    with self.subTest(url=url, cursor=cursor, name=name):
+                        self.assertEqual(self.client.get(url, {name: cursor}).status_code, 200)
+
+    def test_decode_cursor_rejects_non_scalar_values(self):
+        self.assertIsNone(pagination.decode_cursor(pagination.encode_cursor([{'a': 1}, [1]]), 2))
+        self.assertEqual(pagination.decode_cursor(pagination.encode_cursor(['2026-01-01', 3]), 2), ['2026-01-01', 3])
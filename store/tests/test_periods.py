@@ -0,0 +1,70 @@
+from datetime import date
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from store import periods, reports
+from store.models import StockPeriod
+
+from . import factories
+
+
+class PeriodTests(TestCase):
+    def setUp(self):
+        self.item = factories.item('Pens')
+        self.office = factories.office()
+        factories.receive(self.item, 10, day=date(2026, 1, 10))
+        factories.issue(self.item, 3, office=self.office, day=date(2026, 1, 20))
+        factories.receive(self.item, 5, day=date(2026, 2, 10))
+        factories.issue(self.item, 4, day=date(2026, 3, 5))
+
+    def closes(self):
+        return list(StockPeriod.objects.order_by('period_end').values_list('period_end', flat=True))
+
+    def test_month_end(self):
+        self.assertEqual(periods.month_end(date(2024, 2, 3)), date(2024, 2, 29))
+        self.assertEqual(periods.month_end(date(2026, 12, 31)), date(2026, 12, 31))
+
+    def test_closes_are_incremental(self):
+        periods.close_periods(date(2026, 1, 31))
+        self.assertEqual(periods.close_periods(date(2026, 3, 15))[0].period_end, date(2026, 2, 28))
+        self.assertEqual(self.closes(), [date(2026, 1, 31), date(2026, 2, 28)])
+        snapshot = StockPeriod.objects.get(period_end=date(2026, 2, 28)).stock_snapshots.get()
+        self.assertEqual((snapshot.quantity_received, snapshot.quantity_issued), (15, 3))
+
+    def test_as_of_matches_the_raw_rows(self):
+        expected = {
+            day: (periods.stock_on_hand(day), periods.office_issued(day))
+            for day in (date(2026, 1, 15), date(2026, 2, 28), date(2026, 3, 31))
+        }
+        periods.close_periods(date(2026, 3, 31))
+        for day, (on_hand, issued) in expected.items():
+            with self.subTest(day=day):
+                self.assertEqual(periods.stock_on_hand(day), on_hand)
+                self.assertEqual(periods.office_issued(day), issued)
+        self.assertEqual(periods.stock_on_hand(date(2026, 3, 31)), {self.item.id: (15, 7, 8)})
+        self.assertEqual(periods.office_issued(date(2026, 3, 31)), {(self.office.id, self.item.id): 3})
+
+    def test_back_dated_writes_drop_later_closes(self):
+        periods.close_periods(date(2026, 3, 31))
+        factories.issue(self.item, 1, day=date(2026, 2, 1))
+        self.assertEqual(self.closes(), [date(2026, 1, 31)])
+        self.assertEqual(periods.stock_on_hand(date(2026, 3, 31)), {self.item.id: (15, 8, 7)})
+
+    def test_stock_as_of_report(self):
+        periods.close_periods(date(2026, 1, 31))
+        rows = reports.stock_as_of(date(2026, 2, 15), office=self.office.id)
+        self.assertEqual(
+            [(row['name'], row['received'], row['issued'], row['available'], row['office_issued']) for row in rows],
+            [('Pens', 15, 3, 12, 3)],
+        )
+
+    def test_command(self):
+        out = StringIO()
+        call_command('close_stock_periods', '--through', '2026-02-28', stdout=out)
+        self.assertIn('Closed 2 period(s).', out.getvalue())
+        call_command('close_stock_periods', '--through', '2026-01-31', '--rebuild', stdout=StringIO())
+        self.assertEqual(self.closes(), [date(2026, 1, 31)])
+        with self.assertRaises(CommandError):
+            call_command('close_stock_periods', '--through', 'soon', stdout=StringIO())
@@ -0,0 +1,138 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from store import pdf, rendering
+
+from . import factories
+
+TEMPLATE = 'store/report_pdf.html'
+
+
+def context():
+    return {'issues': [], 'receipts': []}
+
+
+class PdfCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        settings = override_settings(STORE_PDF_CACHE_DIR=self.dir, STORE_PDF_WORKERS=0)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.key = rendering.content_key('test', TEMPLATE, [('row', 1)])
+        self.pdf, self.pending, self.err = rendering.paths(self.key)
+        self.renders = 0
+
+    def get_context(self):
+        self.renders += 1
+        return context()
+
+    def respond(self):
+        return rendering.pdf_response('test', TEMPLATE, [('row', 1)], self.get_context, wait=1)
+
+    def age(self, path, seconds):
+        then = time.time() - seconds
+        os.utime(path, (then, then))
+
+    def test_renders_once_then_serves_from_disk(self):
+        self.assertEqual(self.respond().status_code, 200)
+        self.assertEqual(self.respond().status_code, 200)
+        self.assertEqual(self.renders, 1)
+        self.assertTrue(self.pdf.exists())
+
+    def test_pending_render_is_not_rendered_again(self):
+        self.pending.touch()
+        response = self.respond()
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.renders, 0)
+        self.assertEqual(rendering.status(self.key), 'pending')
+
+    @override_settings(STORE_PDF_PENDING_TIMEOUT=60)
+    def test_stale_pending_counts_as_failed_and_is_rendered_again(self):
+        self.pending.touch()
+        self.age(self.pending, 120)
+        self.assertEqual(rendering.status(self.key), 'failed')
+        self.assertFalse(self.pending.exists())
+
+        self.assertEqual(self.respond().status_code, 200)
+        self.assertEqual(self.renders, 1)
+
+    @override_settings(STORE_PDF_CACHE_MAX_AGE=3600)
+    def test_evict_drops_old_files(self):
+        self.respond()
+        self.err.write_text('old failure')
+        self.age(self.err, 7200)
+        self.assertEqual(rendering.evict(), 1)
+        self.assertEqual(rendering.status(self.key), 'ready')
+
+        self.age(self.pdf, 7200)
+        self.assertEqual(rendering.evict(), 1)
+        self.assertEqual(rendering.status(self.key), 'unknown')
+
+    def test_evict_drops_least_recently_served_past_the_size_limit(self):
+        old, new = (rendering.cache_dir() / f'{name * 64}.pdf' for name in 'ab')
+        old.write_bytes(b'x' * 700 * 1024)
+        new.write_bytes(b'x' * 700 * 1024)
+        self.age(old, 60)
+        with override_settings(STORE_PDF_CACHE_MAX_MB=1):
+            self.assertEqual(rendering.evict(), 1)
+        self.assertFalse(old.exists())
+        self.assertTrue(new.exists())
+
+
+class InlineRenderTests(SimpleTestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        settings = override_settings(STORE_PDF_CACHE_DIR=self.dir, STORE_PDF_WORKERS=0)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_renders_outside_the_lock(self):
+        slow, fast = (rendering.content_key('test', TEMPLATE, [(name,)]) for name in ('slow', 'fast'))
+        started, release = threading.Event(), threading.Event()
+
+        def render(html, pdf_path):
+            if slow in pdf_path:
+                started.set()
+                release.wait(10)
+            Path(pdf_path).write_bytes(b'%PDF')
+            Path(pdf_path).with_suffix('.pending').unlink(missing_ok=True)
+            return 0.0
+
+        with mock.patch.object(pdf, 'render', render):
+            worker = threading.Thread(target=rendering.submit, args=(slow, '<p>slow</p>'))
+            worker.start()
+            self.addCleanup(worker.join)
+            self.addCleanup(release.set)
+            self.assertTrue(started.wait(10))
+            self.assertEqual(rendering.status(slow), 'pending')
+            self.assertIsNotNone(rendering.submit(slow, '<p>slow</p>'))   # the same job, not a second render
+            rendering.submit(fast, '<p>fast</p>')
+            self.assertEqual(rendering.status(fast), 'ready')
+            release.set()
+            worker.join(10)
+        self.assertEqual(rendering.status(slow), 'ready')
+
+
+class ReportPdfTests(TestCase):
+    def setUp(self):
+        self.client.force_login(factories.user())
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+
+    def test_report_pdf_is_served_directly(self):
+        factories.receive(factories.item(), 5)
+        with override_settings(STORE_PDF_CACHE_DIR=self.dir, STORE_PDF_WORKERS=0):
+            response = self.client.get(reverse('report_pdf'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertIn('filtered_report.pdf', response['Content-Disposition'])
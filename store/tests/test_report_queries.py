@@ -0,0 +1,76 @@
+"""
+Query counts of the report and dashboard views (store.reports).
+
+Every count is pinned with two data sizes (1 and 20 rows): a view that
+queried per row would need more queries for the larger one.
+"""
+import shutil
+import tempfile
+from datetime import date
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from . import factories
+
+REPORT = {
+    'start_date': '2026-01-01', 'end_date': '2026-01-31',
+    'include_issues': 'on', 'include_receipts': 'on', 'show_vendor': 'on', 'show_office': 'on',
+}
+
+
+class ReportQueryCountTests(TestCase):
+    def setUp(self):
+        self.client.force_login(factories.user())
+        cache.clear()
+        self.pdf_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.pdf_dir, ignore_errors=True)
+
+    def add_rows(self, count):
+        """``count`` items, each with a receipt and an issue to its own office."""
+        for n in range(count):
+            stock_item = factories.item()
+            factories.receive(stock_item, 20, day=date(2026, 1, 2 + n))
+            factories.issue(stock_item, 5, office=factories.office(), day=date(2026, 1, 3 + n), remarks='r')
+
+    def assertQueries(self, count, url, params=None):
+        """``url`` runs ``count`` queries however many rows the report covers."""
+        responses = []
+        for rows in (1, 19):
+            self.add_rows(rows)
+            cache.clear()
+            with self.assertNumQueries(count):
+                response = self.client.get(url, params or {})
+            self.assertLess(response.status_code, 400)
+            responses.append(response)
+        return responses
+
+    def test_report_view(self):
+        # The session, the user, the receipts and the issues (with item, vendor, office and cost).
+        _, response = self.assertQueries(4, reverse('report_view'), REPORT)
+        self.assertEqual(response.content.decode().count('<td>Purchased</td>'), 20)
+        self.assertEqual(response.content.decode().count('<td>Issued</td>'), 20)
+        issue = response.context['issues'].last()
+        self.assertContains(response, f'<td>{issue.office.name}</td>', html=True)
+        self.assertContains(response, f'<td>{issue.stock_item.vendor.name}</td>', html=True, count=2)
+
+    def test_report_view_as_of(self):
+        # Every item moves after the as-of day, so its valuation is replayed (in one batch).
+        self.assertQueries(17, reverse('report_view'), {**REPORT, 'as_of': '2026-01-02'})
+
+    def test_report_search(self):
+        self.assertQueries(5, reverse('report_search'), REPORT)
+
+    def test_report_pdf(self):
+        with override_settings(STORE_PDF_CACHE_DIR=self.pdf_dir, STORE_PDF_WORKERS=0):
+            self.assertQueries(8, reverse('report_pdf'), REPORT)
+
+    def test_dashboard(self):
+        self.assertQueries(10, reverse('dashboard'))
+
+    def test_dashboard_cached(self):
+        self.add_rows(2)
+        self.client.get(reverse('dashboard'))
+        with self.assertNumQueries(2):
+            self.client.get(reverse('dashboard'))
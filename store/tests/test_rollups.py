@@ -0,0 +1,93 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase
+
+from store import ledger, rollups
+from store.models import DailyIssueRollup, DailyReceiptRollup, Issue, Receipt, StockBalance, Voucher
+
+from . import factories
+
+
+def snapshot():
+    return (
+        list(DailyIssueRollup.objects.order_by('day', 'office_id', 'stock_item_id').values_list(
+            'day', 'office_id', 'stock_item_id', 'quantity'
+        )),
+        list(DailyReceiptRollup.objects.order_by('day', 'stock_item_id').values_list(
+            'day', 'stock_item_id', 'vendor_id', 'quantity', 'value'
+        )),
+    )
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        self.item = factories.item(purchase_price='2.00')
+        self.office = factories.office()
+        self.receipt = factories.receive(self.item, 10, voucher='V-1', day=date(2026, 1, 2))
+        self.issue = factories.issue(self.item, 3, office=self.office, day=date(2026, 1, 3))
+
+    def assertMatchesRebuild(self):
+        kept = snapshot()
+        rollups.rebuild_days()
+        self.assertEqual(kept, snapshot())
+
+    def test_saves_and_deletes(self):
+        self.issue.quantity_issued = 4
+        self.issue.date_issued = date(2026, 1, 4)
+        self.issue.save()
+        factories.issue(self.item, 1, day=date(2026, 1, 4))
+        self.receipt.delete()
+        self.assertMatchesRebuild()
+
+    def test_vendor_change_between_same_day_receipts(self):
+        first = factories.receive(self.item, 3, day=date(2026, 1, 8))
+        self.item.vendor = factories.vendor()
+        self.item.save()
+        factories.receive(self.item, 4, day=date(2026, 1, 8))
+        rollup = DailyReceiptRollup.objects.get(day=date(2026, 1, 8))
+        self.assertEqual((rollup.quantity, rollup.vendor_id), (7, self.item.vendor_id))
+        first.delete()
+        self.assertEqual(DailyReceiptRollup.objects.get(day=date(2026, 1, 8)).quantity, 4)
+        self.assertMatchesRebuild()
+
+    def test_queryset_update_moves_the_day(self):
+        Issue.objects.filter(pk=self.issue.pk).update(
+            date_issued=date(2026, 1, 9), quantity_issued=F('quantity_issued') + 1
+        )
+        self.assertEqual(
+            list(DailyIssueRollup.objects.values_list('day', 'quantity')), [(date(2026, 1, 9), 4)]
+        )
+        self.assertMatchesRebuild()
+        self.assertEqual(StockBalance.objects.get(stock_item=self.item).quantity_available, 6)
+        self.assertEqual(ledger.verify(), [])
+
+    def test_queryset_update_stamps_updated_at(self):
+        before = Issue.objects.get(pk=self.issue.pk).updated_at
+        Issue.objects.filter(pk=self.issue.pk).update(remarks='checked')
+        self.assertGreater(Issue.objects.get(pk=self.issue.pk).updated_at, before)
+
+    def test_queryset_update_of_receipts_keeps_totals(self):
+        Receipt.objects.filter(pk=self.receipt.pk).update(unit_price=Decimal('3.00'), date_received=date(2026, 1, 5))
+        self.assertEqual(Receipt.objects.get(pk=self.receipt.pk).total_price, Decimal('30.00'))
+        self.assertEqual(
+            list(DailyReceiptRollup.objects.values_list('day', 'value')), [(date(2026, 1, 5), Decimal('30.00'))]
+        )
+        self.assertEqual(Voucher.objects.get(number='V-1').total_price, Decimal('30.00'))
+        self.assertMatchesRebuild()
+
+    def test_catch_up_sees_stamped_rows(self):
+        rollups.catch_up(full=True)
+        Issue.objects.bulk_create([Issue(stock_item=self.item, quantity_issued=1, date_issued=date(2026, 1, 7))])
+        DailyIssueRollup.objects.filter(day=date(2026, 1, 7)).delete()
+        self.assertEqual(rollups.catch_up(), 1)
+        self.assertMatchesRebuild()
+
+    def test_full_catch_up_after_raw_sql(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM store_issuecost WHERE issue_id = %s', [self.issue.pk])
+            cursor.execute('DELETE FROM store_issue WHERE id = %s', [self.issue.pk])
+        rollups.catch_up(full=True)
+        self.assertEqual(snapshot()[0], [])
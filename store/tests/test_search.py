@@ -0,0 +1,109 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from store import search
+from store.models import StockItem
+
+from . import factories
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        search.reset_backend()
+        cls.vendor = factories.vendor('Northwind Traders')
+        cls.percent = factories.item('5% Glue', vendor=cls.vendor)
+        cls.underscore = factories.item('A_4 Paper', vendor=cls.vendor)
+        cls.plain = factories.item('A14 Folder', vendor=cls.vendor)
+
+    def titles(self, results):
+        return {result['title'] for result in results}
+
+    def test_uses_the_fts_index(self):
+        self.assertEqual(search.backend(), 'fts5')
+
+    def test_finds_items_by_name_and_vendor(self):
+        self.assertEqual(self.titles(search.search('glue')), {'5% Glue'})
+        self.assertEqual(self.titles(search.search('northwind', ['item'])), {'5% Glue', 'A_4 Paper', 'A14 Folder'})
+
+    def test_wildcards_in_short_terms_are_literal(self):
+        self.assertEqual(self.titles(search.search('%')), {'5% Glue'})
+        self.assertEqual(self.titles(search.search('_4')), {'A_4 Paper'})
+
+    def test_wildcards_in_prefixes_are_literal(self):
+        self.assertEqual(search.autocomplete('A_'), [(self.underscore.id, 'A_4 Paper')])
+        self.assertEqual(search.autocomplete('5%'), [(self.percent.id, '5% Glue')])
+        self.assertEqual(search.autocomplete('%'), [])
+
+    def test_filter_queryset(self):
+        self.assertEqual(list(search.filter_queryset(StockItem.objects.all(), 'item', '_')), [self.underscore])
+
+
+class ItemApiSearchTests(TestCase):
+    def setUp(self):
+        search.reset_backend()
+        self.client.force_login(factories.user())
+        vendor = factories.vendor('Northwind Traders')
+        factories.item('Stapler', vendor=vendor)
+        factories.item('A_4 Paper')
+        factories.item('A14 Folder')
+
+    def names(self, q):
+        response = self.client.get(reverse('api-item-list'), {'q': q})
+        self.assertEqual(response.status_code, 200)
+        return {row['name'] for row in response.json()['results']}
+
+    def test_uses_the_item_search(self):
+        self.assertEqual(self.names('northwind'), {'Stapler'})
+        self.assertEqual(self.names('_'), {'A_4 Paper'})
+
+
+class IndexSyncTests(TestCase):
+    def setUp(self):
+        search.reset_backend()
+        self.vendor = factories.vendor('Northwind Traders')
+        self.item = factories.item('Stapler', vendor=self.vendor)
+
+    def found(self, query, kind='item'):
+        return [(result['id'], result['title']) for result in search.search(query, [kind])]
+
+    def test_renaming_a_vendor_reindexes_its_items(self):
+        self.vendor.name = 'Contoso'
+        self.vendor.save()
+        self.assertEqual(self.found('contoso'), [(self.item.id, 'Stapler')])
+        self.assertEqual(self.found('northwind'), [])
+
+    def test_edits_and_deletes(self):
+        self.item.name = 'Hole Punch'
+        self.item.save()
+        self.assertEqual(self.found('punch'), [(self.item.id, 'Hole Punch')])
+        self.item.delete()
+        self.assertEqual(self.found('punch'), [])
+
+    def test_offices_and_vouchers(self):
+        office = factories.office('Accounts', location='Block C')
+        factories.receive(self.item, 1, voucher='INV-2291')
+        self.assertEqual(self.found('block c', 'office'), [(office.id, 'Accounts')])
+        results = search.search('2291')
+        self.assertEqual([(result['kind'], result['url']) for result in results], [
+            ('voucher', reverse('voucher_detail', args=['INV-2291'])),
+        ])
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {search.TABLE}')
+        self.assertEqual(self.found('stapler'), [])
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('Indexed 2 document(s).', out.getvalue())
+        self.assertEqual(self.found('stapler'), [(self.item.id, 'Stapler')])
+
+    def test_search_view(self):
+        self.client.force_login(factories.user())
+        response = self.client.get(reverse('search'), {'q': 'stap', 'format': 'json'})
+        self.assertEqual([result['title'] for result in response.json()['results']], ['Stapler'])
+        self.assertContains(self.client.get(reverse('search'), {'q': 'stap'}), 'Stapler')
@@ -0,0 +1,19 @@
+from django.test import SimpleTestCase
+
+from store.management.commands import benchmark_startup
+
+
+class StartupTests(SimpleTestCase):
+    def test_wsgi_application_does_not_load_the_pdf_stack(self):
+        command = benchmark_startup.Command()
+        self.assertEqual(command._probe([])['heavy'], [])
+        self.assertIn('xhtml2pdf', command._probe(['store.pdf'])['heavy'])
+
+    def test_parse_importtime(self):
+        output = '\n'.join([
+            'import time: self [us] | cumulative | imported package',
+            'import time:       120 |        120 |   _io',
+            'import time:       300 |        900 | encodings',
+            'import time:        50 |       1500 | django',
+        ])
+        self.assertEqual(benchmark_startup.parse_importtime(output), [('encodings', 900), ('django', 1500)])
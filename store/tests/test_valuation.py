@@ -0,0 +1,72 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+
+from store import rollups, valuation
+from store.models import IssueCost, ItemValuation, RollupWatermark, ValuationWatermark
+
+from . import factories
+
+
+class ValuationTests(TestCase):
+    def setUp(self):
+        self.item = factories.item(purchase_price='1.00')
+        self.first = factories.receive(self.item, 10, unit_price='2.00', day=date(2026, 1, 1))
+        factories.receive(self.item, 10, unit_price='4.00', day=date(2026, 1, 2))
+        self.issue = factories.issue(self.item, 15, day=date(2026, 1, 3))
+
+    def cost(self):
+        return IssueCost.objects.get(issue=self.issue)
+
+    def stored(self):
+        return ItemValuation.objects.get(stock_item=self.item)
+
+    def test_fifo_and_average_cost(self):
+        self.assertEqual(self.cost().fifo_cost, Decimal('40.00'))      # 10 x 2 + 5 x 4
+        self.assertEqual(self.cost().average_cost, Decimal('45.00'))   # 15 x 3
+        self.assertEqual(self.stored().quantity, 5)
+        self.assertEqual(self.stored().fifo_value, Decimal('20.00'))
+        self.assertEqual(valuation.verify(), [])
+
+    def test_edits_are_replayed_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.first.unit_price = Decimal('3.00')
+            self.first.save()
+            self.assertTrue(self.stored().stale)
+        self.assertFalse(self.stored().stale)
+        self.assertEqual(self.cost().fifo_cost, Decimal('50.00'))
+        self.assertEqual(valuation.verify(), [])
+
+    def test_deletes_are_replayed_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.first.delete()
+        self.assertEqual(self.cost().fifo_cost, Decimal('60.00'))   # 10 x 4, and 5 short at the 4.00 average
+        self.assertEqual(valuation.verify(), [])
+
+    def test_deleting_the_item(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.item.delete()
+        self.assertTrue(callbacks)
+        self.assertFalse(ItemValuation.objects.exists())
+
+    def test_back_dated_receipt(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            factories.receive(self.item, 5, unit_price='1.00', day=date(2025, 12, 31))
+        self.assertEqual(self.cost().fifo_cost, Decimal('25.00'))   # 5 x 1 + 10 x 2
+        self.assertEqual(valuation.verify(), [])
+
+    def test_value_as_of(self):
+        values = valuation.value_as_of(date(2026, 1, 2))
+        self.assertEqual(values[self.item.id]['quantity'], 20)
+        self.assertEqual(values[self.item.id]['fifo_value'], Decimal('60.00'))
+
+    def test_catch_up_keeps_its_own_watermark(self):
+        valuation.catch_up()
+        mark = ValuationWatermark.objects.get().processed_until
+        self.assertFalse(RollupWatermark.objects.filter(name='valuation').exists())
+        rollups.catch_up(full=True)
+        RollupWatermark.objects.all().delete()
+        self.assertEqual(ValuationWatermark.objects.get().processed_until, mark)
+        valuation.catch_up()
+        self.assertEqual(ValuationWatermark.objects.count(), 1)
@@ -0,0 +1,139 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db.models import ProtectedError
+from django.test import TestCase
+from django.urls import reverse
+
+from store import vouchers
+from store.models import Receipt, Voucher
+
+from . import factories
+
+
+class VoucherSummaryTests(TestCase):
+    def setUp(self):
+        self.vendor = factories.vendor('Acme')
+        self.pens = factories.item('Pens', vendor=self.vendor)
+        self.paper = factories.item('Paper', vendor=self.vendor)
+        factories.receive(self.pens, 10, unit_price='2.00', day=date(2026, 1, 2), voucher='V-1')
+        factories.receive(self.pens, 5, unit_price='2.00', day=date(2026, 1, 3), voucher='V-1')
+        factories.receive(self.paper, 3, unit_price='7.50', day=date(2026, 1, 3), voucher='V-1')
+        factories.receive(self.paper, 1, unit_price='1.00', voucher='V-2')
+
+    def test_group_receipts(self):
+        rows = list(
+            vouchers.group_receipts(Receipt.objects.all(), 'voucher_number', totals=True).order_by('voucher_number')
+        )
+        self.assertEqual(
+            [(row['voucher_number'], row['quantity'], row['total_price'], row['first_date']) for row in rows],
+            [('V-1', 18, Decimal('52.50'), date(2026, 1, 2)), ('V-2', 1, Decimal('1.00'), factories.DAY)],
+        )
+        self.assertEqual({row['grand_total'] for row in rows}, {Decimal('53.50')})
+        self.assertEqual({row['grand_quantity'] for row in rows}, {19})
+
+    def test_voucher_summary(self):
+        summary = vouchers.voucher_summary('V-1')
+        self.assertEqual(summary['vendor_name'], 'Acme')
+        self.assertEqual(summary['voucher_date'], date(2026, 1, 2))
+        self.assertEqual(
+            [(line['item_name'], line['unit_price'], line['quantity']) for line in summary['receipts']],
+            [('Paper', Decimal('7.50'), 3), ('Pens', Decimal('2.00'), 15)],
+        )
+        self.assertEqual(summary['grand_total'], Decimal('52.50'))
+
+    def test_date_range_and_unknown_voucher(self):
+        summary = vouchers.voucher_summary('V-1', date(2026, 1, 3), date(2026, 1, 3))
+        self.assertEqual(summary['grand_total'], Decimal('32.50'))
+        summary = vouchers.voucher_summary('nope')
+        self.assertEqual((summary['voucher'], summary['receipts'], summary['grand_total']), (None, [], Decimal('0.00')))
+
+    def test_views(self):
+        self.client.force_login(factories.user())
+        response = self.client.get(reverse('voucher_detail', args=['V-1']))
+        self.assertEqual(response.context['grand_total'], Decimal('52.50'))
+        response = self.client.get(reverse('stock_list'), {'voucher': 'V-2'})
+        self.assertEqual([row['item_name'] for row in response.context['grouped_receipts']], ['Paper'])
+
+    def test_vendor_page_lists_receipts_without_a_voucher(self):
+        factories.receive(self.pens, 4, unit_price='3.00', day=date(2026, 1, 4))
+        self.client.force_login(factories.user())
+        response = self.client.get(reverse('vendor_detail', args=[self.vendor.id]))
+        self.assertEqual([voucher.number for voucher in response.context['vouchers']], ['V-2', 'V-1'])
+        self.assertEqual([(r.stock_item.name, r.quantity_received) for r in response.context['unvouchered']], [('Pens', 4)])
+        self.assertContains(response, 'Receipts Without a Voucher')
+        response = self.client.get(
+            reverse('vendor_detail', args=[self.vendor.id]), {'start': '2026-01-01', 'end': '2026-01-03'},
+        )
+        self.assertNotContains(response, 'Receipts Without a Voucher')
+
+
+class VoucherRowTests(TestCase):
+    def setUp(self):
+        self.vendor = factories.vendor()
+        self.item = factories.item(vendor=self.vendor)
+
+    def test_receipts_share_one_voucher(self):
+        first = factories.receive(self.item, 2, unit_price='3.00', day=date(2026, 1, 2), voucher='V-9')
+        second = factories.receive(self.item, 1, unit_price='4.00', voucher='V-9')
+        self.assertEqual(first.voucher_id, second.voucher_id)
+        voucher = Voucher.objects.get()
+        self.assertEqual((voucher.number, voucher.vendor, voucher.date), ('V-9', self.vendor, date(2026, 1, 2)))
+        self.assertEqual((voucher.total_quantity, voucher.total_price), (3, Decimal('10.00')))
+
+    def test_totals_follow_edits_and_deletes(self):
+        receipt = factories.receive(self.item, 2, unit_price='3.00', voucher='V-9')
+        factories.receive(self.item, 1, unit_price='4.00', voucher='V-9')
+        receipt.quantity_received = 5
+        receipt.save()
+        self.assertEqual(Voucher.objects.get().total_price, Decimal('19.00'))
+        receipt.delete()
+        self.assertEqual(Voucher.objects.get().total_price, Decimal('4.00'))
+
+    def test_editing_the_number_moves_the_receipt(self):
+        receipt = factories.receive(self.item, 2, unit_price='3.00', voucher='V-1')
+        factories.receive(self.item, 1, unit_price='4.00', voucher='V-1')
+        receipt = Receipt.objects.get(pk=receipt.pk)
+        receipt.voucher_number = 'V-2'
+        receipt.save()
+        receipt.refresh_from_db()
+        self.assertEqual(receipt.voucher.number, 'V-2')
+        self.assertEqual(
+            list(Voucher.objects.order_by('number').values_list('number', 'total_quantity', 'total_price')),
+            [('V-1', 1, Decimal('4.00')), ('V-2', 2, Decimal('6.00'))],
+        )
+        self.assertEqual(vouchers.voucher_summary('V-1')['grand_total'], Decimal('4.00'))
+
+    def test_queryset_update_of_the_number(self):
+        receipt = factories.receive(self.item, 2, unit_price='3.00', voucher='V-1')
+        Receipt.objects.filter(pk=receipt.pk).update(voucher_number='V-2')
+        self.assertEqual(Receipt.objects.get(pk=receipt.pk).voucher.number, 'V-2')
+        self.assertEqual(
+            list(Voucher.objects.order_by('number').values_list('number', 'total_quantity')), [('V-1', 0), ('V-2', 2)]
+        )
+
+    def test_vouchers_with_receipts_cannot_be_deleted(self):
+        receipt = factories.receive(self.item, 2, voucher='V-1')
+        with self.assertRaises(ProtectedError):
+            receipt.voucher.delete()
+        self.assertTrue(Receipt.objects.filter(pk=receipt.pk).exists())
+
+    def test_bulk_create(self):
+        Receipt.objects.bulk_create([
+            Receipt(stock_item=self.item, quantity_received=n, unit_price=Decimal('1.00'),
+                    date_received=factories.DAY, voucher_number=number)
+            for n, number in [(1, 'A'), (2, 'A'), (3, 'B')]
+        ])
+        self.assertEqual(
+            list(Voucher.objects.order_by('number').values_list('number', 'total_quantity', 'total_price')),
+            [('A', 3, Decimal('3.00')), ('B', 3, Decimal('3.00'))],
+        )
+        self.assertFalse(Receipt.objects.filter(voucher=None).exists())
+
+    def test_voucher_id_fills_the_number(self):
+        voucher = Voucher.objects.create(number='V-3', date=factories.DAY)
+        receipt = Receipt.objects.create(
+            stock_item=self.item, quantity_received=1, unit_price=Decimal('1.00'), date_received=factories.DAY,
+            voucher=voucher,
+        )
+        self.assertEqual(receipt.voucher_number, 'V-3')
@@ -1,6 +1,6 @@
 from django.urls import path, include  # ✅ Correct import
 from django.urls import path
-from . import views
+from . import api, views
 from .views import OfficeListView, OfficeCreateView, report_form_view, report_view
 from .views import report_search    
 from .views import report_view
@@ -27,9 +27,18 @@ urlpatterns = [
     path('issues/<str:date>/<int:office_id>/print/', views.issue_print, name='issue_print'),
     path('items/', ItemListView.as_view(), name='item_list'),
     path('items/new/', ItemCreateView.as_view(), name='item_create'),
+    path('items/lookup/', views.item_lookup, name='item_lookup'),
     path('report/', report_view, name='report_view'),
     path('report/form/', report_form_view, name='report_form'),
     path('report/pdf/', views.report_pdf, name='report_pdf'),
     path('report/search/', report_search, name='report_search'),
+    path('report/export/<str:fmt>/', views.report_export, name='report_export'),
+    path('search/', views.search_view, name='search'),
+    path('search/autocomplete/', views.search_autocomplete, name='search_autocomplete'),
+    path('import/', views.import_data, name='import_data'),
+    path('metrics/', views.metrics, name='metrics'),
+    path('api/', include(api.router.urls)),
+    path('print/batch/', views.batch_print, name='batch_print'),
+    path('renders/<slug:key>/', views.render_status, name='render_status'),
     path('accounts/', include('django.contrib.auth.urls')),  # login/logout
 ]
@@ -0,0 +1,431 @@
+"""
+Inventory valuation: FIFO and moving-average cost.
+
+Each item's receipts and issues are processed in (date, receipts before
+issues, id) order.
+- A receipt adds a ``CostLayer`` at its unit price and folds that price into
+  the moving average.
+- An issue consumes layers oldest first for its FIFO cost and is charged the
+  average at that moment for its average cost. Both are stored per issue in
+  ``IssueCost``.
+- ``ItemValuation`` holds the item's quantity, on-hand values and average,
+  and the position of the last movement applied.
+
+Updates are incremental. New rows that sort after an item's last movement
+are applied on top of its stored state and layers, in the same transaction
+as the write (the model signals and bulk_create hooks). A new row that sorts
+earlier (back-dated, or a receipt entered after a same-day issue) replays
+just that item's history. Edits and deletes mark the item stale, because
+they may run inside the item's own cascade delete, and ``refresh`` replays
+it once the transaction commits. Reads never write: ``revalue_stock``
+catches rows written around the models and any replay that failed.
+
+``value_as_of`` values every item at a past date without touching the
+stored state. It replays items in batches of ``ITEM_BATCH``, two queries a
+batch, and items with no movement after the date are read straight from
+``ItemValuation``.
+
+Issues beyond the stock on hand are costed at the current average (the
+item's purchase price if nothing was ever received). The next receipt makes
+up the shortfall before it adds a layer. Stock below zero is valued at 0.
+
+Items with archived history (store.archive) start from their
+``OpeningBalance`` quantity and average cost and their ``OpeningLayer``
+layers instead of from zero. Rows back-dated before the cutoff are applied
+after the opening balance. Values as of a day before the cutoff replay the
+archived rows, in date order.
+"""
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from . import archive
+from .models import (
+    CostLayer, Issue, IssueCost, ItemValuation, OpeningBalance, OpeningLayer, Receipt, StockItem, ValuationWatermark,
+)
+from .periods import as_date
+
+RECEIPT, ISSUE = 0, 1
+CENTS = Decimal('0.01')
+AVERAGE_PLACES = Decimal('0.0001')
+ITEM_BATCH = 500
+
+_local = threading.local()
+
+
+class ItemState:
+    """An item's valuation while movements are applied to it in memory."""
+
+    def __init__(self, stock_item_id, fallback_cost=Decimal('0'), row=None, layers=()):
+        self.stock_item_id = stock_item_id
+        self.fallback_cost = fallback_cost
+        self.row = row
+        self.quantity = row.quantity if row else 0
+        self.average_cost = row.average_cost if row else Decimal('0')
+        self.position = (row.last_date, row.last_kind, row.last_id) if row and row.last_date else None
+        self.layers = deque(layers)
+        self.loaded = {layer.pk: layer.remaining for layer in self.layers}
+        self.issue_costs = []
+        self.opened = False
+
+    def open(self, opening, layers):
+        """Start from an opening balance (store.archive) instead of from zero."""
+        self.quantity = opening.quantity
+        self.average_cost = opening.average_cost
+        self.layers = deque(
+            CostLayer(stock_item_id=self.stock_item_id, date=layer.date, unit_cost=layer.unit_cost,
+                      remaining=layer.quantity)
+            for layer in layers
+        )
+        self.opened = True
+
+    def receive(self, receipt_id, day, quantity, unit_cost):
+        shortfall = min(max(-self.quantity, 0), quantity)
+        if self.quantity <= 0:
+            self.average_cost = unit_cost
+        else:
+            self.average_cost = (
+                (self.quantity * self.average_cost + quantity * unit_cost) / (self.quantity + quantity)
+            ).quantize(AVERAGE_PLACES)
+        self.quantity += quantity
+        if quantity > shortfall:
+            self.layers.append(CostLayer(
+                stock_item_id=self.stock_item_id, receipt_id=receipt_id, date=day,
+                unit_cost=unit_cost, remaining=quantity - shortfall,
+            ))
+
+    def issue(self, issue_id, quantity):
+        fifo, left = Decimal('0'), quantity
+        while left and self.layers:
+            layer = self.layers[0]
+            taken = min(left, layer.remaining)
+            fifo += taken * layer.unit_cost
+            layer.remaining -= taken
+            left -= taken
+            if not layer.remaining:
+                self.layers.popleft()
+        unit_average = self.average_cost or self.fallback_cost
+        fifo += left * unit_average
+        self.quantity -= quantity
+        self.issue_costs.append(IssueCost(
+            issue_id=issue_id, fifo_cost=fifo.quantize(CENTS),
+            average_cost=(quantity * unit_average).quantize(CENTS),
+        ))
+
+    def apply(self, event):
+        day, kind, pk, quantity, unit_cost = event
+        if kind == RECEIPT:
+            self.receive(pk, day, quantity, unit_cost)
+        else:
+            self.issue(pk, quantity)
+        self.position = (day, kind, pk)
+
+    def values(self):
+        fifo_value = sum((layer.remaining * layer.unit_cost for layer in self.layers), Decimal('0'))
+        return {
+            'quantity': self.quantity,
+            'fifo_value': fifo_value.quantize(CENTS),
+            'average_cost': self.average_cost,
+            'average_value': (max(self.quantity, 0) * self.average_cost).quantize(CENTS),
+        }
+
+
+# ---------------- Movements ----------------
+def _events(receipts, issues):
+    """{item_id: [(date, kind, id, quantity, unit_cost)]} in processing order."""
+    events = {}
+    for item_id, day, pk, quantity, unit_cost in receipts.values_list(
+        'stock_item_id', 'date_received', 'id', 'quantity_received', 'unit_price'
+    ).order_by().iterator(chunk_size=2000):
+        events.setdefault(item_id, []).append((day, RECEIPT, pk, quantity, unit_cost))
+    for item_id, day, pk, quantity in issues.values_list(
+        'stock_item_id', 'date_issued', 'id', 'quantity_issued'
+    ).order_by().iterator(chunk_size=2000):
+        events.setdefault(item_id, []).append((day, ISSUE, pk, quantity, None))
+    for item_events in events.values():
+        item_events.sort()
+    return events
+
+
+def _fallback_costs(stock_item_ids):
+    return dict(StockItem.objects.filter(pk__in=stock_item_ids).values_list('pk', 'purchase_price'))
+
+
+def _batches(ids):
+    ids = sorted(ids)
+    for start in range(0, len(ids), ITEM_BATCH):
+        yield ids[start:start + ITEM_BATCH]
+
+
+def _openings(stock_item_ids):
+    """({item_id: OpeningBalance}, {item_id: [OpeningLayer]}) for items with archived history."""
+    openings = {opening.stock_item_id: opening for opening in OpeningBalance.objects.filter(
+        stock_item_id__in=stock_item_ids
+    )}
+    layers = {}
+    # In FIFO order: a back-dated receipt's layer may carry an earlier date.
+    for layer in OpeningLayer.objects.filter(stock_item_id__in=openings).order_by('stock_item_id', 'id'):
+        layers.setdefault(layer.stock_item_id, []).append(layer)
+    return openings, layers
+
+
+def replay(stock_item_ids, through=None):
+    """
+    Yield each item's ``ItemState`` after its movements up to ``through``
+    (all of them if None), writing nothing. Items start from their opening
+    balance, or from the archived rows when ``through`` is before the
+    archive cutoff.
+    """
+    from_archive = through is not None and archive.overlaps(after=through)
+    for batch in _batches(stock_item_ids):
+        receipts = Receipt.objects.filter(stock_item_id__in=batch)
+        issues = Issue.objects.filter(stock_item_id__in=batch)
+        if through is not None:
+            receipts = receipts.filter(date_received__lte=through)
+            issues = issues.filter(date_issued__lte=through)
+        events = _events(receipts, issues)
+        openings, layers = {}, {}
+        if from_archive:
+            archived = _events(
+                archive.receipts(end=through).filter(stock_item_id__in=batch),
+                archive.issues(end=through).filter(stock_item_id__in=batch),
+            )
+            for item_id, item_events in archived.items():
+                events[item_id] = sorted(events.get(item_id, []) + item_events)
+        else:
+            openings, layers = _openings(batch)
+        fallback = _fallback_costs(batch)
+        for item_id in batch:
+            if item_id not in fallback:
+                continue  # deleted meanwhile
+            state = ItemState(item_id, fallback[item_id])
+            if item_id in openings:
+                state.open(openings[item_id], layers.get(item_id, ()))
+            for event in events.get(item_id, ()):
+                state.apply(event)
+            yield state
+
+
+# ---------------- Writes ----------------
+@contextmanager
+def batch():
+    """
+    Record the rows created inside the block together when it exits, so
+    receipts and issues bulk-created separately are still applied in date
+    order (one incremental pass instead of a replay per item).
+    """
+    outer = getattr(_local, 'pending', None)
+    _local.pending = [] if outer is None else outer
+    try:
+        yield
+        if outer is None:
+            record(_local.pending)
+    finally:
+        if outer is None:
+            _local.pending = None
+
+
+def record(instances):
+    """
+    Apply newly created Receipt/Issue rows. Items whose state is stale or
+    missing, or already past one of the rows, are replayed instead.
+    """
+    pending = getattr(_local, 'pending', None)
+    if pending is not None and pending is not instances:
+        pending.extend(instances)
+        return
+    by_item = {}
+    for instance in instances:
+        if isinstance(instance, Receipt):
+            event = (as_date(instance.date_received), RECEIPT, instance.pk, instance.quantity_received,
+                     Decimal(str(instance.unit_price)))
+        else:
+            event = (as_date(instance.date_issued), ISSUE, instance.pk, instance.quantity_issued, None)
+        by_item.setdefault(instance.stock_item_id, []).append(event)
+    if not by_item:
+        return
+
+    rows = {
+        row.stock_item_id: row
+        for row in ItemValuation.objects.select_for_update().filter(stock_item_id__in=by_item, stale=False)
+    }
+    layers = {}
+    for layer in CostLayer.objects.filter(stock_item_id__in=rows).order_by('stock_item_id', 'date', 'receipt_id'):
+        layers.setdefault(layer.stock_item_id, []).append(layer)
+    fallback = _fallback_costs(rows)
+
+    states, replay = [], []
+    for item_id, events in by_item.items():
+        row = rows.get(item_id)
+        events.sort(key=lambda event: event[:3])
+        if row is None or (row.last_date and events[0][:3] <= (row.last_date, row.last_kind, row.last_id)):
+            replay.append(item_id)
+            continue
+        state = ItemState(item_id, fallback.get(item_id, Decimal('0')), row, layers.get(item_id, ()))
+        for event in events:
+            state.apply(event)
+        states.append(state)
+    _save(states)
+    if replay:
+        rebuild(replay)
+
+
+def invalidate(stock_item_ids):
+    """Mark items stale (edits, deletes, back-dated rows) and replay them after the commit."""
+    stock_item_ids = set(filter(None, stock_item_ids))
+    if stock_item_ids:
+        ItemValuation.objects.filter(stock_item_id__in=stock_item_ids, stale=False).update(stale=True)
+        # A failed replay leaves the items stale for revalue_stock.
+        transaction.on_commit(lambda: refresh(stock_item_ids), robust=True)
+
+
+def _save(states):
+    """Write the states back: valuation rows, changed layers and new issue costs."""
+    if not states:
+        return
+    rows, new_rows, new_layers, changed_layers, removed_layers, costs = [], [], [], [], [], []
+    for state in states:
+        row = state.row or ItemValuation(stock_item_id=state.stock_item_id)
+        for field, value in state.values().items():
+            setattr(row, field, value)
+        row.last_date, row.last_kind, row.last_id = state.position or (None, 0, 0)
+        row.stale = False
+        (rows if row.pk else new_rows).append(row)
+
+        kept = set()
+        for layer in state.layers:
+            if layer.pk is None:
+                new_layers.append(layer)
+            else:
+                kept.add(layer.pk)
+                if layer.remaining != state.loaded[layer.pk]:
+                    changed_layers.append(layer)
+        removed_layers += [pk for pk in state.loaded if pk not in kept]
+        costs += state.issue_costs
+
+    ItemValuation.objects.bulk_update(rows, [
+        'quantity', 'fifo_value', 'average_cost', 'average_value', 'last_date', 'last_kind', 'last_id', 'stale',
+    ], batch_size=500)
+    ItemValuation.objects.bulk_create(new_rows, batch_size=500)
+    CostLayer.objects.filter(pk__in=removed_layers).delete()
+    CostLayer.objects.bulk_update(changed_layers, ['remaining'], batch_size=500)
+    CostLayer.objects.bulk_create(new_layers, batch_size=1000)
+    IssueCost.objects.bulk_create(costs, batch_size=1000)
+
+
+def rebuild(stock_item_ids=None):
+    """Replay the full history of the given items (every item if None)."""
+    if stock_item_ids is None:
+        stock_item_ids = StockItem.objects.values_list('pk', flat=True)
+    count = 0
+    for batch in _batches(stock_item_ids):
+        with transaction.atomic():
+            rows = {
+                row.stock_item_id: row
+                for row in ItemValuation.objects.select_for_update().filter(stock_item_id__in=batch)
+            }
+            CostLayer.objects.filter(stock_item_id__in=batch).delete()
+            IssueCost.objects.filter(issue__stock_item_id__in=batch).delete()
+            states = list(replay(batch))
+            for state in states:
+                state.row = rows.get(state.stock_item_id)
+            _save(states)
+        count += len(batch)
+    return count
+
+
+def refresh(stock_item_ids=None):
+    """Replay the items that are stale or have no valuation yet; returns how many."""
+    items = StockItem.objects.filter(Q(valuation__isnull=True) | Q(valuation__stale=True))
+    if stock_item_ids is not None:
+        items = items.filter(pk__in=stock_item_ids)
+    ids = list(items.values_list('pk', flat=True))
+    return rebuild(ids) if ids else 0
+
+
+def catch_up(full=False):
+    """
+    Mark the items of rows changed since the watermark stale (writes that
+    bypassed the models) and refresh every stale item. Returns the number
+    of items replayed. The watermark is ``ValuationWatermark``, separate from
+    the rollups' so rebuilding one never resets the other.
+    """
+    started = timezone.now()
+    watermark = ValuationWatermark.objects.first()
+    if full:
+        count = rebuild()
+    else:
+        if watermark is not None:
+            since = watermark.processed_until
+            invalidate(
+                set(Receipt.objects.filter(updated_at__gt=since).values_list('stock_item_id', flat=True).distinct())
+                | set(Issue.objects.filter(updated_at__gt=since).values_list('stock_item_id', flat=True).distinct())
+            )
+        count = refresh()
+    ValuationWatermark.objects.update_or_create(pk=1, defaults={'processed_until': started})
+    return count
+
+
+# ---------------- As-of valuation ----------------
+def value_as_of(as_of, stock_item_ids=None, use_stored=True):
+    """
+    {item_id: {'quantity', 'fifo_value', 'average_cost', 'average_value'}}
+    at the end of ``as_of``, for items with any movement up to then. With
+    ``use_stored=False`` every item is replayed.
+    """
+    items = StockItem.objects.all()
+    if stock_item_ids is not None:
+        items = items.filter(pk__in=stock_item_ids)
+    receipts = Receipt.objects.filter(stock_item=OuterRef('pk'))
+    issues = Issue.objects.filter(stock_item=OuterRef('pk'))
+    earlier = (
+        Exists(receipts.filter(date_received__lte=as_of)) | Exists(issues.filter(date_issued__lte=as_of))
+        | Exists(OpeningBalance.objects.filter(stock_item=OuterRef('pk')))
+    )
+    later = Exists(receipts.filter(date_received__gt=as_of)) | Exists(issues.filter(date_issued__gt=as_of))
+    # Items with nothing dated after as_of are valued exactly as stored
+    # (unless archived rows after as_of are folded into their opening).
+    stored = Q(valuation__stale=False, valuation__last_date__lte=as_of) & ~later
+    if archive.overlaps(after=as_of):
+        stored &= Q(opening__isnull=True)
+    if not use_stored:
+        stored = Q(pk__in=[])
+    result = {
+        row['stock_item_id']: row
+        for row in ItemValuation.objects.filter(stock_item__in=items.filter(stored).values('pk')).values(
+            'stock_item_id', 'quantity', 'fifo_value', 'average_cost', 'average_value'
+        )
+    }
+    for state in replay(items.filter(earlier).exclude(stored).values_list('pk', flat=True), through=as_of):
+        if state.position is not None or state.opened:
+            result[state.stock_item_id] = {'stock_item_id': state.stock_item_id, **state.values()}
+    return result
+
+
+def totals(values):
+    """Sum of the on-hand values in a ``value_as_of`` result."""
+    return {
+        'fifo_value': sum((row['fifo_value'] for row in values.values()), Decimal('0')),
+        'average_value': sum((row['average_value'] for row in values.values()), Decimal('0')),
+    }
+
+
+def verify():
+    """[(item_id, stored, expected)] for fresh valuations that differ from a full replay."""
+    expected = value_as_of(date.max, use_stored=False)
+    mismatches = []
+    for row in ItemValuation.objects.filter(stale=False).values(
+        'stock_item_id', 'quantity', 'fifo_value', 'average_cost', 'average_value'
+    ):
+        empty = {'stock_item_id': row['stock_item_id'], 'quantity': 0, 'fifo_value': Decimal('0'),
+                 'average_cost': row['average_cost'], 'average_value': Decimal('0')}
+        replayed = expected.get(row['stock_item_id'], empty)
+        if any(row[field] != replayed[field] for field in row):
+            mismatches.append((row['stock_item_id'], row, replayed))
+    return mismatches
@@ -1,48 +1,40 @@
-from django.shortcuts import render, get_object_or_404, redirect
+from datetime import date
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
-from django.http import FileResponse
-from django.template.loader import get_template
-from django.utils.dateparse import parse_date
-from django.views.generic import ListView, CreateView
-from django.urls import reverse_lazy
-from django.db.models import Q, Sum, F
+from django.db import transaction
+from django.db.models import F, Max, Sum
+from django.db.models.functions import Coalesce
 from django.forms import modelformset_factory
-from collections import defaultdict
-from django.views.generic import ListView
-from .forms import VendorReceiptForm
-from .models import VendorStock
-from datetime import date
-import json, io
-from xhtml2pdf import pisa
-from decimal import Decimal
-from django.db import models
-from django.views.generic import ListView, CreateView
-from .models import StockItem
-from .forms import StockItemForm
-from .models import Vendor, StockItem
-from .forms import VendorStockForm
-
-from .models import Vendor, StockItem, Issue, Receipt, Office, StockItem, StockCategory
-from .forms import VendorForm, StockItemForm, IssueForm, OfficeForm, ReportSearchForm
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse_lazy
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import condition
+from django.views.generic import CreateView, ListView
+
+from .forms import BatchPrintForm, ImportForm, IssueForm, OfficeForm, StockItemForm, VendorForm, VendorStockForm
+from .models import Issue, Office, Receipt, StockCategory, StockItem, Vendor, VendorStock, Voucher
+from . import dashboard as dashboard_metrics
+from . import (
+    batchprint, conditional, exports, importer, instrumentation, issuance, pagination, rendering, reports, search,
+    vouchers,
+)
+
+ITEM_LOOKUP_PAGE = 20
 
 # ---------------- Dashboard ----------------
 @login_required
 def dashboard(request):
-    context = {
-        'vendor_count': Vendor.objects.count(),
-        'stock_count': StockItem.objects.count(),
-        'issue_count': Issue.objects.count(),
-        'low_stock_items': StockItem.objects.filter(quantity__lt=40),
-    }
-    return render(request, 'store/dashboard.html', context)
+    return render(request, 'store/dashboard.html', dashboard_metrics.metrics())
 
 # ---------------- Vendor Views ----------------
 @login_required
 def vendor_list(request):
     query = request.GET.get('q', '')
-    vendors = Vendor.objects.all()
-    if query:
-        vendors = vendors.filter(Q(name__icontains=query) | Q(contact__icontains=query))
+    vendors = search.filter_queryset(Vendor.objects.all(), 'vendor', query)
     return render(request, 'store/vendor_list.html', {'vendors': vendors})
 
 @login_required
@@ -54,6 +46,7 @@ def vendor_create(request):
     return render(request, 'store/vendor_form.html', {'form': form})
 
 @login_required
+@condition(etag_func=conditional.vendor_etag, last_modified_func=conditional.vendor_last_modified)
 def vendor_detail(request, vendor_id):
     vendor = get_object_or_404(Vendor, id=vendor_id)
     stock_items = StockItem.objects.filter(vendor=vendor)
@@ -65,21 +58,17 @@ def vendor_detail(request, vendor_id):
     else:
         receipts = Receipt.objects.filter(stock_item__in=stock_items)
 
-    vouchers = (
-        Receipt.objects.filter(stock_item__vendor=vendor)
-        .values('voucher_number')
-        .annotate(
-            total_items=Sum('quantity_received'),
-            total_price=Sum(F('unit_price') * F('quantity_received'), output_field=models.DecimalField()),
-            date=F('date_received')
-        ).order_by('-date')
-    )
+    page = pagination.paginate(Voucher.objects.filter(vendor=vendor), request.GET, ('-date', '-id'))
+    # Receipts entered without a voucher number belong to no Voucher row.
+    unvouchered = receipts.filter(voucher__isnull=True).select_related('stock_item').order_by('-date_received', '-id')
 
     return render(request, 'store/vendor_detail.html', {
         'vendor': vendor,
         'stock_items': stock_items,
         'receipts': receipts,
-        'vouchers': vouchers,
+        'unvouchered': unvouchered,
+        'vouchers': page,
+        'page': page,
         'start': request.GET.get('start', ''),
         'end': request.GET.get('end', '')
     })
@@ -96,16 +85,26 @@ def add_vendor_stock(request, vendor_id):
 
         if formset.is_valid():
             instances = formset.save(commit=False)
-            for item in instances:
-                item.vendor = vendor
-                item.save()
-                Receipt.objects.create(
-                    stock_item=item.stock_item,
-                    quantity_received=item.quantity,
-                    unit_price=item.purchase_price,
-                    date_received=voucher_date,
-                    voucher_number=voucher_number
-                )
+            with transaction.atomic():
+                voucher = None
+                if voucher_number:
+                    voucher, _ = Voucher.objects.get_or_create(
+                        number=voucher_number, defaults={'vendor': vendor, 'date': voucher_date}
+                    )
+                for item in instances:
+                    item.vendor = vendor
+                VendorStock.objects.bulk_create(instances)
+                Receipt.objects.bulk_create([
+                    Receipt(
+                        stock_item=item.stock_item,
+                        quantity_received=item.quantity,
+                        unit_price=item.purchase_price,
+                        date_received=voucher_date,
+                        voucher=voucher,
+                        voucher_number=voucher_number or '',
+                    )
+                    for item in instances
+                ])
             return redirect('vendor_detail', vendor_id=vendor.id)
         else:
             print(formset.errors)
@@ -121,25 +120,22 @@ def add_vendor_stock(request, vendor_id):
 # ---------------- Stock Views ----------------
 @login_required
 def stock_list(request):
-    receipts = Receipt.objects.select_related('stock_item', 'stock_item__vendor').order_by('-date_received')
-    grouped = defaultdict(list)
-    for r in receipts:
-        key = (r.voucher_number, r.stock_item.name)
-        grouped[key].append(r)
-
-    grouped_receipts = []
-    for (voucher_number, item_name), items in grouped.items():
-        grouped_receipts.append({
-            'voucher_number': voucher_number,
-            'item_name': item_name,
-            'vendor_name': items[0].stock_item.vendor.name,
-            'total_quantity': sum(r.quantity_received for r in items),
-            'unit_price': items[0].unit_price,
-            'total_price': sum(r.quantity_received * r.unit_price for r in items),
-            'date_received': items[0].date_received,
-        })
-
-    return render(request, 'store/stock_list.html', {'grouped_receipts': grouped_receipts})
+    receipts = Receipt.objects.all()
+    if request.GET.get('voucher'):
+        receipts = receipts.filter(voucher_number__icontains=request.GET['voucher'])
+    if request.GET.get('item'):
+        receipts = receipts.filter(stock_item__name__icontains=request.GET['item'])
+    if request.GET.get('vendor'):
+        receipts = receipts.filter(stock_item__vendor__name__icontains=request.GET['vendor'])
+    if parse_date(request.GET.get('date', '')):
+        receipts = receipts.filter(date_received=parse_date(request.GET['date']))
+
+    grouped = vouchers.group_receipts(
+        receipts, 'date_received', 'voucher_number', item_name=F('stock_item__name')
+    ).annotate(unit_price=Max('unit_price'))
+    page = pagination.paginate(grouped, request.GET, ('-date_received', '-last_id'), window=receipts)
+
+    return render(request, 'store/stock_list.html', {'grouped_receipts': page, 'page': page})
 
 @login_required
 def stock_create(request):
@@ -164,10 +160,24 @@ def stock_create(request):
 # ---------------- Issue Views ----------------
 @login_required
 def issue_list(request):
-    issues = Issue.objects.values('date_issued', 'stock_item__name', 'office__name', 'remarks').annotate(
-        total_quantity=Sum('quantity_issued')
-    ).order_by('-date_issued')
-    return render(request, 'store/issue_list.html', {'recent_issues': issues})
+    issues = Issue.objects.all()
+    if parse_date(request.GET.get('date', '')):
+        issues = issues.filter(date_issued=parse_date(request.GET['date']))
+    if request.GET.get('item'):
+        issues = issues.filter(stock_item__name__icontains=request.GET['item'])
+    if request.GET.get('office'):
+        issues = issues.filter(office__name__icontains=request.GET['office'])
+    if request.GET.get('remarks'):
+        issues = issues.filter(remarks__icontains=request.GET['remarks'])
+
+    grouped = issues.values('date_issued', 'stock_item__name', 'office__name', 'remarks').annotate(
+        total_quantity=Sum('quantity_issued'),
+        last_id=Max('id'),
+    )
+    if request.GET.get('quantity', '').isdigit():
+        grouped = grouped.filter(total_quantity=int(request.GET['quantity']))
+    page = pagination.paginate(grouped, request.GET, ('-date_issued', '-last_id'), window=issues)
+    return render(request, 'store/issue_list.html', {'recent_issues': page, 'page': page})
 
 @login_required
 def issue_create(request):
@@ -175,85 +185,95 @@ def issue_create(request):
     if request.method == 'POST' and form.is_valid():
         form.save()
         return redirect('issue_create')
-    stock_items = StockItem.objects.all()
-    stock_data = {str(i.id): i.total_quantity_available() for i in stock_items}
     recent_issues = Issue.objects.values('date_issued', 'stock_item__name', 'office__name', 'remarks').annotate(
         quantity_issued=Sum('quantity_issued')).order_by('-date_issued')
     return render(request, 'store/issue_form.html', {
         'form': form,
-        'stock_data_json': json.dumps(stock_data),
         'recent_issues': recent_issues
     })
 
 # ---------------- Reports ----------------
+def _report_pdf_response(filters):
+    receipts = reports.receipts(**filters) if filters['include_receipts'] else Receipt.objects.none()
+    issues = reports.issues(**filters) if filters['include_issues'] else Issue.objects.none()
+    # Archived rows (store.archive) when the range reaches back to the cutoff.
+    archived_receipts = list(reports.archived_receipts(**filters)) if filters['include_receipts'] else []
+    archived_issues = list(reports.archived_issues(**filters)) if filters['include_issues'] else []
+    rows = [(filters['show_vendor'], filters['show_office'])]
+    rows += [
+        ('archived', receipt.id, receipt.stock_item.name, receipt.stock_item.vendor.name, receipt.stock_item.unit,
+         receipt.unit_price, receipt.quantity_received, receipt.date_received)
+        for receipt in archived_receipts
+    ]
+    rows += receipts.values_list(
+        'id', 'stock_item__name', 'stock_item__vendor__name', 'stock_item__unit',
+        'unit_price', 'quantity_received', 'date_received',
+    )
+    rows += [
+        ('archived', issue.id, issue.stock_item.name, issue.stock_item.vendor.name, issue.stock_item.unit,
+         issue.fifo_cost, issue.quantity_issued, issue.office.name if issue.office else None, issue.date_issued)
+        for issue in archived_issues
+    ]
+    rows += issues.values_list(
+        'id', 'stock_item__name', 'stock_item__vendor__name', 'stock_item__unit',
+        'cost__fifo_cost', 'quantity_issued', 'office__name', 'date_issued',
+    )
+    return rendering.pdf_response(
+        'report', 'store/report_pdf.html', rows, lambda: {
+            'issues': [*archived_issues, *issues],
+            'receipts': [*archived_receipts, *receipts],
+            'show_vendor': filters['show_vendor'],
+            'show_office': filters['show_office'],
+        },
+        filename='filtered_report.pdf', as_attachment=True, wait=settings.STORE_PDF_WAIT,
+    )
+
 @login_required
 def report_pdf(request):
-    query = request.GET.get('q', '')
-    items = StockItem.objects.filter(Q(name__icontains=query) | Q(vendor__name__icontains=query)) if query else StockItem.objects.all()
-    html = get_template('store/report_pdf.html').render({'items': items})
-    buffer = io.BytesIO()
-    pisa.CreatePDF(html, dest=buffer)
-    buffer.seek(0)
-    return FileResponse(buffer, as_attachment=True, filename='filtered_report.pdf')
+    filters = reports.report_filters(request.GET)
+    if not filters['include_receipts'] and not filters['include_issues']:
+        filters['include_receipts'] = filters['include_issues'] = True
+    return _report_pdf_response(filters)
 
 @login_required
 def report_search(request):
-    start = request.GET.get("start_date")
-    end = request.GET.get("end_date")
-    office = request.GET.get("office")
-    query = request.GET.get("query")
-
-    issues = Issue.objects.all()
-    if start: issues = issues.filter(date_issued__gte=start)
-    if end: issues = issues.filter(date_issued__lte=end)
-    if office: issues = issues.filter(office_id=office)
-    if query: issues = issues.filter(stock_item__name__icontains=query)
-
-    report = issues.values('date_issued', 'office__name', 'stock_item__name').annotate(total_quantity=Sum('quantity_issued')).order_by('-date_issued')
+    filters = reports.report_filters(request.GET)
+    report = reports.issue_summary(**filters)
     return render(request, "store/report_search.html", {
         "report": report,
-        "start_date": start,
-        "end_date": end,
-        "selected_office": office,
-        "query": query,
+        "received": reports.receipt_summary(**filters),
+        "start_date": request.GET.get("start_date"),
+        "end_date": request.GET.get("end_date"),
+        "selected_office": request.GET.get("office"),
+        "query": request.GET.get("query"),
         "offices": Office.objects.all()
     })
 
 @login_required
-def report_view(request):
-    show_vendor = 'show_vendor' in request.GET
-    show_office = 'show_office' in request.GET
-    include_receipts = 'include_receipts' in request.GET
-    include_issues = 'include_issues' in request.GET
-    start = request.GET.get('start_date')
-    end = request.GET.get('end_date')
+def report_export(request, fmt):
+    if fmt not in exports.FORMATS:
+        raise Http404("Unknown export format.")
+    return exports.export_response(request.GET, fmt)
 
-    issues = Issue.objects.all()
-    receipts = Receipt.objects.all()
-    if start:
-        issues = issues.filter(date_issued__gte=start)
-        receipts = receipts.filter(date_received__gte=start)
-    if end:
-        issues = issues.filter(date_issued__lte=end)
-        receipts = receipts.filter(date_received__lte=end)
+@login_required
+def report_view(request):
+    filters = reports.report_filters(request.GET)
 
     if 'export' in request.GET:
-        html = get_template('store/report_pdf.html').render({
-            'issues': issues if include_issues else [],
-            'receipts': receipts if include_receipts else [],
-            'show_vendor': show_vendor,
-            'show_office': show_office,
-        })
-        buffer = io.BytesIO()
-        pisa.CreatePDF(html, dest=buffer)
-        buffer.seek(0)
-        return FileResponse(buffer, as_attachment=True, filename='filtered_report.pdf')
+        return _report_pdf_response(filters)
 
+    stock_as_of = reports.stock_as_of(
+        filters['as_of'], filters['query'], filters['office']
+    ) if filters['as_of'] else None
     return render(request, 'store/report.html', {
-        'issues': issues if include_issues else [],
-        'receipts': receipts if include_receipts else [],
-        'show_vendor': show_vendor,
-        'show_office': show_office,
+        'issues': reports.issues(**filters) if filters['include_issues'] else [],
+        'receipts': reports.receipts(**filters) if filters['include_receipts'] else [],
+        'show_vendor': filters['show_vendor'],
+        'show_office': filters['show_office'],
+        'as_of': filters['as_of'],
+        'stock_as_of': stock_as_of,
+        'stock_value': reports.stock_value(stock_as_of) if stock_as_of else None,
+        'office_filter': filters['office'],
     })
 
 # ---------------- Office Management ----------------
@@ -263,10 +283,7 @@ class OfficeListView(ListView):
     context_object_name = 'object_list'
 
     def get_queryset(self):
-        query = self.request.GET.get('q')
-        if query:
-            return Office.objects.filter(name__icontains=query)
-        return Office.objects.all()
+        return search.filter_queryset(Office.objects.all(), 'office', self.request.GET.get('q', ''))
 
 class OfficeCreateView(CreateView):
     model = Office
@@ -288,145 +305,96 @@ def report_form_view(request):
 
 # ---------------- Voucher Views ----------------
 @login_required
+@condition(etag_func=conditional.voucher_etag, last_modified_func=conditional.voucher_last_modified)
 def voucher_detail(request, voucher_number):
-    receipts = Receipt.objects.filter(voucher_number=voucher_number).select_related('stock_item', 'stock_item__vendor')
-
     # Apply date filter if search=true is in query
     if request.GET.get("search") == "true":
         start = request.GET.get("start")
         end = request.GET.get("end")
-        if start and end:
-            receipts = receipts.filter(date_received__range=[start, end])
     else:
         start = end = None
 
-    # Group items by (name, unit_price)
-    grouped_data = defaultdict(lambda: {"quantity": 0, "total_price": Decimal("0.00")})
-    for receipt in receipts:
-        key = (receipt.stock_item.name, receipt.unit_price)
-        grouped_data[key]["quantity"] += receipt.quantity_received
-        grouped_data[key]["total_price"] += receipt.quantity_received * receipt.unit_price
-
-    grouped_receipts = []
-    for (name, unit_price), values in grouped_data.items():
-        grouped_receipts.append({
-            "item_name": name,
-            "unit_price": unit_price,
-            "quantity": values["quantity"],
-            "total_price": values["total_price"]
-        })
-
-    grand_total = sum(item["total_price"] for item in grouped_receipts)
-    vendor_name = receipts[0].stock_item.vendor.name if receipts else ""
-    voucher_date = receipts[0].date_received if receipts else ""
-
-    return render(request, 'store/voucher_detail.html', {
-        "voucher_number": voucher_number,
-        "vendor_name": vendor_name,
-        "voucher_date": voucher_date,
-        "receipts": grouped_receipts,
-        "grand_total": grand_total,
+    context = vouchers.voucher_summary(voucher_number, start, end)
+    context.update({
         "search_mode": request.GET.get("search") == "true",
         "start": start,
         "end": end,
     })
+    return render(request, 'store/voucher_detail.html', context)
 
 @login_required
+@condition(etag_func=conditional.voucher_etag, last_modified_func=conditional.voucher_last_modified)
 def voucher_print(request, voucher_number):
-    receipts = Receipt.objects.filter(voucher_number=voucher_number).select_related('stock_item', 'stock_item__vendor')
-
-    # Group items by (item name, unit price)
-    grouped_data = defaultdict(lambda: {"quantity": 0, "total_price": Decimal("0.00")})
-    for receipt in receipts:
-        key = (receipt.stock_item.name, receipt.unit_price)
-        grouped_data[key]["quantity"] += receipt.quantity_received
-        grouped_data[key]["total_price"] += receipt.quantity_received * receipt.unit_price
-
-    grouped_receipts = []
-    for (name, unit_price), values in grouped_data.items():
-        grouped_receipts.append({
-            "item_name": name,
-            "unit_price": unit_price,
-            "quantity": values["quantity"],
-            "total_price": values["total_price"]
-        })
-
-    grand_total = sum(item["total_price"] for item in grouped_receipts)
-    vendor_name = receipts[0].stock_item.vendor.name if receipts else ""
-    voucher_date = receipts[0].date_received if receipts else ""
-
-    html = get_template('store/voucher_print.html').render({
-        "voucher_number": voucher_number,
-        "vendor_name": vendor_name,
-        "voucher_date": voucher_date,
-        "receipts": grouped_receipts,
-        "grand_total": grand_total
-    })
+    context = vouchers.voucher_summary(voucher_number)
 
-    buffer = io.BytesIO()
-    pisa.CreatePDF(html, dest=buffer)
-    buffer.seek(0)
-
-    return FileResponse(buffer, content_type='application/pdf')
+    return rendering.pdf_response(
+        'voucher', 'store/voucher_print.html', batchprint.voucher_rows(context), lambda: context,
+        filename=f'voucher_{voucher_number}.pdf', wait=settings.STORE_PDF_WAIT,
+    )
 
 
 @login_required
+@condition(etag_func=conditional.office_etag, last_modified_func=conditional.office_last_modified)
 def office_detail(request, office_id):
     office = get_object_or_404(Office, id=office_id)
 
-    issued_batches = (
-        Issue.objects.filter(office=office)
-        .values('date_issued', 'remarks')
-        .annotate(total_items=Sum('quantity_issued'), date=F('date_issued'))
-        .order_by('-date')
-    )
-
     return render(request, 'store/office_detail.html', {
         'office': office,
-        'issued_batches': issued_batches,
+        'issued_batches': reports.office_batches(office.id),
     })
 
 
+def _posted_date(value):
+    """A posted YYYY-MM-DD date, today if blank, or None if it isn't a valid date."""
+    value = value.strip()
+    if not value:
+        return date.today()
+    try:
+        return parse_date(value)
+    except ValueError:
+        return None
+
+
 @login_required
 def add_office_issue(request, office_id):
     office = get_object_or_404(Office, id=office_id)
-    IssueFormSet = modelformset_factory(Issue, form=IssueForm, extra=1)
-
-    # Show current stock levels in dropdown logic
-    stock_data = {str(item.id): item.quantity for item in StockItem.objects.all()}
+    IssueFormSet = modelformset_factory(
+        Issue, form=IssueForm, fields=['stock_item', 'quantity_issued', 'remarks'], extra=1
+    )
 
     if request.method == 'POST':
         formset = IssueFormSet(request.POST)
-        if formset.is_valid():
-            instances = formset.save(commit=False)
-            for issue in instances:
-                issue.office = office
-
-                # Save issue to DB
-                issue.save()
-
-                # ✅ Subtract from stock
-                stock_item = issue.stock_item
-                if stock_item.quantity >= issue.quantity_issued:
-                    stock_item.quantity -= issue.quantity_issued
-                    stock_item.save()
-                else:
-                    messages.error(request, f"Not enough stock for '{stock_item.name}'. Only {stock_item.quantity} available.")
-                    return redirect('add_office_issue', office_id=office.id)
-
-            return redirect('office_detail', office_id=office.id)
+        date_issued = _posted_date(request.POST.get('date_issued', ''))
+        if date_issued is None:
+            messages.error(request, "Nothing was issued: enter the issue date as YYYY-MM-DD.")
+        elif formset.is_valid():
+            try:
+                issuance.issue_stock(office, formset.save(commit=False), date_issued=date_issued)
+            except issuance.InsufficientStock as exc:
+                for form in formset:
+                    stock_item = form.cleaned_data.get('stock_item')
+                    if stock_item and stock_item.id in exc.shortages:
+                        _, available = exc.shortages[stock_item.id]
+                        form.add_error(
+                            'quantity_issued',
+                            f"Not enough stock for '{stock_item.name}'. Only {available} available.",
+                        )
+                messages.error(request, "Nothing was issued: some items don't have enough stock.")
+            else:
+                return redirect('office_detail', office_id=office.id)
     else:
         formset = IssueFormSet(queryset=Issue.objects.none())
 
     return render(request, 'store/add_office_issue.html', {
         'formset': formset,
         'office': office,
-        'stock_data': stock_data,
+        'date_issued': request.POST.get('date_issued', ''),
     })
 
 
 # View: Display issued items for a specific office on a date
 @login_required
+@condition(etag_func=conditional.issue_batch_etag, last_modified_func=conditional.issue_batch_last_modified)
 def issue_detail(request, date, office_id):
     office = get_object_or_404(Office, id=office_id)
 
@@ -445,9 +413,10 @@ def issue_detail(request, date, office_id):
 
 # View: Generate PDF of issued items
 @login_required
+@condition(etag_func=conditional.issue_batch_etag, last_modified_func=conditional.issue_batch_last_modified)
 def issue_print(request, date, office_id):
     office = get_object_or_404(Office, id=office_id)
-    issues = Issue.objects.filter(office=office, date_issued=date).select_related('stock_item')
+    issues = list(Issue.objects.filter(office=office, date_issued=date).select_related('stock_item').order_by('id'))
 
     template_path = 'store/issue_print.html'
     context = {
@@ -456,12 +425,108 @@ def issue_print(request, date, office_id):
         'issue_date': date,
     }
 
-    html = get_template(template_path).render(context)
-    response = io.BytesIO()
-    pisa.CreatePDF(html, dest=response)
-    response.seek(0)
+    return rendering.pdf_response(
+        'issue_slip', template_path, batchprint.issue_slip_rows(office, date, issues), lambda: context,
+        filename=f'issue_{date}_{office.id}.pdf', wait=settings.STORE_PDF_WAIT,
+    )
+
+
+@login_required
+def batch_print(request):
+    """Every issue slip or voucher in a date range, merged into one PDF."""
+    form = BatchPrintForm(request.GET or None)
+    if form.is_valid():
+        data = form.cleaned_data
+        documents = batchprint.documents(
+            data['kind'], data['start_date'], data['end_date'],
+            office_id=data['office'] and data['office'].pk, vendor_id=data['vendor'] and data['vendor'].pk,
+        )
+        if not documents:
+            form.add_error(None, "Nothing to print in that range.")
+        elif len(documents) > batchprint.MAX_DOCUMENTS:
+            form.add_error(None, (
+                f"That is {len(documents)} documents; narrow the range to {batchprint.MAX_DOCUMENTS} "
+                f"or use manage.py print_batch."
+            ))
+        else:
+            batch = batchprint.submit(documents)
+            filename = f"{data['kind']}_{data['start_date']}_{data['end_date']}.pdf"
+            if batch.join(settings.STORE_PDF_WAIT) == 'ready':
+                return rendering.file_response(batch.key, filename=filename)
+            return rendering.status_redirect(batch.key, filename=filename)
+    return render(request, 'store/batch_print.html', {'form': form, 'max_documents': batchprint.MAX_DOCUMENTS})
+
 
-    return FileResponse(response, content_type='application/pdf')
+@login_required
+def render_status(request, key):
+    """Poll endpoint for PDFs rendering in the background."""
+    state = rendering.status(key)
+    if state == 'ready':
+        return rendering.file_response(
+            key, filename=request.GET.get('filename') or None, as_attachment='download' in request.GET
+        )
+    if request.GET.get('format') == 'json':
+        return JsonResponse({'status': state})
+    if state == 'unknown':
+        raise Http404("Unknown render job.")
+    return render(request, 'store/render_status.html', {'status': state}, status=202 if state == 'pending' else 500)
+
+# ---------------- Search ----------------
+@login_required
+def search_view(request):
+    query = request.GET.get('q', '').strip()
+    kinds = request.GET.getlist('kind') or None
+    results = search.search(query, kinds) if query else []
+    if request.GET.get('format') == 'json':
+        return JsonResponse({'query': query, 'results': results})
+    return render(request, 'store/search.html', {'query': query, 'results': results})
+
+@login_required
+def search_autocomplete(request):
+    kind = request.GET.get('kind', 'item')
+    if kind not in search.KINDS:
+        raise Http404("Unknown search kind.")
+    matches = search.autocomplete(request.GET.get('q', ''), kind)
+    return JsonResponse({'results': [{'id': pk, 'name': name} for pk, name in matches]})
+
+@login_required
+def item_lookup(request):
+    """Item picker endpoint: matching items with their current balance, a page at a time."""
+    items = search.filter_queryset(StockItem.objects.all(), 'item', request.GET.get('q', ''))
+    page = pagination.paginate(
+        items.values('id', 'name', 'unit', available=Coalesce('balance__quantity_available', 0)),
+        request.GET, ('name', 'id'), per_page=ITEM_LOOKUP_PAGE,
+    )
+    return JsonResponse({
+        'results': list(page),
+        'next': f'{request.path}?{page.next_query}' if page.has_next else None,
+    })
+
+# ---------------- Instrumentation ----------------
+@staff_member_required
+def metrics(request):
+    """Per-view request metrics of this process, as JSON or (``?format=prometheus``) Prometheus text."""
+    if request.method == 'POST' and 'reset' in request.POST:
+        instrumentation.reset()
+    if request.GET.get('format') == 'prometheus':
+        return HttpResponse(instrumentation.prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+    return JsonResponse({'views': instrumentation.snapshot()})
+
+# ---------------- Data Import ----------------
+@login_required
+def import_data(request):
+    form = ImportForm(request.POST or None, request.FILES or None)
+    result = None
+    if request.method == 'POST' and form.is_valid():
+        upload = form.cleaned_data['file']
+        try:
+            result = importer.import_file(
+                upload, upload.name, form.cleaned_data['kind'],
+                create_missing=form.cleaned_data['create_missing'], dry_run=form.cleaned_data['dry_run'],
+            )
+        except importer.InvalidImport as e:
+            form.add_error('file', str(e))
+    return render(request, 'store/import_form.html', {'form': form, 'result': result})
 
 @login_required
 def category_list(request):
@@ -481,6 +546,15 @@ class ItemListView(ListView):
     template_name = 'store/item_list.html'
     context_object_name = 'items'
 
+    def get_queryset(self):
+        return search.filter_queryset(StockItem.objects.select_related('category'), 'item', self.request.GET.get('q', ''))
+
+    def get_context_data(self, **kwargs):
+        page = pagination.paginate(self.object_list, self.request.GET, ('name', 'id'))
+        context = super().get_context_data(object_list=page.object_list, **kwargs)
+        context['page'] = page
+        return context
+
 class ItemCreateView(CreateView):
     model = StockItem
     form_class = StockItemForm
@@ -0,0 +1,136 @@
+"""
+Voucher aggregation.
+
+Groups receipts in the database with ``values().annotate()`` instead of
+loading every Receipt and summing Decimals in Python. Grand totals come back
+on each row via a window function, so a voucher is one query.
+
+Receipts point at a ``Voucher`` row (looked up by its unique ``number``) that
+caches the voucher's vendor, date and totals; ``Receipt.voucher_number`` is
+kept in step for filtering and exports.
+"""
+from decimal import Decimal
+
+from django.db import models
+from django.db.models import F, Func, Max, Min, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Now
+
+from . import conditional, search
+from .models import Receipt, StockItem, Voucher
+
+LINE_TOTAL = F('quantity_received') * F('unit_price')
+
+
+class GrandTotal(Func):
+    """``SUM(<aggregate>) OVER ()``: the aggregate summed across all groups."""
+    template = 'SUM(%(expressions)s) OVER ()'
+
+
+def group_receipts(receipts, *fields, totals=False, **expressions):
+    """
+    Receipts grouped by ``fields``/``expressions`` with ``quantity``,
+    ``total_price``, ``first_date``, ``last_id`` and ``vendor_name`` per group.
+    With ``totals`` every row also carries ``grand_quantity``/``grand_total``.
+    """
+    grouped = receipts.values(*fields, **expressions).annotate(
+        quantity=Sum('quantity_received'),
+        total_price=Sum(LINE_TOTAL, output_field=models.DecimalField()),
+        first_date=Min('date_received'),
+        last_id=Max('id'),
+        vendor_name=Min('stock_item__vendor__name'),
+    )
+    if totals:
+        grouped = grouped.annotate(
+            grand_quantity=GrandTotal(Sum('quantity_received'), output_field=models.IntegerField()),
+            grand_total=GrandTotal(Sum(LINE_TOTAL), output_field=models.DecimalField()),
+        )
+    return grouped
+
+
+# ---------------- Voucher rows ----------------
+def attach_vouchers(receipts):
+    """
+    Point unsaved/edited receipts at their Voucher, creating missing vouchers
+    in one batch, and keep ``voucher_number`` in step with the voucher. When
+    the two disagree (the number was edited) the number wins; a blank number
+    is filled in from the voucher.
+    """
+    attached = {r.voucher_id for r in receipts if r.voucher_id and r.voucher_number}
+    if attached:
+        names = dict(Voucher.objects.filter(id__in=attached).values_list('id', 'number'))
+        for r in receipts:
+            if r.voucher_id and r.voucher_number and names.get(r.voucher_id) != r.voucher_number:
+                r.voucher_id = None
+
+    numbers = {r.voucher_number for r in receipts if r.voucher_number and not r.voucher_id}
+    if numbers:
+        found = dict(Voucher.objects.filter(number__in=numbers).values_list('number', 'id'))
+        missing = numbers - found.keys()
+        if missing:
+            vendors = dict(StockItem.objects.filter(
+                id__in={r.stock_item_id for r in receipts}
+            ).values_list('id', 'vendor_id'))
+            new = {}
+            for r in receipts:
+                if r.voucher_number in missing and r.voucher_number not in new:
+                    new[r.voucher_number] = Voucher(
+                        number=r.voucher_number, vendor_id=vendors.get(r.stock_item_id), date=r.date_received
+                    )
+            Voucher.objects.bulk_create(new.values(), ignore_conflicts=True)
+            created = dict(Voucher.objects.filter(number__in=missing).values_list('number', 'id'))
+            found.update(created)
+            search.index('voucher', created.values())
+        for r in receipts:
+            if r.voucher_number and not r.voucher_id:
+                r.voucher_id = found[r.voucher_number]
+
+    unnumbered = {r.voucher_id for r in receipts if r.voucher_id and not r.voucher_number}
+    if unnumbered:
+        names = dict(Voucher.objects.filter(id__in=unnumbered).values_list('id', 'number'))
+        for r in receipts:
+            if r.voucher_id in names and not r.voucher_number:
+                r.voucher_number = names[r.voucher_id]
+
+
+def refresh_totals(voucher_ids):
+    """Recompute the cached totals of the given vouchers in the database."""
+    voucher_ids = sorted(filter(None, voucher_ids))
+    lines = Receipt.objects.filter(voucher=OuterRef('pk')).order_by().values('voucher')
+    for voucher_id in voucher_ids:
+        # One UPDATE with correlated subqueries, so concurrent writers can't
+        # overwrite each other's totals with stale sums.
+        Voucher.objects.filter(pk=voucher_id).update(
+            total_quantity=Coalesce(
+                Subquery(lines.annotate(total=Sum('quantity_received')).values('total')), Value(0)
+            ),
+            total_price=Coalesce(
+                Subquery(lines.annotate(total=Sum(LINE_TOTAL, output_field=models.DecimalField())).values('total')),
+                Value(Decimal('0')), output_field=models.DecimalField(),
+            ),
+            updated_at=Now(),
+        )
+    if voucher_ids:
+        conditional.touch_vendors(
+            Voucher.objects.filter(pk__in=voucher_ids).values_list('vendor_id', flat=True)
+        )
+
+
+def voucher_summary(voucher_number, start=None, end=None):
+    """Template context for one voucher: its lines grouped by (item, unit price)."""
+    voucher = Voucher.objects.select_related('vendor').filter(number=voucher_number).first()
+    receipts = Receipt.objects.filter(voucher=voucher) if voucher else Receipt.objects.none()
+    if start and end:
+        receipts = receipts.filter(date_received__range=[start, end])
+
+    lines = list(
+        group_receipts(receipts, 'unit_price', item_name=F('stock_item__name'), totals=True)
+        .order_by('item_name', 'unit_price')
+    )
+    return {
+        "voucher": voucher,
+        "voucher_number": voucher_number,
+        "vendor_name": voucher.vendor.name if voucher and voucher.vendor else "",
+        "voucher_date": voucher.date if voucher else "",
+        "receipts": lines,
+        "grand_total": lines[0]["grand_total"] if lines else Decimal("0.00"),
+    }
@@ -0,0 +1,41 @@
+"""
+Form widgets.
+
+``ItemAutocomplete`` replaces the stock item ``<select>``: it renders only the
+selected option (with its current balance) and a text box that queries the
+``item_lookup`` endpoint as the user types, so forms and formset rows no
+longer embed the whole catalogue. The field's queryset is still used to
+validate the submitted id.
+"""
+from django import forms
+from django.urls import reverse
+
+from .models import StockItem
+
+
+class ItemAutocomplete(forms.Select):
+    template_name = 'store/widgets/item_autocomplete.html'
+
+    class Media:
+        js = ('store/js/item_autocomplete.js',)
+
+    def __init__(self, attrs=None, url_name='item_lookup'):
+        super().__init__(attrs)
+        self.url_name = url_name
+
+    def optgroups(self, name, value, attrs=None):
+        ids = [pk for pk in value if str(pk).isdigit()]
+        options = [self.create_option(name, '', '---------', not ids, 0)]
+        items = StockItem.objects.filter(pk__in=ids).values_list('pk', 'name', 'balance__quantity_available')
+        for index, (pk, label, available) in enumerate(items, start=1):
+            option = self.create_option(name, pk, label, True, index)
+            option['attrs']['data-available'] = available if available is not None else 0
+            options.append(option)
+        return [(None, options, 0)]
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        context['widget']['url'] = reverse(self.url_name)
+        selected = [option for _, group, _ in context['widget']['optgroups'] for option in group if option['value']]
+        context['widget']['selected_label'] = selected[0]['label'] if selected else ''
+        return context
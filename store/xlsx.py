@@ -0,0 +1,216 @@
+"""
+Minimal streaming XLSX writer and reader.
+
+Writes a single-sheet workbook through ``zipfile`` into a sink that is
+drained as it fills, so rows never accumulate in memory. Only what the
+exports need is supported: strings, numbers and dates (written as ISO text).
+
+``read_xlsx`` goes the other way for the importer: it walks the first sheet
+with ``iterparse`` and yields one list of cell values per row, clearing each
+row as it goes.
+"""
+import io
+import posixpath
+import re
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from xml.etree.ElementTree import iterparse
+from xml.sax.saxutils import escape
+
+CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="xl/workbook.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+    '</Relationships>'
+)
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_TAIL = '</sheetData></worksheet>'
+
+# Characters XML 1.0 doesn't allow, even escaped.
+_ILLEGAL_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+class _Sink(io.RawIOBase):
+    """Write-only, non-seekable buffer that hands its contents out on drain()."""
+
+    def __init__(self):
+        self._chunks = []
+        self._size = 0
+        self._pos = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._size += len(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._pos
+
+    def pending(self):
+        return self._size
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        self._size = 0
+        return data
+
+
+def _cell(value):
+    if value is None:
+        return '<c/>'
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        return f'<c><v>{value}</v></c>'
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    text = escape(_ILLEGAL_XML.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _row(values):
+    return ('<row>' + ''.join(_cell(value) for value in values) + '</row>').encode()
+
+
+def stream_xlsx(header, rows, sheet_name='Sheet1', flush_bytes=64 * 1024):
+    """Yield the bytes of an .xlsx file with ``header`` followed by ``rows``."""
+    sink = _Sink()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        zf.writestr('_rels/.rels', _ROOT_RELS)
+        zf.writestr('xl/workbook.xml', _WORKBOOK.format(name=escape(sheet_name[:31])))
+        zf.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+        with zf.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(_SHEET_HEAD.encode())
+            if header:
+                sheet.write(_row(header))
+            for row in rows:
+                sheet.write(_row(row))
+                if sink.pending() >= flush_bytes:
+                    yield sink.drain()
+            sheet.write(_SHEET_TAIL.encode())
+    yield sink.drain()
+
+
+# ---------------- Reading ----------------
+_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_PKG_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+_COLUMN = re.compile(r'[A-Z]+')
+
+
+def _column_index(ref):
+    index = 0
+    for letter in _COLUMN.match(ref).group():
+        index = index * 26 + ord(letter) - 64
+    return index - 1
+
+
+def _text(element):
+    """Concatenated <t> text of a shared or inline string (rich text has several runs)."""
+    return ''.join(t.text or '' for t in element.iter(f'{_NS}t'))
+
+
+def _first_sheet(zf):
+    with zf.open('xl/workbook.xml') as f:
+        for _, element in iterparse(f):
+            if element.tag == f'{_NS}sheet':
+                rel_id = element.get(f'{_REL_NS}id')
+                break
+        else:
+            raise ValueError("The workbook has no sheets.")
+    with zf.open('xl/_rels/workbook.xml.rels') as f:
+        for _, element in iterparse(f):
+            if element.tag == f'{_PKG_REL_NS}Relationship' and element.get('Id') == rel_id:
+                target = element.get('Target')
+                return target.lstrip('/') if target.startswith('/') else posixpath.join('xl', target)
+    raise ValueError("The workbook's first sheet is missing.")
+
+
+def _shared_strings(zf):
+    if 'xl/sharedStrings.xml' not in zf.namelist():
+        return []
+    strings = []
+    with zf.open('xl/sharedStrings.xml') as f:
+        for _, element in iterparse(f):
+            if element.tag == f'{_NS}si':
+                strings.append(_text(element))
+                element.clear()
+    return strings
+
+
+def _value(cell, strings):
+    kind = cell.get('t')
+    if kind == 'inlineStr':
+        return _text(cell)
+    v = cell.find(f'{_NS}v')
+    if v is None or v.text is None:
+        return None
+    if kind == 's':
+        return strings[int(v.text)]
+    if kind == 'b':
+        return v.text == '1'
+    # Numbers (and dates, which are numbers with a date style) stay text for
+    # the caller to parse; so do formula strings.
+    return v.text
+
+
+def read_xlsx(fileobj):
+    """Yield the rows of the first sheet of an .xlsx file as lists of values."""
+    with zipfile.ZipFile(fileobj) as zf:
+        strings = _shared_strings(zf)
+        with zf.open(_first_sheet(zf)) as sheet:
+            sheet_data = None
+            for event, element in iterparse(sheet, events=('start', 'end')):
+                if event == 'start':
+                    if element.tag == f'{_NS}sheetData':
+                        sheet_data = element
+                    continue
+                if element.tag != f'{_NS}row':
+                    continue
+                row = []
+                for cell in element.iter(f'{_NS}c'):
+                    ref = cell.get('r')
+                    if ref:
+                        row.extend([None] * (_column_index(ref) - len(row)))
+                    row.append(_value(cell, strings))
+                # Drop the parsed row from the tree so memory stays flat.
+                sheet_data.clear()
+                yield row